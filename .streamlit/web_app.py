@@ -1,10 +1,18 @@
-import os, joblib, sqlite3
-import numpy as np
+import os, sys, sqlite3, tempfile
 import pandas as pd
 import streamlit as st
 from datetime import datetime
 import plotly.express as px
-import speech_recognition as sr
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, BASE_DIR)
+
+from src import analytics, metrics, queries
+from src.database import (DB_PATH, connection, delete_expenses, fetch_expenses, get_pool, init_db,
+                          insert_expense, search_expenses, update_expenses)
+from src.export import EXPORT_FORMATS, count_expenses, export_expenses
+from src.ingest_service import service_url, submit_expenses
+from src.predict import model_version, predict_expenses
 
 st.set_page_config(page_title="Smart Expense AI", page_icon="💸", layout="wide")
 
@@ -27,30 +35,72 @@ color:white;text-align:center;font-size:26px;font-weight:600;margin-bottom:25px;
 </div>
 """, unsafe_allow_html=True)
 
-# ---------------- DATABASE ----------------
-conn = sqlite3.connect("expenses.db", check_same_thread=False)
-cursor = conn.cursor()
-cursor.execute("""CREATE TABLE IF NOT EXISTS expenses (
-id INTEGER PRIMARY KEY AUTOINCREMENT,
-date TEXT, description TEXT, category TEXT, amount REAL, confidence TEXT)""")
-cursor.execute("""CREATE TABLE IF NOT EXISTS corrections (description TEXT, correct_category TEXT)""")
-conn.commit()
+# ---------------- SHARED RESOURCES ----------------
+# Streamlit re-runs this script on every interaction and for every session;
+# cache_resource runs these once per server process and shares the result.
+@st.cache_resource
+def open_database(path):
+    # Schema, indexes, rollups and search index come from src/migrations.py
+    init_db(path)
+    queries.update_statistics(path)
+    return get_pool(path)
 
-# ---------------- LOAD MODEL ----------------
-BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
-MODEL_PATH = os.path.join(BASE_DIR, "model", "classifier.pkl")
-pipeline = joblib.load(MODEL_PATH)
+@st.cache_resource
+def load_model():
+    # The registry swaps in newly published versions by itself (src/ml/registry.py)
+    from src import predict
+    predict.get_pipeline()
+    return predict.registry
 
-# ---------------- AI HELPERS ----------------
-def confidence_label(score):
-    return "High" if score>=0.75 else "Medium" if score>=0.5 else "Low"
+@st.cache_resource
+def start_metrics_server(port):
+    # Prometheus text on http://127.0.0.1:<port>/metrics (src/metrics.py)
+    return metrics.serve(port)
+
+open_database(DB_PATH)
+load_model()
+if os.environ.get("EXPENSE_METRICS_PORT"):
+    start_metrics_server(int(os.environ["EXPENSE_METRICS_PORT"]))
+
+# ---------------- CACHED QUERIES ----------------
+# Dashboard results are kept for DASHBOARD_TTL seconds so reruns don't touch
+# SQLite; writes made here clear them at once, writes from other processes
+# (ingest service, CLI) show up when the TTL runs out.
+DASHBOARD_TTL=60
+
+@st.cache_data(ttl=DASHBOARD_TTL,show_spinner=False)
+def dashboard_bounds():
+    return queries.bounds(DB_PATH)
 
-def predict_expense(text):
-    probs=pipeline.predict_proba([text])[0]
-    idx=np.argmax(probs)
-    return pipeline.classes_[idx], confidence_label(probs[idx]), probs[idx]
+@st.cache_data(ttl=DASHBOARD_TTL,show_spinner=False)
+def dashboard_totals(start,end,min_amt=None,max_amt=None):
+    return queries.category_totals(start,end,min_amt,max_amt,DB_PATH)
 
+@st.cache_data(ttl=DASHBOARD_TTL,show_spinner=False)
+def dashboard_trends(start,end,min_amt=None,max_amt=None):
+    # One columnar load; only the small derived frames are cached
+    frame=analytics.load_expenses(DB_PATH,start,end,min_amt,max_amt)
+    if frame.empty: return None
+    trends=analytics.category_trends(frame)
+    trends.index=trends.index.astype(str)
+    return {
+        "rolling":analytics.rolling_spend(frame)[["rolling_7d","rolling_30d"]],
+        "trends":trends,
+        "latest":analytics.month_over_month(frame).iloc[-1].unstack(0)[["spend","delta","pct_change"]],
+        "merchants":analytics.top_merchants(frame)
+    }
+
+@st.cache_data(ttl=DASHBOARD_TTL,show_spinner=False)
+def dashboard_burn(start,end,min_amt,max_amt,budget):
+    return analytics.burn_rate(analytics.load_expenses(DB_PATH,start,end,min_amt,max_amt),budget)
+
+def invalidate_dashboard():
+    for cached in (dashboard_bounds,dashboard_totals,dashboard_trends,dashboard_burn):
+        cached.clear()
+
+# ---------------- AI HELPERS ----------------
 def voice_to_text():
+    import speech_recognition as sr
     r=sr.Recognizer()
     with sr.Microphone() as source:
         st.info("Listening...")
@@ -58,11 +108,46 @@ def voice_to_text():
         try: return r.recognize_google(audio)
         except: return ""
 
+# ---------------- ONLINE LEARNING ----------------
+# Opt in with EXPENSE_ONLINE_LEARNING=1: corrections are folded into the model
+# in the background and swapped in without a restart.
+@st.cache_resource
+def start_online_trainer():
+    from src.ml.online import OnlineTrainer
+    from src.predict import set_pipeline
+    trainer=OnlineTrainer(DB_PATH,on_publish=set_pipeline)
+    trainer.start()
+    return trainer
+
+if os.environ.get("EXPENSE_ONLINE_LEARNING")=="1":
+    start_online_trainer()
+
+WEB_EXPORT_MAX_ROWS=200_000
+
 CATEGORY_EMOJI={"food":"🍔","travel":"🚕","shopping":"🛍️","entertainment":"🎬","other":"📦"}
 
 # ---------------- SIDEBAR ----------------
 st.sidebar.title("📌 Menu")
 page=st.sidebar.radio("Navigate",["➕ Add Expense","📊 Dashboard","📜 History"])
+st.sidebar.caption(f"🧠 Model: {model_version() or 'legacy (model/classifier.pkl)'}")
+
+# ---------------- DEBUG PANEL ----------------
+# Hot-path timings of this server process (every session feeds the same histograms)
+with st.sidebar.expander("🛠 Debug"):
+    snap=metrics.snapshot()
+    if snap["timings"]:
+        timings=pd.DataFrame(snap["timings"]).T[["count","p50_ms","p95_ms","p99_ms"]]
+        st.dataframe(timings,use_container_width=True)
+    else:
+        st.caption("No timings recorded yet.")
+    for name,value in snap["counters"].items():
+        st.caption(f"{name}: {value}")
+    rows=snap["counters"].get("predict.rows",0)
+    if rows:
+        st.caption(f"Merchant rules hit rate: {snap['counters'].get('predict.rule_hits',0)/rows:.1%}")
+    profile_saves=st.checkbox("Profile saves (cProfile)",key="profile_saves")
+    if st.session_state.get("last_profile"):
+        st.code(st.session_state.last_profile,language=None)
 
 # ---------------- ADD EXPENSE ----------------
 if page=="➕ Add Expense":
@@ -76,77 +161,189 @@ if page=="➕ Add Expense":
     date=st.date_input("Date",datetime.today())
 
     if st.button("Predict & Save"):
-        cat,conf,score=predict_expense(desc)
-        cursor.execute("INSERT INTO expenses VALUES(NULL,?,?,?,?,?)",(str(date),desc,cat,amount,conf))
-        conn.commit()
+        with metrics.profile("web-add",enabled=profile_saves,top=15) as profiled, metrics.timer("web.add"):
+            if service_url():
+                # Queued through the ingest service, which batches and owns the writes
+                res=submit_expenses([{"date":str(date),"description":desc,"amount":amount}])[0]
+                cat,score=res["category"],res["score"]
+            else:
+                pred=predict_expenses([desc]).iloc[0]
+                cat,conf,score=str(pred["category"]),str(pred["confidence"]),float(pred["score"])
+                insert_expense(desc,amount,cat,DB_PATH,date=str(date),confidence=conf,score=score)
+        if profiled.text:
+            st.session_state.last_profile=profiled.text
+        invalidate_dashboard()
         st.success(f"Saved as {cat}")
         st.progress(min(score,1.0))
 
 # ---------------- DASHBOARD ----------------
 elif page=="📊 Dashboard":
-    df=pd.read_sql_query("SELECT * FROM expenses",conn)
-    if df.empty: st.info("No data yet.")
+    data_bounds=dashboard_bounds()
+    if data_bounds is None: st.info("No data yet.")
     else:
-        df["date"]=pd.to_datetime(df["date"])
+        first,last,top_amount=data_bounds
 
         # FILTERS
         st.sidebar.subheader("Filters")
-        start,end=st.sidebar.date_input("Date Range",[df["date"].min(),df["date"].max()])
-        min_amt,max_amt=st.sidebar.slider("Amount Range",0.0,float(df["amount"].max()),(0.0,float(df["amount"].max())))
+        start,end=st.sidebar.date_input("Date Range",[pd.to_datetime(first),pd.to_datetime(last)])
+        min_amt,max_amt=st.sidebar.slider("Amount Range",0.0,top_amount,(0.0,top_amount))
 
-        df=df[(df["date"]>=pd.to_datetime(start))&(df["date"]<=pd.to_datetime(end))]
-        df=df[(df["amount"]>=min_amt)&(df["amount"]<=max_amt)]
+        # Filtering and grouping run in SQLite; only one row per category comes back.
+        # An untouched amount slider lets the totals come from the daily rollup.
+        if min_amt<=0 and max_amt>=top_amount:
+            min_amt=max_amt=None
+        totals=dashboard_totals(start,end,min_amt,max_amt)
+        summary=queries.summarize(totals)
 
         col1,col2,col3=st.columns(3)
-        col1.metric("Total Spent",f"₹{df['amount'].sum():.2f}")
-        col2.metric("Transactions",len(df))
-        col3.metric("Top Category",df['category'].value_counts().idxmax())
+        col1.metric("Total Spent",f"₹{summary['total']:.2f}")
+        col2.metric("Transactions",summary["count"])
+        col3.metric("Top Category",summary["top_category"] or "—")
 
-        st.plotly_chart(px.bar(df.groupby("category")["amount"].sum().reset_index(),
-                               x="category",y="amount",color="category"),use_container_width=True)
+        st.plotly_chart(px.bar(totals,x="category",y="amount",color="category"),use_container_width=True)
 
         # PIE CHART
-        st.plotly_chart(px.pie(df,names="category",values="amount",title="Spending Distribution"),
+        st.plotly_chart(px.pie(totals,names="category",values="amount",title="Spending Distribution"),
                         use_container_width=True)
 
+        # TRENDS — one columnar load, every view below is computed from it
+        views=dashboard_trends(start,end,min_amt,max_amt)
+
+        if views is not None:
+            st.subheader("📈 Rolling Spend")
+            st.line_chart(views["rolling"])
+
+            st.subheader("📅 Month over Month")
+            st.plotly_chart(px.line(views["trends"],markers=True),use_container_width=True)
+            st.dataframe(views["latest"].round(2),use_container_width=True)
+
+            st.subheader("🏪 Top Merchants")
+            st.dataframe(views["merchants"].round(2),use_container_width=True)
+
+            budget=st.sidebar.number_input("Monthly Budget",min_value=0.0,value=0.0,step=1000.0)
+            if budget>0:
+                burn=dashboard_burn(start,end,min_amt,max_amt,budget)
+                st.subheader(f"🔥 Budget Burn — {burn['month']}")
+                b1,b2,b3=st.columns(3)
+                b1.metric("Spent",f"₹{burn['spent']:.2f}",f"{burn['burn_pct']}% of budget")
+                b2.metric("Per Day",f"₹{burn['daily_rate']:.2f}")
+                b3.metric("Projected",f"₹{burn['projected']:.2f}",f"₹{burn['projected_remaining']:.2f} left",
+                          delta_color="normal")
+                st.progress(min(burn["spent"]/budget,1.0))
+                if burn["runs_out_day"]:
+                    st.warning(f"At this rate the budget runs out on day {burn['runs_out_day']}.")
+
 # ---------------- HISTORY ----------------
 elif page=="📜 History":
     st.markdown('<div class="big-title">Expense History</div>',unsafe_allow_html=True)
 
-    df=pd.read_sql_query("SELECT * FROM expenses",conn)
-    search=st.text_input("🔍 Search description")
+    HISTORY_COLUMNS=("id","date","description","category","amount","confidence")
+    EDITABLE_COLUMNS=["date","description","category","amount"]
+
+    c1,c2=st.columns([3,1])
+    search=c1.text_input("🔍 Search description")
+    page_size=c2.selectbox("Rows per page",[25,50,100,250],index=1)
+
+    # Browsing pages by keyset: each cursor is the id the page starts after, so
+    # every page is one primary key seek. Search pages are ranked FTS matches,
+    # paged by offset.
+    if st.session_state.get("history_filter")!=(search,page_size):
+        st.session_state.history_filter=(search,page_size)
+        st.session_state.history_cursors=[0 if search else None]
+    cursors=st.session_state.history_cursors
 
     if search:
-        df=df[df["description"].str.contains(search,case=False)]
-
-    for _,row in df.iterrows():
-        with st.container():
-            c1,c2,c3,c4,c5,c6,c7=st.columns([1,2,1,1,1,1,1])
-            c1.write(row["date"])
-            c2.write(row["description"])
-            c3.write(row["category"])
-            c4.write(f"₹{row['amount']:.2f}")
-            c5.write(row["confidence"])
-
-            if c6.button("✏ Edit",key=f"edit{row['id']}"):
-                st.session_state.edit_id=row["id"]
-
-            if c7.button("🗑",key=f"del{row['id']}"):
-                cursor.execute("DELETE FROM expenses WHERE id=?",(row["id"],))
-                conn.commit(); st.rerun()
-
-    # EDIT FORM
-    if "edit_id" in st.session_state:
-        edit_df=pd.read_sql_query(f"SELECT * FROM expenses WHERE id={st.session_state.edit_id}",conn)
-        if not edit_df.empty:
-            e=edit_df.iloc[0]
-            st.markdown("### ✏ Edit Entry")
-            new_desc=st.text_input("Description",e["description"])
-            new_amt=st.number_input("Amount",value=float(e["amount"]))
-            new_cat=st.selectbox("Category",list(CATEGORY_EMOJI.keys()),index=list(CATEGORY_EMOJI.keys()).index(e["category"]))
-            if st.button("Update"):
-                cursor.execute("UPDATE expenses SET description=?,amount=?,category=? WHERE id=?",
-                               (new_desc,new_amt,new_cat,e["id"]))
-                conn.commit(); del st.session_state.edit_id; st.rerun()
-
-    st.download_button("Download CSV",df.to_csv(index=False).encode(),"expenses.csv")
+        rows=search_expenses(search,page_size+1,offset=cursors[-1],columns=HISTORY_COLUMNS,path=DB_PATH)
+    else:
+        rows=fetch_expenses(page_size+1,path=DB_PATH,before_id=cursors[-1],columns=HISTORY_COLUMNS)
+    has_next=len(rows)>page_size
+    df=pd.DataFrame(rows[:page_size],columns=HISTORY_COLUMNS).set_index("id")
+    df["delete"]=False
+
+    # One grid per page; edits and deletes are applied together on save
+    with st.form("history_edits"):
+        edited=st.data_editor(
+            df,
+            key=f"history_grid_{len(cursors)}_{st.session_state.get('history_version',0)}",
+            disabled=["confidence"],
+            column_config={
+                "category":st.column_config.SelectboxColumn("category",options=list(CATEGORY_EMOJI.keys())),
+                "amount":st.column_config.NumberColumn("amount",format="₹%.2f",min_value=0.0),
+                "delete":st.column_config.CheckboxColumn("🗑")
+            },
+            use_container_width=True
+        )
+        saved=st.form_submit_button("💾 Save changes")
+
+    if saved and not df.empty:
+        deleted=edited.index[edited["delete"]]
+        kept=edited.drop(index=deleted)
+        original=df.loc[kept.index,EDITABLE_COLUMNS]
+        # NULL == NULL here, or every row with an empty category would count as edited
+        diff=kept[EDITABLE_COLUMNS].ne(original)&~(kept[EDITABLE_COLUMNS].isna()&original.isna())
+        changed=kept.index[diff.any(axis=1)]
+
+        updates=kept.loc[changed,EDITABLE_COLUMNS].copy()
+        # The table only accepts YYYY-MM-DD dates; check before writing anything
+        dates=pd.to_datetime(updates["date"].astype(str),errors="coerce",format="mixed")
+        bad=updates.index[dates.isna()]
+        updates["date"]=dates.dt.strftime("%Y-%m-%d")
+
+        if len(bad):
+            st.error(f"❌ Invalid date for expense id(s) {', '.join(map(str,bad))} — use YYYY-MM-DD. Nothing was saved.")
+        else:
+            try:
+                if len(deleted):
+                    delete_expenses(deleted,DB_PATH)
+                if len(changed):
+                    update_expenses(
+                        [(d,desc,cat,float(amt),int(i)) for i,(d,desc,cat,amt) in zip(changed,updates.itertuples(index=False))],
+                        EDITABLE_COLUMNS,DB_PATH
+                    )
+                    recategorized=changed[diff.loc[changed,"category"]&updates["category"].notna()]
+                    if len(recategorized):
+                        with connection(DB_PATH) as conn:
+                            conn.executemany("INSERT INTO corrections VALUES(?,?)",
+                                             kept.loc[recategorized,["description","category"]].itertuples(index=False))
+            except (sqlite3.IntegrityError,ValueError) as e:
+                st.error(f"❌ Could not save changes: {e}")
+            else:
+                if len(deleted) or len(changed):
+                    invalidate_dashboard()
+                # New grid key so the next render starts from the saved rows
+                st.session_state.history_version=st.session_state.get("history_version",0)+1
+                st.toast(f"Updated {len(changed)}, deleted {len(deleted)}")
+                st.rerun()
+
+    p1,p2,p3=st.columns([1,2,1])
+    if p1.button("⬅ Newer",disabled=len(cursors)==1):
+        cursors.pop(); st.rerun()
+    p2.caption(f"Page {len(cursors)}")
+    if p3.button("Older ➡",disabled=not has_next):
+        cursors.append(cursors[-1]+page_size if search else int(df.index[-1])); st.rerun()
+
+    # EXPORT — built only when asked for, instead of serialising the whole
+    # table on every render. download_button holds the file in memory, so
+    # exports over WEB_EXPORT_MAX_ROWS are sent to the CLI, which streams to disk.
+    with st.expander("⬇ Export"):
+        e1,e2,e3=st.columns([1,2,2])
+        fmt=e1.radio("Format",EXPORT_FORMATS,horizontal=True)
+        export_range=e2.date_input("Dates",[],key="export_dates")
+        export_categories=e3.multiselect("Categories",list(CATEGORY_EMOJI.keys()))
+        if st.button("Prepare export"):
+            dates=list(export_range)
+            start,end=(dates[0],dates[-1]) if dates else (None,None)
+            matching=count_expenses(DB_PATH,start,end,export_categories or None)
+            if matching>WEB_EXPORT_MAX_ROWS:
+                st.warning(f"{matching:,} rows is more than the browser export allows ({WEB_EXPORT_MAX_ROWS:,}). "
+                           "Use the CLI, which streams straight to disk:")
+                st.code(f"python ExpenseTrack.py export expenses.{fmt}"
+                        +(f" --start {start} --end {end}" if start else "")
+                        +"".join(f" --category {c}" for c in export_categories))
+            else:
+                with tempfile.TemporaryFile() as out:
+                    stats=export_expenses(out,fmt,DB_PATH,start,end,export_categories or None)
+                    out.seek(0)
+                    data=out.read()
+                st.caption(f"{stats['rows']} rows in {stats['seconds']}s")
+                st.download_button(f"Download {fmt.upper()}",data,f"expenses.{fmt}")
@@ -1,17 +1,157 @@
 # ExpenseTrack.py
 
-from src.tracker import add_expense
+import time
 
-desc = input("Enter expense description: ")
-amt = float(input("Enter amount: "))
+_START = time.perf_counter()
+
+import argparse
+import sys
+
+from src import metrics
+from src.database import BULK_CHUNK_SIZE, DB_PATH
+from src.tracker import add_expense, import_csv, print_report
+
+_IMPORTED = time.perf_counter()
+
+
+def print_startup_profile():
+    now = time.perf_counter()
+    predict = sys.modules.get("src.predict")
+    load_seconds = getattr(predict, "load_seconds", None)
+
+    print("\n⏱  Startup profile", file=sys.stderr)
+    print(f"   imports:    {(_IMPORTED - _START) * 1000:8.1f} ms", file=sys.stderr)
+    if load_seconds is None:
+        print("   model load:      not loaded", file=sys.stderr)
+    else:
+        print(f"   model load: {load_seconds * 1000:8.1f} ms", file=sys.stderr)
+    print(f"   total:      {(now - _START) * 1000:8.1f} ms", file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="AI-powered expense tracker")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="report import and model load times on exit")
+    parser.add_argument("--ingest-url", help="submit through a running ingest service "
+                                             "(default: $EXPENSE_INGEST_URL, else write directly)")
+    parser.add_argument("--stats", action="store_true",
+                        help="print hot-path timings (p50/p95/p99) of this command on exit")
+    parser.add_argument("--profile", action="store_true",
+                        help="run the command under cProfile and save the stats to .cache/profiles/")
+    commands = parser.add_subparsers(dest="command")
+
+    commands.add_parser("add", help="add a single expense interactively (default)")
+
+    import_parser = commands.add_parser("import", help="bulk import expenses from a CSV file")
+    import_parser.add_argument("csv_path", help="CSV with description and amount columns (category optional)")
+    import_parser.add_argument("--db", default=DB_PATH, help="database to import into (default: %(default)s)")
+    import_parser.add_argument("--chunk-size", type=int, default=BULK_CHUNK_SIZE,
+                               help="rows per transaction (default: %(default)s)")
+
+    report_parser = commands.add_parser("report", help="spending trends, top merchants and budget burn")
+    report_parser.add_argument("--db", default=DB_PATH, help="database to report on (default: %(default)s)")
+    report_parser.add_argument("--budget", type=float, help="monthly budget to track burn rate against")
+    report_parser.add_argument("--month", help="month for the budget, YYYY-MM (default: current)")
+
+    export_parser = commands.add_parser("export", help="stream expenses to a CSV or Parquet file")
+    export_parser.add_argument("out_path", help="output file; format taken from the .csv/.parquet extension")
+    export_parser.add_argument("--db", default=DB_PATH, help="database to export (default: %(default)s)")
+    export_parser.add_argument("--start", help="first date to include, YYYY-MM-DD")
+    export_parser.add_argument("--end", help="last date to include, YYYY-MM-DD")
+    export_parser.add_argument("--category", action="append", dest="categories",
+                               help="only this category; repeat for several")
+
+    reclassify_parser = commands.add_parser("reclassify", help="re-run the classifier over stored expenses")
+    reclassify_parser.add_argument("--db", default=DB_PATH, help="database to reclassify (default: %(default)s)")
+    reclassify_parser.add_argument("--workers", type=int, help="worker processes (default: CPU count)")
+    reclassify_parser.add_argument("--restart", action="store_true", help="ignore checkpoints and start over")
+
+    stats_parser = commands.add_parser("stats", help="hot-path timings of a running ingest service")
+    stats_parser.add_argument("--url", help="ingest service (default: $EXPENSE_INGEST_URL or http://127.0.0.1:8765)")
+    stats_parser.add_argument("--prometheus", action="store_true", help="print Prometheus text instead of a table")
+
+    args = parser.parse_args(argv)
+
+    try:
+        with metrics.profile(args.command or "add", enabled=args.profile) as profiled:
+            run_command(args)
+    finally:
+        if args.profile_startup:
+            print_startup_profile()
+        if args.stats:
+            print("\n⏱  Hot-path timings\n" + metrics.format_table(), file=sys.stderr)
+        if profiled.path:
+            print(f"\n🔬 Profile saved to {profiled.path}\n{profiled.text}", file=sys.stderr)
+
+
+def show_service_stats(url=None, prometheus=False):
+    from urllib.error import URLError
+    from src.ingest_service import fetch_metrics, fetch_prometheus
+
+    try:
+        if prometheus:
+            print(fetch_prometheus(url), end="")
+            return
+        stats = fetch_metrics(url)
+    except URLError as e:
+        print(f"❌ No ingest service reachable ({e.reason}). "
+              "Use --stats to time a single command in this process instead.")
+        sys.exit(1)
+
+    print(f"Ingest service: up {stats['uptime_s']}s, {stats['written']} written, "
+          f"queue {stats['queue_depth']}, latency {stats['latency_ms']}\n")
+    print(metrics.format_table(stats))
+
+
+def run_command(args):
+    if args.command == "stats":
+        show_service_stats(args.url, args.prometheus)
+        return
+
+    if args.command == "import":
+        import_csv(args.csv_path, chunk_size=args.chunk_size, path=args.db)
+        return
+
+    if args.command == "export":
+        from src.export import export_expenses
+        stats = export_expenses(args.out_path, path=args.db, start=args.start, end=args.end,
+                                categories=args.categories)
+        print(f"Exported {stats['rows']} expenses to {args.out_path} in {stats['seconds']}s "
+              f"({stats['rows_per_sec']} rows/sec)")
+        return
+
+    if args.command == "reclassify":
+        from src.reclassify import reclassify
+        stats = reclassify(args.db, workers=args.workers, restart=args.restart)
+        print(f"Reclassified {stats['rows']} expenses ({stats['changed']} changed) in {stats['seconds']}s "
+              f"({stats['rows_per_sec']} rows/sec)")
+        return
+
+    if args.command == "report":
+        print_report(args.db, budget=args.budget, month=args.month)
+        return
+
+    desc = input("Enter expense description: ")
+    amt = float(input("Enter amount: "))
+
+    add_expense(desc, amt, ingest_url=args.ingest_url)
+
+
+if __name__ == "__main__":
+    main()
 
-add_expense(desc, amt)
 # source venv/bin/activate
 # python -m src.train
 # python -m src.predict
 #quit
 # burger
 #streamlit run .streamlit/web_app.py
-
-
-
+# python ExpenseTrack.py import statement.csv
+# python ExpenseTrack.py --profile-startup
+# python ExpenseTrack.py report --budget 30000
+# python ExpenseTrack.py export expenses.parquet --start 2024-01-01
+# python ExpenseTrack.py reclassify --workers 4
+# python -m src.ingest_service & EXPENSE_INGEST_URL=http://127.0.0.1:8765 python ExpenseTrack.py
+# python ExpenseTrack.py --stats import statement.csv
+# python ExpenseTrack.py --profile report
+# python ExpenseTrack.py stats [--prometheus]
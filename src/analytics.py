@@ -0,0 +1,271 @@
+# src/analytics.py
+#
+# Vectorized spend analytics over a columnar expenses frame.
+#
+# Load the frame once with load_expenses() (date: datetime64, category:
+# category, amount: float64, description: string) and pass it to any of the
+# functions below. n = transactions, d = days, m = months, c = categories,
+# u = distinct descriptions.
+#
+# Microbenchmarks on synthetic data:
+#   python -m src.analytics --bench --rows 1000000
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.database import connection
+from src.metrics import timer
+
+LOAD_SQL = """
+    SELECT date, description, category, amount
+    FROM expense_rows
+    WHERE date BETWEEN ? AND ?
+      AND amount BETWEEN ? AND ?
+"""
+
+
+# -----------------------------
+# LOADING
+# -----------------------------
+def load_expenses(path=None, start=None, end=None, min_amount=None, max_amount=None):
+    """Read the expenses needed for analytics into typed columns. O(n)."""
+    params = (
+        "0000-00-00" if start is None else str(start),
+        "9999-99-99" if end is None else str(end),
+        float("-inf") if min_amount is None else min_amount,
+        float("inf") if max_amount is None else max_amount
+    )
+    with connection(path) as conn, timer("query.analytics_load"):
+        df = pd.read_sql_query(LOAD_SQL, conn, params=params)
+    return prepare(df)
+
+
+def prepare(df):
+    """Coerce a raw frame to the analytics dtypes. O(n)."""
+    return pd.DataFrame({
+        "date": pd.to_datetime(df["date"]).dt.normalize(),
+        "description": df["description"].astype("string"),
+        "category": df["category"].astype("category"),
+        "amount": pd.to_numeric(df["amount"]).astype("float64")
+    })
+
+
+# -----------------------------
+# TRENDS
+# -----------------------------
+def category_trends(df, freq="M"):
+    """Spend per period x category, periods as rows.
+
+    One groupby over integer period codes and category codes.
+    O(n) time, O(periods x c) output.
+    """
+    periods = df["date"].dt.to_period(freq)
+    trends = df.groupby([periods, df["category"]], observed=True)["amount"].sum().unstack(fill_value=0.0)
+    trends.index.name = "period"
+    return trends
+
+
+def daily_totals(df):
+    """Total spend per calendar day, zero-filled between first and last day.
+
+    O(n) groupby plus O(d) reindex.
+    """
+    if df.empty:
+        return pd.Series(dtype="float64", name="amount")
+    daily = df.groupby("date")["amount"].sum()
+    days = pd.date_range(daily.index.min(), daily.index.max(), freq="D")
+    return daily.reindex(days, fill_value=0.0).rename("amount")
+
+
+def rolling_spend(df, windows=(7, 30)):
+    """Trailing 7/30-day spend per day.
+
+    Rolling sums run over the O(d) daily series, not over transactions.
+    O(n + d x len(windows)).
+    """
+    daily = daily_totals(df)
+    result = pd.DataFrame({"daily": daily})
+    for window in windows:
+        result[f"rolling_{window}d"] = daily.rolling(window, min_periods=1).sum()
+    return result
+
+
+def trailing_spend(df, windows=(7, 30), today=None):
+    """Spend in the last 7/30 days up to and including `today` (default: today).
+
+    Unlike rolling_spend().iloc[-1], the window ends today even when the
+    latest expense is older. One O(n) mask per window.
+    """
+    today = pd.Timestamp(today or pd.Timestamp.today()).normalize()
+    dates = df["date"].to_numpy()
+    amounts = df["amount"].to_numpy()
+    end = (today + pd.Timedelta(days=1)).to_datetime64()
+    return {
+        f"last_{window}d": float(amounts[(dates >= (today - pd.Timedelta(days=window - 1)).to_datetime64())
+                                         & (dates < end)].sum())
+        for window in windows
+    }
+
+
+def month_over_month(df):
+    """Monthly spend per category with absolute and % change vs previous month.
+
+    O(n) groupby, then O(m x c) diff on the small monthly table.
+    """
+    monthly = category_trends(df, "M")
+    if not monthly.empty:
+        # Months without spending are zero rows, so every diff is against the calendar month before
+        months = pd.period_range(monthly.index.min(), monthly.index.max(), freq="M", name="period")
+        monthly = monthly.reindex(months, fill_value=0.0)
+    monthly["total"] = monthly.sum(axis=1)
+    delta = monthly.diff()
+    pct = monthly.pct_change(fill_method=None).replace([np.inf, -np.inf], np.nan) * 100
+    return pd.concat({"spend": monthly, "delta": delta, "pct_change": pct}, axis=1)
+
+
+# -----------------------------
+# MERCHANTS
+# -----------------------------
+def merchant_keys(descriptions, words=2):
+    """Normalize descriptions to a merchant key ("Swiggy order #123" -> "swiggy order").
+
+    String work runs once per distinct description (factorize), then keys are
+    broadcast back with a NumPy take. O(n + u x len).
+    """
+    codes, uniques = pd.factorize(descriptions)
+    keys = (
+        pd.Series(uniques, dtype="string")
+        .str.lower()
+        .str.replace(r"[^a-z& ]+", " ", regex=True)
+        .str.split()
+        .str[:words]
+        .str.join(" ")
+        .fillna("")
+        .to_numpy(dtype=object)
+    )
+    result = np.where(codes >= 0, keys[np.maximum(codes, 0)], "")
+    return pd.Series(result, index=descriptions.index, dtype="string")
+
+
+def top_merchants(df, n=10):
+    """Merchants ranked by total spend, with count and average ticket.
+
+    O(n + u) plus an O(k log n) partial sort for the top rows.
+    """
+    grouped = df.groupby(merchant_keys(df["description"]).rename("merchant"))["amount"].agg(["sum", "count"])
+    grouped = grouped[grouped.index != ""]
+    top = grouped.nlargest(n, "sum")
+    top["average"] = top["sum"] / top["count"]
+    return top.rename(columns={"sum": "total"})
+
+
+# -----------------------------
+# BUDGET
+# -----------------------------
+def burn_rate(df, budget, month=None, today=None):
+    """How fast a monthly budget is being spent.
+
+    Filters one month with a vectorized mask (O(n)), the rest is O(1).
+    Returns spent, daily rate, projected month total, projected remaining
+    budget and the day of the month the budget runs out (None if it won't).
+    """
+    today = pd.Timestamp(today or pd.Timestamp.today()).normalize()
+    month = pd.Period(month or today, freq="M")
+
+    dates = df["date"].to_numpy()
+    mask = (dates >= month.start_time.to_datetime64()) & (dates <= month.end_time.to_datetime64())
+    spent = float(df["amount"].to_numpy()[mask].sum())
+
+    days_in_month = month.days_in_month
+    if today.to_period("M") == month:
+        elapsed = today.day
+    elif today.to_period("M") > month:
+        elapsed = days_in_month
+    else:
+        elapsed = 0
+
+    daily_rate = spent / elapsed if elapsed else 0.0
+    projected = daily_rate * days_in_month if elapsed < days_in_month else spent
+    runs_out_day = None
+    if daily_rate > 0 and projected > budget:
+        runs_out_day = min(days_in_month, max(1, int(np.ceil(budget / daily_rate))))
+
+    return {
+        "month": str(month),
+        "budget": float(budget),
+        "spent": round(spent, 2),
+        "days_elapsed": elapsed,
+        "daily_rate": round(daily_rate, 2),
+        "projected": round(projected, 2),
+        "projected_remaining": round(budget - projected, 2),
+        "burn_pct": round(spent / budget * 100, 1) if budget else None,
+        "runs_out_day": runs_out_day
+    }
+
+
+# -----------------------------
+# MICROBENCHMARKS
+# -----------------------------
+SYNTHETIC_MERCHANTS = [
+    "Swiggy order", "Zomato food", "Uber Ride", "Ola Cab", "Amazon Shopping",
+    "Flipkart Order", "Netflix Subscription", "Electricity Bill", "Starbucks Coffee",
+    "Metro Ticket", "Myntra shoes", "PVR cinema", "Dominos Pizza", "Spotify music"
+]
+SYNTHETIC_CATEGORIES = ["food", "travel", "shopping", "entertainment", "other"]
+
+
+def synthetic_frame(rows, days=730, seed=42):
+    """Columnar random expenses for benchmarking; built without Python loops."""
+    rng = np.random.default_rng(seed)
+    start = np.datetime64("2024-01-01")
+    descriptions = np.array(SYNTHETIC_MERCHANTS, dtype=object)
+    suffix = rng.integers(0, 1000, rows).astype(str)
+    return pd.DataFrame({
+        "date": (start + rng.integers(0, days, rows).astype("timedelta64[D]")).astype("datetime64[ns]"),
+        "description": pd.array(descriptions[rng.integers(0, len(descriptions), rows)] + " #" + suffix, dtype="string"),
+        "category": pd.Categorical.from_codes(rng.integers(0, len(SYNTHETIC_CATEGORIES), rows), SYNTHETIC_CATEGORIES),
+        "amount": rng.lognormal(5.5, 1.0, rows).round(2)
+    })
+
+
+def run_benchmarks(rows, repeat=3):
+    df = synthetic_frame(rows)
+    last_month = df["date"].max().to_period("M")
+    cases = {
+        "category_trends": lambda: category_trends(df),
+        "rolling_spend": lambda: rolling_spend(df),
+        "month_over_month": lambda: month_over_month(df),
+        "top_merchants": lambda: top_merchants(df),
+        "burn_rate": lambda: burn_rate(df, 50000, month=last_month, today=df["date"].max())
+    }
+
+    results = []
+    for name, fn in cases.items():
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            timings.append(time.perf_counter() - start)
+        best = min(timings)
+        results.append({
+            "function": name,
+            "rows": rows,
+            "best_ms": round(best * 1000, 2),
+            "rows_per_sec": round(rows / best) if best else None
+        })
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Expense analytics")
+    parser.add_argument("--bench", action="store_true", help="run microbenchmarks on synthetic data")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.bench:
+        print(f"⏳ Benchmarking on {args.rows:,} synthetic rows...")
+        print(pd.DataFrame(run_benchmarks(args.rows, args.repeat)).to_string(index=False))
@@ -0,0 +1,148 @@
+# src/benchmarks/runner.py
+#
+# Run the benchmark suites on synthetic data and save the timings as JSON,
+# tagged with the git commit, so two runs can be compared for regressions.
+#
+#   python -m src.benchmarks.runner run --rows 1000000 --json bench/$(git rev-parse --short HEAD).json
+#   python -m src.benchmarks.runner run --suites prediction history --repeat 20
+#   python -m src.benchmarks.runner run --smoke      # every suite once on a small dataset
+#   python -m src.benchmarks.runner compare bench/old.json bench/new.json [--threshold 0.10]
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.benchmarks.suites import SUITES, BenchContext
+
+REPEAT = 10
+MAX_SECONDS = 10.0       # stop repeating a case once it has used this much time
+REGRESSION_THRESHOLD = 0.10
+SMOKE_ROWS = 5_000
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def time_case(fn, repeat=REPEAT, max_seconds=MAX_SECONDS):
+    """Call `fn` once to warm up, then up to `repeat` timed times; returns seconds per call."""
+    fn()
+    timings = []
+    budget_start = time.perf_counter()
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+        if time.perf_counter() - budget_start > max_seconds:
+            break
+    return np.array(timings)
+
+
+def run(suites, rows, seed=42, repeat=REPEAT, workdir=None):
+    """Run the named suites; returns {"meta": ..., "setup": ..., "results": [...]}."""
+    ctx = BenchContext(rows, seed, workdir)
+    results = []
+    try:
+        for suite in suites:
+            print(f"⏳ Suite '{suite}'...")
+            for case, (fn, case_rows) in SUITES[suite](ctx).items():
+                timings = time_case(fn, repeat)
+                median = float(np.median(timings))
+                results.append({
+                    "suite": suite,
+                    "case": case,
+                    "runs": len(timings),
+                    "rows": case_rows,
+                    "min_ms": round(float(timings.min()) * 1000, 3),
+                    "median_ms": round(median * 1000, 3),
+                    "p95_ms": round(float(np.percentile(timings, 95)) * 1000, 3),
+                    "rows_per_sec": round(case_rows / median, 1) if median else None
+                })
+                print(f"   {case:<26} {median * 1000:10.3f} ms")
+        setup = dict(ctx.setup)
+    finally:
+        ctx.close()
+
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "rows": rows,
+            "seed": seed,
+            "repeat": repeat,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count()
+        },
+        "setup": setup,
+        "results": results
+    }
+
+
+def compare(old, new, threshold=REGRESSION_THRESHOLD):
+    """Median time change per case; returns (table, regressed case names)."""
+    key = ["suite", "case"]
+    before = pd.DataFrame(old["results"]).set_index(key)["median_ms"]
+    after = pd.DataFrame(new["results"]).set_index(key)["median_ms"]
+    table = pd.DataFrame({"old_ms": before, "new_ms": after}).dropna()
+    table["change"] = (table["new_ms"] / table["old_ms"] - 1).round(3)
+    regressed = table.index[table["change"] > threshold]
+    return table, [f"{suite}.{case}" for suite, case in regressed]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Prediction and storage benchmarks")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = sub.add_parser("run", help="run suites on a synthetic dataset")
+    run_parser.add_argument("--suites", nargs="+", choices=list(SUITES), default=list(SUITES))
+    run_parser.add_argument("--rows", type=int, default=100_000, help="rows in the synthetic database")
+    run_parser.add_argument("--seed", type=int, default=42)
+    run_parser.add_argument("--repeat", type=int, default=REPEAT, help="timed calls per case")
+    run_parser.add_argument("--workdir", help="keep the generated data here and reuse it next time")
+    run_parser.add_argument("--json", help="write results to this JSON file")
+    run_parser.add_argument("--smoke", action="store_true",
+                            help=f"quick check that every case runs: {SMOKE_ROWS:,} rows, one timed call")
+
+    cmp_parser = sub.add_parser("compare", help="compare two result files")
+    cmp_parser.add_argument("old")
+    cmp_parser.add_argument("new")
+    cmp_parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD,
+                            help="slowdown that counts as a regression (default: 0.10 = 10%%)")
+    args = parser.parse_args()
+
+    if args.command == "run":
+        if args.smoke:
+            args.rows, args.repeat = SMOKE_ROWS, 1
+        report = run(args.suites, args.rows, args.seed, args.repeat, args.workdir)
+        print("\n" + pd.DataFrame(report["results"]).set_index(["suite", "case"]).to_string())
+        if args.json:
+            os.makedirs(os.path.dirname(os.path.abspath(args.json)), exist_ok=True)
+            with open(args.json, "w") as f:
+                json.dump(report, f, indent=2)
+            print(f"\n✅ Results written to {args.json}")
+    else:
+        with open(args.old) as f:
+            old = json.load(f)
+        with open(args.new) as f:
+            new = json.load(f)
+        table, regressed = compare(old, new, args.threshold)
+        print(f"{(old['meta']['commit'] or '?')[:10]} → {(new['meta']['commit'] or '?')[:10]}\n")
+        print(table.to_string())
+        if regressed:
+            print(f"\n❌ {len(regressed)} regression(s) over {args.threshold:.0%}: {', '.join(regressed)}")
+            sys.exit(1)
+        print(f"\n✅ No case slowed down by more than {args.threshold:.0%}")
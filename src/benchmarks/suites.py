@@ -0,0 +1,156 @@
+# src/benchmarks/suites.py
+#
+# Benchmark cases, grouped into suites. A suite function takes the shared
+# BenchContext and returns {case name: (callable, rows per call)}; setup
+# happens there, outside the timed calls. The runner (src/benchmarks/runner.py)
+# times each callable.
+
+import os
+import shutil
+import tempfile
+
+from src.benchmarks.synthetic import labelled_sample, write_parquet, write_sqlite
+
+BATCH_ROWS = 10_000
+INSERT_ROWS = 10_000
+TRAIN_ROWS = 20_000
+
+
+class BenchContext:
+    """Synthetic database, Parquet file and samples shared by every suite."""
+
+    def __init__(self, rows, seed=42, workdir=None):
+        self.rows = rows
+        self.seed = seed
+        self.owns_workdir = workdir is None
+        self.workdir = workdir or tempfile.mkdtemp(prefix="expense_bench_")
+        os.makedirs(self.workdir, exist_ok=True)
+        self.db_path = os.path.join(self.workdir, f"bench_{rows}_{seed}.db")
+        self.parquet_path = os.path.join(self.workdir, f"bench_{rows}_{seed}.parquet")
+        self.texts, self.labels = labelled_sample(max(BATCH_ROWS, TRAIN_ROWS), seed + 1)
+        self.setup = {}
+
+    def database(self):
+        """Path of the synthetic database, generated on first use."""
+        if not os.path.exists(self.db_path):
+            self.setup["generate_sqlite"] = write_sqlite(self.db_path, self.rows, self.seed)
+        return self.db_path
+
+    def scratch_database(self):
+        """A throwaway copy of the database for cases that write."""
+        import sqlite3
+
+        from src.database import close_pools
+
+        source = self.database()
+        close_pools()
+        path = os.path.join(self.workdir, "scratch.db")
+        # The backup API reads through SQLite, so pages still in the WAL are included
+        original, copy = sqlite3.connect(source), sqlite3.connect(path)
+        try:
+            original.backup(copy)
+        finally:
+            original.close()
+            copy.close()
+        return path
+
+    def parquet(self):
+        if not os.path.exists(self.parquet_path):
+            self.setup["generate_parquet"] = write_parquet(self.parquet_path, self.rows, self.seed)
+        return self.parquet_path
+
+    def close(self):
+        from src.database import close_pools
+
+        close_pools()
+        if self.owns_workdir:
+            shutil.rmtree(self.workdir, ignore_errors=True)
+
+
+# -----------------------------
+# SUITES
+# -----------------------------
+def prediction_suite(ctx):
+    from src.predict import get_pipeline, predict_expenses
+
+    get_pipeline()
+    text = ctx.texts[0]
+    batch = ctx.texts[:BATCH_ROWS]
+    return {
+        "predict_single": (lambda: predict_expenses([text], use_cache=False), 1),
+        "predict_batch": (lambda: predict_expenses(batch, use_cache=False), len(batch)),
+        "predict_batch_cached": (lambda: predict_expenses(batch), len(batch)),
+        "predict_batch_model_only": (lambda: predict_expenses(batch, use_cache=False, use_rules=False), len(batch)),
+    }
+
+
+def storage_suite(ctx):
+    from src.database import insert_expense, insert_expenses_bulk
+
+    path = ctx.scratch_database()
+    rows = [(t, 100.0, c, "2025-06-01", "high", 0.9) for t, c in zip(ctx.texts[:INSERT_ROWS], ctx.labels)]
+    return {
+        "insert_single": (lambda: insert_expense(rows[0][0], 100.0, rows[0][2], path, date="2025-06-01"), 1),
+        "insert_bulk": (lambda: insert_expenses_bulk(rows, path=path), len(rows)),
+    }
+
+
+def dashboard_suite(ctx):
+    from src import analytics, queries
+
+    path = ctx.database()
+    first, last, top = queries.bounds(path)
+    return {
+        "bounds": (lambda: queries.bounds(path), 1),
+        "category_totals_rollup": (lambda: queries.category_totals(first, last, path=path), ctx.rows),
+        "category_totals_filtered": (lambda: queries.category_totals(first, last, 100, top / 2, path), ctx.rows),
+        "analytics_load": (lambda: analytics.load_expenses(path, first, last), ctx.rows),
+    }
+
+
+def history_suite(ctx):
+    from src.database import fetch_expenses, search_expenses
+
+    path = ctx.database()
+    middle = ctx.rows // 2
+    return {
+        "history_first_page": (lambda: fetch_expenses(50, path=path), 50),
+        "history_deep_page": (lambda: fetch_expenses(50, path=path, before_id=middle), 50),
+        "search_common": (lambda: search_expenses("swiggy", 50, path=path), 50),
+        "search_prefix": (lambda: search_expenses("netf", 50, path=path), 50),
+        "search_rare": (lambda: search_expenses("playstation store", 50, path=path), 50),
+    }
+
+
+def export_suite(ctx):
+    import pandas as pd
+
+    from src.export import export_expenses
+
+    path = ctx.database()
+    out = os.path.join(ctx.workdir, "export.parquet")
+    parquet = ctx.parquet()
+    return {
+        "export_parquet": (lambda: export_expenses(out, path=path), ctx.rows),
+        "read_parquet": (lambda: pd.read_parquet(parquet, columns=["date", "category", "amount"]), ctx.rows),
+    }
+
+
+def training_suite(ctx):
+    from src.train import build_pipeline
+
+    texts, labels = ctx.texts[:TRAIN_ROWS], ctx.labels[:TRAIN_ROWS]
+    return {
+        "train_tfidf": (lambda: build_pipeline("tfidf").fit(texts, labels), len(texts)),
+        "train_hashing": (lambda: build_pipeline("hashing").fit(texts, labels), len(texts)),
+    }
+
+
+SUITES = {
+    "prediction": prediction_suite,
+    "storage": storage_suite,
+    "dashboard": dashboard_suite,
+    "history": history_suite,
+    "export": export_suite,
+    "training": training_suite,
+}
@@ -0,0 +1,202 @@
+# src/benchmarks/synthetic.py
+#
+# Seeded, scalable synthetic expenses: merchant-style descriptions per
+# category, lognormal amounts and dates spread evenly over a date range in
+# id order (as real inserts arrive). Rows are generated in fixed-size numpy
+# chunks, so 10M rows stream straight into SQLite or Parquet in constant
+# memory. The same seed and chunk size always give the same rows.
+#
+#   python -m src.benchmarks.synthetic --rows 10000000 --sqlite /tmp/bench.db --parquet /tmp/bench.parquet
+
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+CHUNK_ROWS = 250_000
+START_DATE = "2024-01-01"
+DAYS = 730
+
+# category: (share of rows, lognormal mu, sigma of the amount, merchants)
+VOCABULARY = {
+    "food": (0.34, 5.4, 0.6, [
+        "swiggy", "zomato", "dominos pizza", "kfc", "mcdonalds", "burger king", "starbucks",
+        "cafe coffee day", "haldiram", "biryani blues", "subway", "chaayos", "blinkit grocery",
+        "bigbasket", "zepto", "dunzo", "barbeque nation", "pizza hut", "baskin robbins", "restaurant"
+    ]),
+    "travel": (0.18, 5.8, 1.1, [
+        "uber", "ola cab", "rapido", "metro card", "irctc train", "indigo flight", "air india",
+        "redbus", "makemytrip", "goibibo", "fastag toll", "indian oil petrol", "hp petrol pump",
+        "auto rickshaw", "airport taxi", "oyo rooms"
+    ]),
+    "shopping": (0.22, 6.6, 1.0, [
+        "amazon", "flipkart", "myntra", "ajio", "decathlon", "croma", "reliance digital",
+        "nykaa", "ikea", "lifestyle", "westside", "h&m", "zara", "meesho", "tata cliq", "dmart"
+    ]),
+    "entertainment": (0.12, 5.9, 0.7, [
+        "netflix", "spotify", "prime video", "hotstar", "pvr cinemas", "inox", "bookmyshow",
+        "youtube premium", "sony liv", "steam games", "playstation store", "concert tickets"
+    ]),
+    "other": (0.14, 6.2, 1.2, [
+        "electricity bill", "airtel recharge", "jio recharge", "lic premium", "rent transfer",
+        "apollo pharmacy", "gym membership", "school fees", "water bill", "gas cylinder",
+        "atm withdrawal", "paytm wallet"
+    ]),
+}
+
+# Description shapes seen in bank and UPI statements; "#" rows get a reference number
+TEMPLATES = ("{}", "{} order", "{} payment", "paid to {}", "upi/{}", "{} #", "{} bill", "{} #")
+
+CATEGORIES = list(VOCABULARY)
+_SHARES = np.array([v[0] for v in VOCABULARY.values()])
+_MU = np.array([v[1] for v in VOCABULARY.values()])
+_SIGMA = np.array([v[2] for v in VOCABULARY.values()])
+_MERCHANT_COUNTS = np.array([len(v[3]) for v in VOCABULARY.values()])
+_MERCHANT_OFFSETS = np.concatenate([[0], np.cumsum(_MERCHANT_COUNTS)[:-1]])
+
+# Every merchant x template x casing combination, so descriptions are an index lookup
+_PHRASES = np.array([
+    [[t.format(m), t.format(m).upper()] for t in TEMPLATES]
+    for v in VOCABULARY.values() for m in v[3]
+], dtype=object)
+_NUMBERED = np.array([t.endswith("#") for t in TEMPLATES])
+
+
+def generate_chunk(rng, first_row, n, total_rows, start=START_DATE, days=DAYS):
+    """`n` rows starting at global row `first_row` of a `total_rows` dataset."""
+    categories = rng.choice(len(CATEGORIES), n, p=_SHARES / _SHARES.sum())
+    merchants = _MERCHANT_OFFSETS[categories] + (rng.random(n) * _MERCHANT_COUNTS[categories]).astype(np.int64)
+    templates = rng.integers(0, len(TEMPLATES), n)
+    upper = (rng.random(n) < 0.15).astype(np.int64)
+
+    descriptions = _PHRASES[merchants, templates, upper]
+    numbered = _NUMBERED[templates]
+    descriptions[numbered] = descriptions[numbered] + rng.integers(1000, 99999, numbered.sum()).astype(str).astype(object)
+
+    # Dates rise with the row number, like ids do in a live table
+    rows = np.arange(first_row, first_row + n, dtype=np.int64)
+    dates = np.datetime64(start) + (rows * days // max(total_rows, 1)).astype("timedelta64[D]")
+
+    scores = rng.beta(8, 2, n).round(3)
+    return pd.DataFrame({
+        "id": rows + 1,
+        "date": dates.astype(str),
+        "description": descriptions,
+        "category": np.array(CATEGORIES, dtype=object)[categories],
+        "amount": np.maximum(rng.lognormal(_MU[categories], _SIGMA[categories]), 1.0).round(2),
+        "confidence": np.select([scores >= 0.85, scores >= 0.60], ["high", "medium"], default="low"),
+        "score": scores
+    })
+
+
+def iter_frames(rows, seed=42, chunk_rows=CHUNK_ROWS, start=START_DATE, days=DAYS):
+    """Yield DataFrames of at most `chunk_rows` rows, `rows` in total.
+
+    Chunk i is drawn from its own generator seeded with (seed, i).
+    """
+    for i, first in enumerate(range(0, rows, chunk_rows)):
+        rng = np.random.default_rng([seed, i])
+        yield generate_chunk(rng, first, min(chunk_rows, rows - first), rows, start, days)
+
+
+def labelled_sample(n, seed=42):
+    """(descriptions, categories) lists for prediction and training benchmarks."""
+    frame = next(iter_frames(n, seed, chunk_rows=max(n, 1)), None)
+    if frame is None:
+        return [], []
+    return frame["description"].tolist(), frame["category"].tolist()
+
+
+# -----------------------------
+# WRITERS
+# -----------------------------
+def write_sqlite(path, rows, seed=42, chunk_rows=CHUNK_ROWS, start=START_DATE, days=DAYS):
+    """Append `rows` synthetic expenses to the database at `path`.
+
+    The per-row rollup and search triggers are dropped during the load and
+    both derived tables are rebuilt in one pass at the end, which is an
+    order of magnitude faster than maintaining them row by row.
+    """
+    from src import rollups
+    from src.database import SEARCH_SCHEMA, connection, ensure_categories, init_db
+
+    init_db(path)
+    begin = time.perf_counter()
+    total = 0
+
+    with connection(path) as conn:
+        conn.execute("DROP TRIGGER IF EXISTS expenses_rollup_insert")
+        conn.execute("DROP TRIGGER IF EXISTS expenses_fts_insert")
+        conn.commit()
+        try:
+            ensure_categories(conn, CATEGORIES)
+            ids = dict(conn.execute("SELECT name, id FROM categories"))
+            for frame in iter_frames(rows, seed, chunk_rows, start, days):
+                conn.executemany(
+                    "INSERT INTO expenses (date, description, category_id, amount_minor, confidence, score) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    zip(
+                        frame["date"].tolist(),
+                        frame["description"].tolist(),
+                        frame["category"].map(ids).tolist(),
+                        (frame["amount"] * 100).round().astype(np.int64).tolist(),
+                        frame["confidence"].tolist(),
+                        frame["score"].tolist()
+                    )
+                )
+                conn.commit()
+                total += len(frame)
+        finally:
+            conn.rollback()
+            for sql in rollups.REBUILD + rollups.TRIGGERS + SEARCH_SCHEMA:
+                conn.execute(sql)
+            conn.execute("INSERT INTO expenses_fts (expenses_fts) VALUES ('rebuild')")
+            conn.commit()
+        conn.execute("ANALYZE")
+
+    seconds = time.perf_counter() - begin
+    return {"rows": total, "seconds": round(seconds, 3), "rows_per_sec": round(total / seconds, 1) if seconds else float(total)}
+
+
+def write_parquet(path, rows, seed=42, chunk_rows=CHUNK_ROWS, start=START_DATE, days=DAYS):
+    """Write `rows` synthetic expenses to Parquet, in the schema of src/export.py."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    from src.export import EXPORT_COLUMNS
+
+    schema = pa.schema([(name, pa.type_for_alias(kind)) for name, kind in EXPORT_COLUMNS])
+    begin = time.perf_counter()
+    total = 0
+
+    tmp_path = f"{path}.tmp"
+    with pq.ParquetWriter(tmp_path, schema, compression="zstd") as writer:
+        for frame in iter_frames(rows, seed, chunk_rows, start, days):
+            writer.write_table(pa.Table.from_pandas(frame, schema=schema, preserve_index=False))
+            total += len(frame)
+    os.replace(tmp_path, path)
+
+    seconds = time.perf_counter() - begin
+    return {"rows": total, "seconds": round(seconds, 3), "rows_per_sec": round(total / seconds, 1) if seconds else float(total)}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate synthetic expenses for benchmarks")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--sqlite", help="append the rows to this SQLite database")
+    parser.add_argument("--parquet", help="write the rows to this Parquet file")
+    parser.add_argument("--start", default=START_DATE, help=f"first date (default: {START_DATE})")
+    parser.add_argument("--days", type=int, default=DAYS, help=f"days the rows are spread over (default: {DAYS})")
+    args = parser.parse_args()
+
+    if not args.sqlite and not args.parquet:
+        parser.error("pass --sqlite and/or --parquet")
+
+    for target, writer in ((args.sqlite, write_sqlite), (args.parquet, write_parquet)):
+        if target:
+            print(f"⏳ Writing {args.rows:,} rows to {target}...")
+            stats = writer(target, args.rows, args.seed, start=args.start, days=args.days)
+            print(f"✅ {stats['rows']:,} rows in {stats['seconds']}s ({stats['rows_per_sec']:,.0f} rows/sec)")
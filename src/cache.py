@@ -0,0 +1,159 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from src.database import connection
+
+DEFAULT_MAXSIZE = 50000
+CHECK_INTERVAL = 1.0
+
+DISK_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS prediction_cache (
+        key TEXT PRIMARY KEY,
+        model TEXT NOT NULL,
+        category TEXT NOT NULL,
+        score REAL NOT NULL
+    )
+"""
+
+
+def normalize_text(text):
+    return " ".join(str(text).lower().split())
+
+
+def model_fingerprint(paths):
+    parts = []
+    for path in paths:
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            continue
+        parts.append(f"{os.path.basename(path)}:{st.st_mtime_ns}:{st.st_size}")
+    return "|".join(parts)
+
+
+# -----------------------------
+# PREDICTION CACHE
+# -----------------------------
+class PredictionCache:
+    """Bounded LRU cache of normalized text -> prediction.
+
+    Entries are dropped automatically when any of `model_paths` changes on
+    disk (checked at most once per `check_interval` seconds). With `db_path`
+    set, (category, score) values are also persisted to SQLite so they
+    survive restarts and are shared between processes.
+    """
+
+    def __init__(self, model_paths, maxsize=DEFAULT_MAXSIZE, db_path=None,
+                 check_interval=CHECK_INTERVAL):
+        self.model_paths = list(model_paths)
+        self.maxsize = maxsize
+        self.db_path = db_path
+        self.check_interval = check_interval
+
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self._fingerprint = model_fingerprint(self.model_paths)
+        self._checked_at = time.monotonic()
+
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+        if self.db_path:
+            with connection(self.db_path) as conn:
+                conn.execute(DISK_SCHEMA)
+
+    def _check_model(self):
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval:
+            return
+        self._checked_at = now
+
+        fingerprint = model_fingerprint(self.model_paths)
+        if fingerprint != self._fingerprint:
+            self._fingerprint = fingerprint
+            self._data.clear()
+            self.invalidations += 1
+            if self.db_path:
+                with connection(self.db_path) as conn:
+                    conn.execute("DELETE FROM prediction_cache WHERE model != ?", (fingerprint,))
+
+    def _load_from_disk(self, keys):
+        found = {}
+        with connection(self.db_path) as conn:
+            for start in range(0, len(keys), 500):
+                batch = keys[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = conn.execute(
+                    f"SELECT key, category, score FROM prediction_cache "
+                    f"WHERE model = ? AND key IN ({placeholders})",
+                    (self._fingerprint, *batch)
+                )
+                for key, category, score in rows:
+                    found[key] = (category, score)
+        return found
+
+    def get_many(self, keys):
+        """Return a list aligned with `keys`: cached value or None."""
+        with self._lock:
+            self._check_model()
+            values = [self._data.get(key) for key in keys]
+            for key, value in zip(keys, values):
+                if value is not None:
+                    self._data.move_to_end(key)
+
+            absent = [key for key, value in zip(keys, values) if value is None]
+            if absent and self.db_path:
+                found = self._load_from_disk(list(dict.fromkeys(absent)))
+                if found:
+                    values = [found.get(key, value) if value is None else value
+                              for key, value in zip(keys, values)]
+                    self._store(found.items())
+
+            hits = sum(value is not None for value in values)
+            self.hits += hits
+            self.misses += len(keys) - hits
+            return values
+
+    def get(self, key):
+        return self.get_many([key])[0]
+
+    def _store(self, items):
+        for key, value in items:
+            self._data[key] = value
+            self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def put_many(self, items, persist=True):
+        items = list(items)
+        with self._lock:
+            self._check_model()
+            self._store(items)
+            if persist and self.db_path:
+                with connection(self.db_path) as conn:
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO prediction_cache (key, model, category, score) "
+                        "VALUES (?, ?, ?, ?)",
+                        [(key, self._fingerprint, category, score) for key, (category, score) in items]
+                    )
+
+    def put(self, key, value):
+        self.put_many([(key, value)])
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "invalidations": self.invalidations
+        }
@@ -1,35 +1,382 @@
+import os
+import queue
+import re
 import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import date as _date
+from decimal import ROUND_HALF_UP, Decimal
+from itertools import islice
 
-DB_PATH = "data/expenses.db"
+from src.metrics import timer
 
-def get_connection():
-    return sqlite3.connect(DB_PATH, check_same_thread=False)
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 
+# The one database every entry point uses; override with EXPENSE_DB
+DB_PATH = os.environ.get("EXPENSE_DB") or os.path.join(BASE_DIR, "expenses.db")
 
-def insert_expense(description, amount, category):
-    conn = get_connection()
-    cur = conn.cursor()
+# -----------------------------
+# CONNECTION SETTINGS
+# -----------------------------
+POOL_SIZE = 4
+STATEMENT_CACHE_SIZE = 256
+BULK_CHUNK_SIZE = 5000
 
-    cur.execute("""
-        INSERT INTO expenses (description, amount, category)
-        VALUES (?, ?, ?)
-    """, (description, amount, category))
+# journal_mode=WAL is stored in the file itself, so migrate() sets it once;
+# setting it here would rewrite every database a process merely reads.
+PRAGMAS = (
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA cache_size=-20000",       # ~20 MB page cache per connection
+    "PRAGMA mmap_size=268435456",     # 256 MB memory-mapped reads
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA foreign_keys=ON",
+)
 
-    conn.commit()
-    conn.close()
+# The schema itself lives in src/migrations.py; init_db() applies it.
+INSERT_EXPENSE_SQL = """
+    INSERT INTO expenses (date, description, category_id, amount_minor, confidence, score)
+    VALUES (?, ?, (SELECT id FROM categories WHERE name = ?), ?, ?, ?)
+"""
 
+EXPENSE_COLUMNS = ("description", "amount", "category")
 
-def fetch_expenses(limit=10, offset=0):
-    conn = get_connection()
-    cur = conn.cursor()
+# Editable columns of the expense_rows view and how each is written back
+UPDATE_ASSIGNMENTS = {
+    "date": "date = ?",
+    "description": "description = ?",
+    "category": "category_id = (SELECT id FROM categories WHERE name = ?)",
+    "amount": "amount_minor = ?",
+    "confidence": "confidence = ?",
+    "score": "score = ?",
+}
 
-    cur.execute("""
-        SELECT description, amount, category
-        FROM expenses
+# Keyset pagination: newest first, each page seeks past the last id it saw,
+# so page N costs the same as page 1 (a primary key seek plus `limit` rows).
+# The id filter is only added when used; "? IS NULL OR id < ?" would defeat the seek.
+FETCH_EXPENSES_SQL = """
+    SELECT {columns}
+    FROM expense_rows
+    {where}
+    ORDER BY id DESC
+    LIMIT ? OFFSET ?
+"""
+
+
+# -----------------------------
+# FULL-TEXT SEARCH
+# -----------------------------
+# expenses_fts indexes expenses.description without storing a second copy
+# (external content); triggers keep it in step with inserts, edits and deletes.
+SEARCH_SCHEMA = (
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS expenses_fts USING fts5(
+        description,
+        content='expenses',
+        content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2',
+        prefix='2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS expenses_fts_insert AFTER INSERT ON expenses BEGIN
+        INSERT INTO expenses_fts (rowid, description) VALUES (NEW.id, NEW.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS expenses_fts_delete AFTER DELETE ON expenses BEGIN
+        INSERT INTO expenses_fts (expenses_fts, rowid, description) VALUES ('delete', OLD.id, OLD.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS expenses_fts_update AFTER UPDATE OF description ON expenses BEGIN
+        INSERT INTO expenses_fts (expenses_fts, rowid, description) VALUES ('delete', OLD.id, OLD.description);
+        INSERT INTO expenses_fts (rowid, description) VALUES (NEW.id, NEW.description);
+    END
+    """,
+)
+
+# bm25 ranks only the SEARCH_CANDIDATES newest matches (a rowid-ordered
+# walk of the index), so a broad term like "food" over millions of rows costs
+# the same as a rare one; rank is FTS5's built-in alias for bm25()
+SEARCH_CANDIDATES = 2000
+
+SEARCH_EXPENSES_SQL = """
+    SELECT {columns}
+    FROM (
+        SELECT rowid, rank
+        FROM expenses_fts
+        WHERE expenses_fts MATCH ?
         ORDER BY rowid DESC
-        LIMIT ? OFFSET ?
-    """, (limit, offset))
+        LIMIT ?
+    ) AS matches
+    JOIN expense_rows e ON e.id = matches.rowid
+    ORDER BY matches.rank
+    LIMIT ? OFFSET ?
+"""
+
+
+def get_connection(path=None):
+    """Open a new tuned connection. Prefer `connection()` for pooled access."""
+    with timer("db.connect"):
+        conn = sqlite3.connect(
+            path or DB_PATH,
+            check_same_thread=False,
+            cached_statements=STATEMENT_CACHE_SIZE
+        )
+        for pragma in PRAGMAS:
+            conn.execute(pragma)
+    return conn
+
+
+# -----------------------------
+# CONNECTION POOL
+# -----------------------------
+class ConnectionPool:
+    """A small thread-safe pool of long-lived connections to one database.
+
+    Connections are created lazily up to `size` and handed out one caller
+    at a time, so each keeps its page cache and compiled statements warm.
+    """
+
+    def __init__(self, path, size=POOL_SIZE):
+        self.path = path
+        self.size = size
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout=None):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            can_create = self._created < self.size
+            if can_create:
+                self._created += 1
+
+        if can_create:
+            try:
+                return get_connection(self.path)
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+
+        try:
+            return self._idle.get(timeout=timeout)
+        except queue.Empty:
+            raise TimeoutError(f"No free connection to {self.path} after {timeout}s")
+
+    def release(self, conn):
+        if conn.in_transaction:
+            conn.rollback()
+        self._idle.put(conn)
+
+    @contextmanager
+    def connection(self, timeout=None):
+        """Borrow a connection; commit on success, roll back on error."""
+        conn = self.acquire(timeout)
+        try:
+            yield conn
+            if conn.in_transaction:
+                with timer("db.commit"):
+                    conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            self.release(conn)
+
+    def close(self):
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._created -= 1
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(path=None):
+    key = os.path.abspath(path or DB_PATH)
+    pool = _pools.get(key)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.setdefault(key, ConnectionPool(key))
+    return pool
+
+
+@contextmanager
+def connection(path=None, timeout=None):
+    with get_pool(path).connection(timeout) as conn:
+        yield conn
+
+
+def close_pools():
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.close()
+        _pools.clear()
+
+
+# -----------------------------
+# QUERIES
+# -----------------------------
+def init_db(path=None):
+    """Create or upgrade the database to the current schema."""
+    from src.migrations import migrate
+    migrate(path)
+
+
+def to_minor(amount):
+    """Decimal amount -> integer minor units (paise), rounded half up on the decimal digits.
+
+    Going through str() keeps 12.345 as written; float(12.345) * 100 is 1234.4999...
+    """
+    return int(Decimal(str(amount)).quantize(Decimal("0.01"), ROUND_HALF_UP) * 100)
+
+
+def normalize_category(category):
+    category = str(category or "").strip().lower()
+    return category or None
+
+
+def ensure_categories(conn, names):
+    names = {name for name in names if name}
+    if names:
+        conn.executemany("INSERT OR IGNORE INTO categories (name) VALUES (?)", ((n,) for n in names))
+
+
+def expense_params(row):
+    """INSERT_EXPENSE_SQL parameters for (description, amount, category[, date, confidence, score])."""
+    description, amount, category, *rest = row
+    day, confidence, score = (list(rest) + [None, None, None])[:3]
+    return (
+        str(day or _date.today().isoformat()),
+        description,
+        normalize_category(category),
+        to_minor(amount),
+        confidence,
+        None if score is None else float(score)
+    )
+
+
+def insert_expense(description, amount, category, path=None, date=None, confidence=None, score=None):
+    params = expense_params((description, amount, category, date, confidence, score))
+    with connection(path) as conn:
+        with timer("db.insert"):
+            ensure_categories(conn, [params[2]])
+            return conn.execute(INSERT_EXPENSE_SQL, params).lastrowid
+
+
+def _column_list(columns, prefix=""):
+    for name in columns:
+        if not name.isidentifier():
+            raise ValueError(f"❌ Invalid column name: {name!r}")
+    return ", ".join(prefix + name for name in columns)
+
+
+def fetch_expenses(limit=10, offset=0, path=None, before_id=None, columns=EXPENSE_COLUMNS):
+    """Newest-first page of expenses.
+
+    Pass the smallest id of the previous page as `before_id` to fetch the
+    next one; `offset` still works but scans every skipped row.
+    """
+    where, params = "", []
+    if before_id is not None:
+        where = "WHERE id < ?"
+        params.append(int(before_id))
+
+    sql = FETCH_EXPENSES_SQL.format(columns=_column_list(columns), where=where)
+    with connection(path) as conn, timer("query.history_page"):
+        return conn.execute(sql, params + [limit, offset]).fetchall()
+
+
+def match_query(text):
+    """Turn free text into an FTS5 query: every word must match as a prefix.
+
+    "swig ord" -> '"swig"* "ord"*'. Quoting keeps FTS operators and
+    punctuation in user input from being parsed as query syntax.
+    """
+    tokens = re.findall(r"\w+", text.lower())
+    return " ".join(f'"{token}"*' for token in tokens)
+
+
+def search_expenses(text, limit=50, offset=0, columns=EXPENSE_COLUMNS, path=None):
+    """Recent expenses whose description matches `text`, best matches first."""
+    query = match_query(text)
+    if not query:
+        return []
+    sql = SEARCH_EXPENSES_SQL.format(columns=_column_list(columns, prefix="e."))
+    with connection(path) as conn, timer("query.search"):
+        return conn.execute(sql, (query, SEARCH_CANDIDATES, limit, offset)).fetchall()
+
+
+def update_expenses(rows, columns, path=None):
+    """Apply many edits in one transaction.
+
+    Each row is the new values for `columns` (names as in expense_rows)
+    followed by the expense id.
+    """
+    unknown = [name for name in columns if name not in UPDATE_ASSIGNMENTS]
+    if unknown:
+        raise ValueError(f"❌ Cannot update column(s): {unknown}")
+
+    converters = {"amount": to_minor, "category": normalize_category}
+    convert = [converters.get(name) for name in columns]
+    params = [
+        tuple(fn(v) if fn else v for fn, v in zip(convert, row[:-1])) + (int(row[-1]),)
+        for row in rows
+    ]
+
+    assignments = ", ".join(UPDATE_ASSIGNMENTS[name] for name in columns)
+    with connection(path) as conn:
+        if "category" in columns:
+            ensure_categories(conn, (p[columns.index("category")] for p in params))
+        conn.executemany(f"UPDATE expenses SET {assignments} WHERE id = ?", params)
+
+
+def delete_expenses(ids, path=None):
+    with connection(path) as conn:
+        conn.executemany("DELETE FROM expenses WHERE id = ?", ((int(i),) for i in ids))
+
+
+def insert_expenses_bulk(rows, chunk_size=BULK_CHUNK_SIZE, path=None):
+    """Insert (description, amount, category[, date, confidence, score]) rows from any iterable.
+
+    Rows are pulled lazily, written with executemany and committed once per
+    chunk, so generators of any length run in constant memory. Returns a
+    dict with the row count, elapsed seconds and rows per second.
+    """
+    rows = iter(rows)
+    total = 0
+    start = time.perf_counter()
+
+    with connection(path) as conn:
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                break
+            params = [expense_params(row) for row in chunk]
+            with timer("db.insert_bulk"):
+                ensure_categories(conn, {p[2] for p in params})
+                conn.executemany(INSERT_EXPENSE_SQL, params)
+            with timer("db.commit"):
+                conn.commit()
+            total += len(chunk)
 
-    rows = cur.fetchall()
-    conn.close()
-    return rows
+    seconds = time.perf_counter() - start
+    return {
+        "rows": total,
+        "seconds": round(seconds, 3),
+        "rows_per_sec": round(total / seconds, 1) if seconds else float(total)
+    }
@@ -0,0 +1,152 @@
+# src/export.py
+#
+# Stream expenses out of SQLite into CSV or Parquet. Rows come off the
+# cursor EXPORT_CHUNK_SIZE at a time with fetchmany() and are written
+# straight to the output, so memory stays flat whatever the table size.
+#
+#   python ExpenseTrack.py export expenses.parquet --start 2024-01-01 --category food
+
+import csv
+import io
+import os
+import time
+
+from src.database import connection
+
+EXPORT_CHUNK_SIZE = 10_000
+EXPORT_FORMATS = ("csv", "parquet")
+
+# Exported columns of the expense_rows view and their Arrow types
+EXPORT_COLUMNS = (
+    ("id", "int64"),
+    ("date", "string"),
+    ("description", "string"),
+    ("category", "string"),
+    ("amount", "float64"),
+    ("confidence", "string"),
+    ("score", "float64"),
+)
+
+
+def export_format(out_path, fmt=None):
+    fmt = fmt or os.path.splitext(out_path)[1].lstrip(".").lower()
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"❌ Unknown export format '{fmt}'. Use one of {EXPORT_FORMATS}")
+    return fmt
+
+
+def _filters(start=None, end=None, categories=None):
+    conditions, params = [], []
+    if start is not None:
+        conditions.append("date >= ?")
+        params.append(str(start))
+    if end is not None:
+        conditions.append("date <= ?")
+        params.append(str(end))
+    if categories:
+        conditions.append(f"category IN ({', '.join('?' * len(categories))})")
+        params.extend(categories)
+    return ("WHERE " + " AND ".join(conditions) if conditions else ""), params
+
+
+def count_expenses(path=None, start=None, end=None, categories=None):
+    """Number of expenses an export with these filters would write."""
+    with connection(path) as conn:
+        where, params = _filters(start, end, categories)
+        return conn.execute(f"SELECT COUNT(*) FROM expense_rows {where}", params).fetchone()[0]
+
+
+def iter_expense_chunks(path=None, start=None, end=None, categories=None, chunk_size=EXPORT_CHUNK_SIZE):
+    """Yield (columns, rows) with at most `chunk_size` rows per chunk, ordered by id.
+
+    The first chunk is yielded even when nothing matches, so writers always
+    see the columns.
+    """
+    columns = EXPORT_COLUMNS
+    with connection(path) as conn:
+        where, params = _filters(start, end, categories)
+        names = ", ".join(name for name, _ in columns)
+        cursor = conn.execute(f"SELECT {names} FROM expense_rows {where} ORDER BY id", params)
+
+        rows = cursor.fetchmany(chunk_size)
+        yield columns, rows
+        while rows:
+            rows = cursor.fetchmany(chunk_size)
+            if rows:
+                yield columns, rows
+
+
+# -----------------------------
+# WRITERS
+# -----------------------------
+def write_csv(chunks, f):
+    """Write chunks to an open text file; returns the row count."""
+    writer = csv.writer(f)
+    total = 0
+    for i, (columns, rows) in enumerate(chunks):
+        if i == 0:
+            writer.writerow(name for name, _ in columns)
+        writer.writerows(rows)
+        total += len(rows)
+    return total
+
+
+def write_parquet(chunks, f):
+    """Write chunks as one Parquet row group each; returns the row count."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    writer = None
+    total = 0
+    try:
+        for columns, rows in chunks:
+            if writer is None:
+                schema = pa.schema([(name, pa.type_for_alias(kind)) for name, kind in columns])
+                writer = pq.ParquetWriter(f, schema, compression="zstd")
+            values = list(zip(*rows)) if rows else [()] * len(schema)
+            arrays = [pa.array(column, type=field.type) for column, field in zip(values, schema)]
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+            total += len(rows)
+    finally:
+        if writer is not None:
+            writer.close()
+    return total
+
+
+def export_expenses(out, fmt=None, path=None, start=None, end=None, categories=None,
+                    chunk_size=EXPORT_CHUNK_SIZE):
+    """Export matching expenses to a file path or an open binary file object.
+
+    Returns a dict with the row count, elapsed seconds and rows per second.
+    """
+    if isinstance(out, str):
+        fmt = export_format(out, fmt)
+    elif fmt not in EXPORT_FORMATS:
+        raise ValueError(f"❌ Pass fmt as one of {EXPORT_FORMATS} when exporting to a file object")
+
+    begin = time.perf_counter()
+    chunks = iter_expense_chunks(path, start, end, categories, chunk_size)
+
+    if isinstance(out, str):
+        tmp_path = f"{out}.tmp"
+        if fmt == "csv":
+            with open(tmp_path, "w", newline="", encoding="utf-8") as f:
+                total = write_csv(chunks, f)
+        else:
+            total = write_parquet(chunks, tmp_path)
+        os.replace(tmp_path, out)
+    elif fmt == "csv":
+        text = io.TextIOWrapper(out, encoding="utf-8", newline="", write_through=True)
+        try:
+            total = write_csv(chunks, text)
+        finally:
+            text.detach()
+    else:
+        total = write_parquet(chunks, out)
+
+    seconds = time.perf_counter() - begin
+    return {
+        "rows": total,
+        "seconds": round(seconds, 3),
+        "rows_per_sec": round(total / seconds, 1) if seconds else float(total)
+    }
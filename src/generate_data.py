@@ -1,44 +1,39 @@
-import random
-from src.database import get_connection
-
-# Sample expense data
-sample_expenses = [
-    ("Dominos Pizza", 250, "Food"),
-    ("Burger King", 180, "Food"),
-    ("Uber Ride", 320, "Transport"),
-    ("Ola Cab", 280, "Transport"),
-    ("Electricity Bill", 1200, "Utilities"),
-    ("Mobile Recharge", 399, "Utilities"),
-    ("Movie Ticket", 350, "Entertainment"),
-    ("Netflix Subscription", 499, "Entertainment"),
-    ("Amazon Shopping", 1500, "Shopping"),
-    ("Flipkart Order", 2200, "Shopping")
-]
-
-def generate_expenses(n=200):
-    conn = get_connection()
-    cur = conn.cursor()
+# src/generate_data.py
+#
+# Fill the expenses database with realistic sample data from the seeded
+# generator in src/benchmarks/synthetic.py:
+#   python -m src.generate_data [--rows 200] [--seed 42]
+# For millions of rows use python -m src.benchmarks.synthetic --sqlite instead.
 
+import argparse
+from datetime import date, timedelta
+
+from src.benchmarks.synthetic import iter_frames
+from src.database import init_db, insert_expenses_bulk
+
+
+def generate_expenses(n=200, seed=42, days=365, path=None):
     # Create table if not exists
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS expenses (
-            id INTEGER PRIMARY KEY,
-            description TEXT,
-            amount REAL,
-            category TEXT
-        )
-    """)
-
-    for _ in range(n):
-        desc, amount, category = random.choice(sample_expenses)
-        cur.execute(
-            "INSERT INTO expenses (description, amount, category) VALUES (?, ?, ?)",
-            (desc, amount, category)
-        )
-
-    conn.commit()
-    conn.close()
-    print(f"{n} sample expenses added ✅")
+    init_db(path)
+
+    # Spread over the last `days` days so the dashboard has something to show
+    start = str(date.today() - timedelta(days=days))
+    rows = (
+        (row.description, row.amount, row.category, row.date, row.confidence, row.score)
+        for frame in iter_frames(n, seed, start=start, days=days)
+        for row in frame.itertuples(index=False)
+    )
+    stats = insert_expenses_bulk(rows, path=path)
+
+    print(f"{n} sample expenses added ✅ ({stats['rows_per_sec']} rows/sec)")
+
 
 if __name__ == "__main__":
-    generate_expenses()
+    parser = argparse.ArgumentParser(description="Add sample expenses to the database")
+    parser.add_argument("--rows", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--db", help="database path (default: $EXPENSE_DB or expenses.db)")
+    args = parser.parse_args()
+
+    generate_expenses(args.rows, args.seed, args.days, args.db)
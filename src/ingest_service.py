@@ -0,0 +1,441 @@
+# src/ingest_service.py
+#
+# Local ingestion service: expenses are POSTed as JSON, queued, classified in
+# micro-batches and written by one writer connection, so concurrent clients
+# never fight over the SQLite write lock.
+#
+#   python -m src.ingest_service [--port 8765] [--db expenses.db]
+#
+#   POST /expenses   {"description": "...", "amount": 120}  or a list of them
+#                    -> 200 [{"id", "category", "confidence", "score"}, ...]
+#                    -> 503 + Retry-After when the queue is full or draining
+#   GET  /metrics    queue depth, throughput, latency percentiles and hot-path timings
+#   GET  /metrics/prometheus   the same in Prometheus text format
+#   GET  /health
+#
+# Clients use submit_expenses(); the tracker CLI and the web app switch to it
+# when EXPENSE_INGEST_URL is set.
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import signal
+import time
+import urllib.error
+import urllib.request
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+from src import metrics
+from src.database import (
+    DB_PATH, INSERT_EXPENSE_SQL, ensure_categories, expense_params, get_connection, init_db, normalize_category
+)
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_URL = f"http://{DEFAULT_HOST}:{DEFAULT_PORT}"
+
+QUEUE_SIZE = 1000          # pending submissions before clients get 503
+MAX_SUBMISSION = 5000      # expenses per request
+BATCH_SIZE = 256           # expenses per classify + write round
+BATCH_WAIT = 0.02          # seconds to wait for a batch to fill up
+PUT_TIMEOUT = 1.0          # seconds a request may wait for queue space
+DRAIN_TIMEOUT = 30.0
+MAX_BODY = 10 * 1024 * 1024
+MAX_AMOUNT = 1e12          # keeps amount * 100 inside SQLite's 64-bit INTEGER
+
+HTTP_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+                413: "Payload Too Large", 500: "Internal Server Error", 503: "Service Unavailable"}
+
+
+class Rejected(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+# -----------------------------
+# METRICS
+# -----------------------------
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(q / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class IngestMetrics:
+    """Counters plus a window of the most recent submission latencies (queued -> written)."""
+
+    def __init__(self, window=10000):
+        self.started = time.monotonic()
+        self.received = 0
+        self.written = 0
+        self.rejected = 0
+        self.failed = 0
+        self.batches = 0
+        self.write_seconds = 0.0
+        self.latencies = deque(maxlen=window)
+
+    def as_dict(self, queue_depth=0):
+        uptime = time.monotonic() - self.started
+        latencies = sorted(self.latencies)
+        return {
+            "uptime_s": round(uptime, 1),
+            "queue_depth": queue_depth,
+            "received": self.received,
+            "written": self.written,
+            "rejected": self.rejected,
+            "failed": self.failed,
+            "batches": self.batches,
+            "avg_batch": round(self.written / self.batches, 1) if self.batches else 0.0,
+            "rows_per_sec": round(self.written / uptime, 1) if uptime else 0.0,
+            "write_rows_per_sec": round(self.written / self.write_seconds, 1) if self.write_seconds else 0.0,
+            "latency_ms": {
+                f"p{q}": None if not latencies else round(percentile(latencies, q) * 1000, 2)
+                for q in (50, 95, 99)
+            }
+        }
+
+
+# -----------------------------
+# WRITER
+# -----------------------------
+def validate(item):
+    """Normalise one submitted expense or raise Rejected(400)."""
+    if not isinstance(item, dict):
+        raise Rejected(400, "each expense must be a JSON object")
+    description = str(item.get("description") or "").strip()
+    if not description:
+        raise Rejected(400, "description is required")
+    try:
+        amount = float(item.get("amount"))
+    except (TypeError, ValueError):
+        raise Rejected(400, f"invalid amount for '{description}'")
+    if not math.isfinite(amount) or abs(amount) > MAX_AMOUNT:
+        raise Rejected(400, f"amount out of range for '{description}'")
+    try:
+        day = date.fromisoformat(str(item["date"])).isoformat() if item.get("date") else date.today().isoformat()
+    except ValueError:
+        raise Rejected(400, f"date must be YYYY-MM-DD for '{description}'")
+    return {
+        "date": day,
+        "description": description,
+        "amount": amount,
+        "category": normalize_category(item.get("category"))
+    }
+
+
+class BatchWriter:
+    """Classifies and writes batches on one thread with one connection."""
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ingest-writer")
+        self.conn = None
+
+    def _open(self):
+        if self.conn is None:
+            init_db(self.db_path)
+            self.conn = get_connection(self.db_path)
+
+    def write(self, expenses):
+        """Runs on the writer thread; returns one result dict per expense."""
+        from src.predict import predict_expenses
+
+        self._open()
+        missing = [e["description"] for e in expenses if not e["category"]]
+        predicted = iter(predict_expenses(missing, db_path=self.db_path).to_dict("records")) if missing else iter(())
+
+        results = []
+        with self.conn:
+            with metrics.timer("db.insert_batch"):
+                ensure_categories(self.conn, {e["category"] for e in expenses})
+                for e in expenses:
+                    if e["category"]:
+                        category, confidence, score = e["category"], None, None
+                    else:
+                        pred = next(predicted)
+                        category, confidence, score = pred["category"], pred["confidence"], float(pred["score"])
+                    cursor = self.conn.execute(INSERT_EXPENSE_SQL, expense_params(
+                        (e["description"], e["amount"], category, e["date"], confidence, score)
+                    ))
+                    results.append({
+                        "id": cursor.lastrowid, "category": category, "confidence": confidence, "score": score
+                    })
+            with metrics.timer("db.commit"):
+                self.conn.commit()
+        return results
+
+    def close(self):
+        self.executor.submit(self._close).result()
+        self.executor.shutdown()
+
+    def _close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+
+# -----------------------------
+# SERVICE
+# -----------------------------
+class IngestService:
+    """Bounded queue of submissions drained by one micro-batching consumer."""
+
+    def __init__(self, db_path=DB_PATH, queue_size=QUEUE_SIZE, batch_size=BATCH_SIZE,
+                 batch_wait=BATCH_WAIT):
+        self.writer = BatchWriter(db_path)
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self.metrics = IngestMetrics()
+        self.draining = False
+        self.queue = None
+        self._consumer = None
+
+    async def start(self):
+        self.queue = asyncio.Queue(self.queue_size)
+        self._consumer = asyncio.create_task(self._consume())
+
+    async def submit(self, expenses):
+        """Queue one submission and wait until it is written."""
+        if self.draining:
+            raise Rejected(503, "service is shutting down")
+        future = asyncio.get_running_loop().create_future()
+        try:
+            await asyncio.wait_for(self.queue.put((expenses, future, time.monotonic())), PUT_TIMEOUT)
+        except asyncio.TimeoutError:
+            self.metrics.rejected += len(expenses)
+            raise Rejected(503, "ingest queue is full, retry later")
+        self.metrics.received += len(expenses)
+        return await future
+
+    async def _next_batch(self):
+        """Block for one submission, then top up for at most batch_wait seconds."""
+        batch = [await self.queue.get()]
+        rows = len(batch[0][0])
+        deadline = time.monotonic() + self.batch_wait
+        while rows < self.batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(self.queue.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            batch.append(item)
+            rows += len(item[0])
+        return batch
+
+    async def _consume(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._next_batch()
+            expenses = [e for submission, _, _ in batch for e in submission]
+            start = time.monotonic()
+            try:
+                results = await loop.run_in_executor(self.writer.executor, self.writer.write, expenses)
+            except Exception as exc:
+                if len(batch) == 1:
+                    self._fail(batch[0], exc)
+                else:
+                    # One bad submission must not fail everyone else's: retry each on its own
+                    for item in batch:
+                        await self._write_one(loop, item)
+            else:
+                done = time.monotonic()
+                self.metrics.batches += 1
+                self.metrics.written += len(expenses)
+                self.metrics.write_seconds += done - start
+                offset = 0
+                for submission, future, enqueued in batch:
+                    self.metrics.latencies.append(done - enqueued)
+                    if not future.done():
+                        future.set_result(results[offset:offset + len(submission)])
+                    offset += len(submission)
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+    async def _write_one(self, loop, item):
+        submission, future, enqueued = item
+        start = time.monotonic()
+        try:
+            results = await loop.run_in_executor(self.writer.executor, self.writer.write, submission)
+        except Exception as exc:
+            self._fail(item, exc)
+            return
+        done = time.monotonic()
+        self.metrics.batches += 1
+        self.metrics.written += len(submission)
+        self.metrics.write_seconds += done - start
+        self.metrics.latencies.append(done - enqueued)
+        if not future.done():
+            future.set_result(results)
+
+    def _fail(self, item, exc):
+        submission, future, _ = item
+        self.metrics.failed += len(submission)
+        if not future.done():
+            future.set_exception(exc)
+
+    async def drain(self, timeout=DRAIN_TIMEOUT):
+        """Stop taking submissions, flush what is queued, close the writer."""
+        self.draining = True
+        try:
+            await asyncio.wait_for(self.queue.join(), timeout)
+        except asyncio.TimeoutError:
+            print(f"⚠️ Drain timed out with {self.queue.qsize()} submissions still queued")
+        self._consumer.cancel()
+        await asyncio.gather(self._consumer, return_exceptions=True)
+        await asyncio.get_running_loop().run_in_executor(None, self.writer.close)
+
+    def prometheus(self):
+        stats = self.metrics.as_dict(self.queue.qsize())
+        gauges = {f"ingest_{name}": stats[name]
+                  for name in ("queue_depth", "received", "written", "rejected", "failed", "batches")}
+        return metrics.prometheus_text(extra=gauges)
+
+    # -----------------------------
+    # HTTP
+    # -----------------------------
+    async def handle(self, reader, writer):
+        try:
+            status, body, headers = await self._route(reader)
+        except Rejected as exc:
+            status, body = exc.status, {"error": str(exc)}
+            headers = {"Retry-After": "1"} if exc.status == 503 else {}
+        except Exception as exc:
+            status, body, headers = 500, {"error": str(exc)}, {}
+
+        if isinstance(body, str):
+            payload, content_type = body.encode(), "text/plain; version=0.0.4"
+        else:
+            payload, content_type = json.dumps(body).encode(), "application/json"
+        lines = [f"HTTP/1.1 {status} {HTTP_REASONS.get(status, '')}",
+                 f"Content-Type: {content_type}",
+                 f"Content-Length: {len(payload)}",
+                 "Connection: close"]
+        lines += [f"{k}: {v}" for k, v in headers.items()]
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode() + payload)
+        try:
+            await writer.drain()
+        finally:
+            writer.close()
+
+    async def _route(self, reader):
+        request_line = (await reader.readline()).decode("latin-1").split()
+        if len(request_line) < 2:
+            raise Rejected(400, "malformed request")
+        method, target = request_line[0], request_line[1].split("?", 1)[0]
+
+        length = 0
+        while True:
+            line = (await reader.readline()).decode("latin-1").strip()
+            if not line:
+                break
+            name, _, value = line.partition(":")
+            if name.strip().lower() == "content-length":
+                length = int(value.strip()) if value.strip().isdigit() else -1
+                if length < 0:
+                    raise Rejected(400, "invalid Content-Length")
+
+        if method == "GET" and target == "/health":
+            return 200, {"status": "draining" if self.draining else "ok"}, {}
+        if method == "GET" and target == "/metrics":
+            snap = metrics.snapshot()
+            stats = self.metrics.as_dict(self.queue.qsize())
+            return 200, {**stats, "timings": snap["timings"], "counters": snap["counters"]}, {}
+        if method == "GET" and target == "/metrics/prometheus":
+            return 200, self.prometheus(), {}
+        if target != "/expenses":
+            raise Rejected(404, f"no route for {target}")
+        if method != "POST":
+            raise Rejected(405, "use POST")
+        if length > MAX_BODY:
+            raise Rejected(413, "request body too large")
+
+        try:
+            data = json.loads(await reader.readexactly(length))
+        except (ValueError, asyncio.IncompleteReadError):
+            raise Rejected(400, "body must be JSON")
+        items = data if isinstance(data, list) else [data]
+        if not items:
+            return 200, [], {}
+        if len(items) > MAX_SUBMISSION:
+            raise Rejected(413, f"at most {MAX_SUBMISSION} expenses per request")
+
+        return 200, await self.submit([validate(item) for item in items]), {}
+
+
+async def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, db_path=DB_PATH):
+    service = IngestService(db_path)
+    await service.start()
+    server = await asyncio.start_server(service.handle, host, port)
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except NotImplementedError:
+            pass
+
+    print(f"✅ Ingest service on http://{host}:{port} writing to {db_path}")
+    async with server:
+        await stop.wait()
+        print("⏳ Draining queue...")
+        server.close()
+        await service.drain()
+    print(f"✅ Stopped. {json.dumps(service.metrics.as_dict())}")
+
+
+# -----------------------------
+# CLIENT
+# -----------------------------
+def service_url():
+    """The ingest service to submit to, or None to write directly."""
+    return os.environ.get("EXPENSE_INGEST_URL") or None
+
+
+def submit_expenses(expenses, url=None, timeout=30.0):
+    """POST a list of expense dicts; returns [{"id", "category", "confidence", "score"}]."""
+    url = (url or service_url() or DEFAULT_URL).rstrip("/")
+    request = urllib.request.Request(
+        f"{url}/expenses",
+        data=json.dumps(list(expenses)).encode(),
+        headers={"Content-Type": "application/json"},
+        method="POST"
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return json.loads(response.read())
+    except urllib.error.HTTPError as exc:
+        detail = json.loads(exc.read() or b"{}").get("error", exc.reason)
+        raise RuntimeError(f"❌ Ingest service returned {exc.code}: {detail}") from None
+
+
+def fetch_metrics(url=None, timeout=5.0):
+    url = (url or service_url() or DEFAULT_URL).rstrip("/")
+    with urllib.request.urlopen(f"{url}/metrics", timeout=timeout) as response:
+        return json.loads(response.read())
+
+
+def fetch_prometheus(url=None, timeout=5.0):
+    url = (url or service_url() or DEFAULT_URL).rstrip("/")
+    with urllib.request.urlopen(f"{url}/metrics/prometheus", timeout=timeout) as response:
+        return response.read().decode()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Queued, batched expense ingestion service")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--db", default=DB_PATH)
+    args = parser.parse_args()
+
+    asyncio.run(serve(args.host, args.port, args.db))
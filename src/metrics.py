@@ -0,0 +1,267 @@
+# src/metrics.py
+#
+# In-process timing histograms for the hot paths: model load, vectorize,
+# predict_proba, DB connect/insert/commit and dashboard queries. A timer
+# costs about a microsecond; p50/p95/p99 come from a window of the most
+# recent samples per name. Set EXPENSE_METRICS=0 to turn recording off.
+#
+#   with timer("db.insert"): ...
+#
+#   python ExpenseTrack.py --stats add          # print this process's timings on exit
+#   python ExpenseTrack.py stats                # timings of a running ingest service
+#   python ExpenseTrack.py --profile import x.csv   # cProfile one command
+#
+# Long-running processes expose the same numbers as Prometheus text: the
+# ingest service on GET /metrics/prometheus, the web app on
+# EXPENSE_METRICS_PORT via serve().
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+PROFILE_DIR = os.path.join(BASE_DIR, ".cache", "profiles")
+
+ENABLED = os.environ.get("EXPENSE_METRICS", "1") != "0"
+WINDOW = 2048            # recent samples kept per histogram
+QUANTILES = (50, 95, 99)
+PROMETHEUS_PREFIX = "expense"
+
+
+# -----------------------------
+# HISTOGRAMS
+# -----------------------------
+class Histogram:
+    """Count, sum and max of every sample plus a ring buffer of the last `window`."""
+
+    def __init__(self, window=WINDOW):
+        self.window = window
+        self.samples = []
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._next = 0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds):
+        with self._lock:
+            if len(self.samples) < self.window:
+                self.samples.append(seconds)
+            else:
+                self.samples[self._next] = seconds
+                self._next = (self._next + 1) % self.window
+            self.count += 1
+            self.total += seconds
+            if seconds > self.max:
+                self.max = seconds
+
+    def quantiles(self, qs=QUANTILES):
+        with self._lock:
+            values = sorted(self.samples)
+        if not values:
+            return {q: None for q in qs}
+        return {q: values[min(len(values) - 1, int(round(q / 100 * (len(values) - 1))))] for q in qs}
+
+    def snapshot(self):
+        ms = lambda s: None if s is None else round(s * 1000, 3)
+        quantiles = self.quantiles()
+        return {
+            "count": self.count,
+            "total_s": round(self.total, 4),
+            **{f"p{q}_ms": ms(v) for q, v in quantiles.items()},
+            "max_ms": ms(self.max)
+        }
+
+
+class Metrics:
+    """Named histograms and counters, created on first use."""
+
+    def __init__(self, enabled=ENABLED, window=WINDOW):
+        self.enabled = enabled
+        self.window = window
+        self.histograms = {}
+        self.counters = {}
+        self.started = time.time()
+        self._lock = threading.Lock()
+
+    def histogram(self, name):
+        hist = self.histograms.get(name)
+        if hist is None:
+            with self._lock:
+                hist = self.histograms.setdefault(name, Histogram(self.window))
+        return hist
+
+    def observe(self, name, seconds):
+        if self.enabled:
+            self.histogram(name).observe(seconds)
+
+    @contextmanager
+    def timer(self, name):
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.histogram(name).observe(time.perf_counter() - start)
+
+    def timed(self, name):
+        """Decorator form of timer()."""
+        def decorate(fn):
+            def wrapper(*args, **kwargs):
+                with self.timer(name):
+                    return fn(*args, **kwargs)
+            wrapper.__name__ = fn.__name__
+            wrapper.__doc__ = fn.__doc__
+            wrapper.__wrapped__ = fn
+            return wrapper
+        return decorate
+
+    def incr(self, name, n=1):
+        if self.enabled:
+            with self._lock:
+                self.counters[name] = self.counters.get(name, 0) + n
+
+    def snapshot(self):
+        return {
+            "uptime_s": round(time.time() - self.started, 1),
+            "timings": {name: h.snapshot() for name, h in sorted(self.histograms.items())},
+            "counters": dict(sorted(self.counters.items()))
+        }
+
+    def reset(self):
+        with self._lock:
+            self.histograms.clear()
+            self.counters.clear()
+            self.started = time.time()
+
+
+metrics = Metrics()
+timer = metrics.timer
+timed = metrics.timed
+observe = metrics.observe
+incr = metrics.incr
+snapshot = metrics.snapshot
+
+
+# -----------------------------
+# OUTPUT
+# -----------------------------
+def _metric_name(name, suffix):
+    clean = "".join(c if c.isalnum() else "_" for c in name)
+    return f"{PROMETHEUS_PREFIX}_{clean}_{suffix}"
+
+
+def prometheus_text(snap=None, extra=None):
+    """Prometheus text exposition: one summary per timer, one counter per count.
+
+    `extra` adds plain {name: value} gauges (e.g. the ingest queue depth).
+    """
+    snap = snap or snapshot()
+    lines = []
+    for name, h in snap["timings"].items():
+        metric = _metric_name(name, "seconds")
+        lines.append(f"# TYPE {metric} summary")
+        for q in QUANTILES:
+            value = h[f"p{q}_ms"]
+            if value is not None:
+                lines.append(f'{metric}{{quantile="{q / 100}"}} {value / 1000:.6g}')
+        lines.append(f"{metric}_sum {h['total_s']:.6g}")
+        lines.append(f"{metric}_count {h['count']}")
+    for name, value in snap["counters"].items():
+        metric = _metric_name(name, "total")
+        lines.append(f"# TYPE {metric} counter")
+        lines.append(f"{metric} {value}")
+    for name, value in (extra or {}).items():
+        metric = f"{PROMETHEUS_PREFIX}_{name}"
+        lines.append(f"# TYPE {metric} gauge")
+        lines.append(f"{metric} {value}")
+    return "\n".join(lines) + "\n"
+
+
+def format_table(snap=None):
+    """Fixed-width table of a snapshot, for terminals."""
+    snap = snap or snapshot()
+    if not snap["timings"] and not snap["counters"]:
+        return "No timings recorded yet."
+
+    cell = lambda v: "-" if v is None else f"{v:.3f}"
+    lines = [f"{'timer':<26}{'count':>9}{'p50 ms':>11}{'p95 ms':>11}{'p99 ms':>11}{'max ms':>11}"]
+    for name, h in snap["timings"].items():
+        lines.append(f"{name:<26}{h['count']:>9}{cell(h['p50_ms']):>11}{cell(h['p95_ms']):>11}"
+                     f"{cell(h['p99_ms']):>11}{cell(h['max_ms']):>11}")
+    if snap["counters"]:
+        lines.append("")
+        lines += [f"{name:<26}{value:>9}" for name, value in snap["counters"].items()]
+    return "\n".join(lines)
+
+
+def serve(port, host="127.0.0.1"):
+    """Serve /metrics (Prometheus text) and /metrics.json from a daemon thread."""
+    import json
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path == "/metrics":
+                body, kind = prometheus_text().encode(), "text/plain; version=0.0.4"
+            elif self.path == "/metrics.json":
+                body, kind = json.dumps(snapshot()).encode(), "application/json"
+            else:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", kind)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
+
+
+# -----------------------------
+# PROFILING
+# -----------------------------
+class ProfileResult:
+    def __init__(self):
+        self.path = None
+        self.text = None
+
+
+@contextmanager
+def profile(label, enabled=True, out_dir=PROFILE_DIR, top=25):
+    """cProfile the block when `enabled`.
+
+    The raw stats go to <out_dir>/<label>-<timestamp>.prof (open them with
+    snakeviz or pstats); the yielded result gets the path and a text summary
+    of the `top` functions by cumulative time once the block is done.
+    """
+    result = ProfileResult()
+    if not enabled:
+        yield result
+        return
+
+    # Only loaded when profiling, to keep CLI startup light
+    import cProfile
+    import io
+    import pstats
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield result
+    finally:
+        profiler.disable()
+        os.makedirs(out_dir, exist_ok=True)
+        result.path = os.path.join(out_dir, f"{label}-{time.strftime('%Y%m%d-%H%M%S')}.prof")
+        profiler.dump_stats(result.path)
+        out = io.StringIO()
+        pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(top)
+        result.text = out.getvalue()
@@ -0,0 +1,190 @@
+# src/migrations.py
+#
+# Versioned schema for the expenses database. PRAGMA user_version records
+# the last applied migration; migrate() applies the rest in order, each in
+# its own transaction, so every entry point (CLI, web app, services) can
+# call init_db() and end up on the same schema.
+#
+#   python -m src.migrations [--db expenses.db]
+
+import argparse
+
+from src.database import DB_PATH, SEARCH_SCHEMA, connection
+
+DEFAULT_CATEGORIES = ("entertainment", "food", "other", "shopping", "travel")
+
+# -----------------------------
+# SCHEMA
+# -----------------------------
+# Amounts are integer minor units (paise) so sums are exact; dates are
+# ISO YYYY-MM-DD text, which sorts and range-scans correctly.
+CATEGORIES_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS categories (
+        id INTEGER PRIMARY KEY,
+        name TEXT NOT NULL UNIQUE
+    )
+"""
+
+EXPENSES_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS expenses (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        date TEXT NOT NULL CHECK (date IS date(date)),
+        description TEXT NOT NULL,
+        category_id INTEGER REFERENCES categories(id),
+        amount_minor INTEGER NOT NULL,
+        confidence TEXT,
+        score REAL CHECK (score BETWEEN 0 AND 1)
+    )
+"""
+
+CORRECTIONS_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS corrections (
+        description TEXT,
+        correct_category TEXT
+    )
+"""
+
+# Readers see names and decimal amounts; the join is on the categories primary key
+EXPENSE_ROWS_VIEW = """
+    CREATE VIEW IF NOT EXISTS expense_rows AS
+    SELECT e.id, e.date, e.description, c.name AS category,
+           e.amount_minor / 100.0 AS amount, e.confidence, e.score
+    FROM expenses e
+    LEFT JOIN categories c ON c.id = e.category_id
+"""
+
+INDEXES = (
+    "CREATE INDEX IF NOT EXISTS idx_expenses_date ON expenses(date)",
+    # amount is a trailing column so category totals and rollup refreshes
+    # are served from the index alone
+    "CREATE INDEX IF NOT EXISTS idx_expenses_category_date ON expenses(category_id, date, amount_minor)",
+    "CREATE INDEX IF NOT EXISTS idx_expenses_amount ON expenses(amount_minor)",
+)
+
+# Objects from before the versioned schema; they point at the old columns
+LEGACY_OBJECTS = (
+    "DROP TRIGGER IF EXISTS expenses_rollup_insert",
+    "DROP TRIGGER IF EXISTS expenses_rollup_delete",
+    "DROP TRIGGER IF EXISTS expenses_rollup_update",
+    "DROP TRIGGER IF EXISTS expenses_fts_insert",
+    "DROP TRIGGER IF EXISTS expenses_fts_delete",
+    "DROP TRIGGER IF EXISTS expenses_fts_update",
+    "DROP TABLE IF EXISTS expenses_fts",
+    "DROP TABLE IF EXISTS daily_rollup",
+    "DROP TABLE IF EXISTS monthly_rollup",
+    "DROP INDEX IF EXISTS idx_expenses_date",
+    "DROP INDEX IF EXISTS idx_expenses_category_date",
+    "DROP INDEX IF EXISTS idx_expenses_amount",
+)
+
+
+# -----------------------------
+# MIGRATIONS
+# -----------------------------
+def _columns(conn, table):
+    return {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+
+
+def typed_schema(conn):
+    """Create the typed schema, converting either legacy expenses table.
+
+    Legacy tables were (id, description, amount, category) from the CLI and
+    (id, date, description, category, amount, confidence) from the web app.
+    Ids are kept; rows without a usable date get the migration date.
+    """
+    legacy = _columns(conn, "expenses")
+    if legacy:
+        for sql in LEGACY_OBJECTS:
+            conn.execute(sql)
+        conn.execute("ALTER TABLE expenses RENAME TO expenses_legacy")
+
+    conn.execute(CATEGORIES_SCHEMA)
+    conn.executemany("INSERT OR IGNORE INTO categories (name) VALUES (?)", ((c,) for c in DEFAULT_CATEGORIES))
+    conn.execute(EXPENSES_SCHEMA)
+    conn.execute(CORRECTIONS_SCHEMA)
+
+    if legacy:
+        date = "COALESCE(date(date), date('now'))" if "date" in legacy else "date('now')"
+        # The web app stored 'High'/'Low'; new rows are written lowercase
+        confidence = "lower(trim(confidence))" if "confidence" in legacy else "NULL"
+        conn.execute("""
+            INSERT OR IGNORE INTO categories (name)
+            SELECT DISTINCT lower(trim(category)) FROM expenses_legacy
+            WHERE trim(COALESCE(category, '')) != ''
+        """)
+        conn.execute(f"""
+            INSERT INTO expenses (id, date, description, category_id, amount_minor, confidence)
+            SELECT l.id, {date}, COALESCE(l.description, ''), c.id,
+                   CAST(ROUND(ROUND(COALESCE(l.amount, 0), 2) * 100) AS INTEGER), {confidence}
+            FROM expenses_legacy l
+            LEFT JOIN categories c ON c.name = lower(trim(l.category))
+        """)
+        conn.execute("DROP TABLE expenses_legacy")
+
+    for sql in INDEXES:
+        conn.execute(sql)
+    conn.execute(EXPENSE_ROWS_VIEW)
+
+
+def rollup_tables(conn):
+    from src import rollups
+    rollups.install(conn)
+
+
+def search_index(conn):
+    for sql in SEARCH_SCHEMA:
+        conn.execute(sql)
+    conn.execute("INSERT INTO expenses_fts (expenses_fts) VALUES ('rebuild')")
+
+
+MIGRATIONS = (
+    (1, "typed expenses schema with categories", typed_schema),
+    (2, "daily and monthly rollups", rollup_tables),
+    (3, "full-text search index", search_index),
+)
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def schema_version(path=None):
+    with connection(path) as conn:
+        return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(path=None):
+    """Apply pending migrations; returns the list of versions applied."""
+    applied = []
+    with connection(path) as conn:
+        if conn.execute("PRAGMA user_version").fetchone()[0] >= LATEST_VERSION:
+            return applied
+
+        # WAL lets readers run alongside the writer; the setting persists in the file
+        conn.execute("PRAGMA journal_mode=WAL")
+        for version, _, step in MIGRATIONS:
+            # IMMEDIATE takes the write lock before re-reading the version, so
+            # two processes starting together apply each step once
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                if conn.execute("PRAGMA user_version").fetchone()[0] < version:
+                    step(conn)
+                    conn.execute(f"PRAGMA user_version = {version}")
+                    applied.append(version)
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+    return applied
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bring an expenses database up to the current schema")
+    parser.add_argument("--db", default=DB_PATH)
+    args = parser.parse_args()
+
+    before = schema_version(args.db)
+    applied = migrate(args.db)
+    if applied:
+        names = dict((v, d) for v, d, _ in MIGRATIONS)
+        for version in applied:
+            print(f"✅ {version}: {names[version]}")
+    print(f"Schema version {before} → {schema_version(args.db)} ({args.db})")
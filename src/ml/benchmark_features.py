@@ -0,0 +1,106 @@
+# src/ml/benchmark_features.py
+#
+# Compare the vocabulary TF-IDF FeatureUnion with the hashing + idf mode:
+#   python -m src.ml.benchmark_features [--json results.json]
+
+import argparse
+import io
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import accuracy_score
+from sklearn.model_selection import train_test_split
+from sklearn.pipeline import Pipeline
+
+from src.ml.compact import CompactModel, export_compact
+from src.ml.data import DATA_PATH, load_dataset
+from src.ml.features import FEATURE_MODES, build_features
+
+
+def load_data(path):
+    df = load_dataset(path)
+    return df["text"], df["category"]
+
+
+def _dir_size(path):
+    return sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path))
+
+
+def benchmark_mode(mode, X_train, X_test, y_train, y_test, single_runs=200):
+    pipeline = Pipeline([
+        ("features", build_features(mode)),
+        ("classifier", LogisticRegression(max_iter=1000, class_weight="balanced"))
+    ])
+
+    start = time.perf_counter()
+    pipeline.fit(X_train, y_train)
+    fit_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    y_pred = pipeline.predict(X_test)
+    batch_s = time.perf_counter() - start
+
+    sample = X_test.iloc[0]
+    timings = []
+    for _ in range(single_runs):
+        start = time.perf_counter()
+        pipeline.predict_proba([sample])
+        timings.append(time.perf_counter() - start)
+
+    buf = io.BytesIO()
+    joblib.dump(pipeline, buf)
+
+    compact_dir = tempfile.mkdtemp(prefix=f"compact_{mode}_")
+    try:
+        export_compact(pipeline, os.path.join(compact_dir, "model"), source_path="")
+        compact_bytes = _dir_size(os.path.join(compact_dir, "model"))
+        start = time.perf_counter()
+        CompactModel(os.path.join(compact_dir, "model"))
+        compact_load_s = time.perf_counter() - start
+    finally:
+        shutil.rmtree(compact_dir, ignore_errors=True)
+
+    return {
+        "mode": mode,
+        "accuracy": round(accuracy_score(y_test, y_pred), 4),
+        "fit_s": round(fit_s, 3),
+        "batch_us_per_row": round(batch_s / len(X_test) * 1e6, 2),
+        "single_p50_ms": round(float(np.median(timings)) * 1000, 3),
+        "n_features": int(pipeline.named_steps["classifier"].coef_.shape[1]),
+        "pickle_kb": round(len(buf.getvalue()) / 1024, 1),
+        "compact_kb": round(compact_bytes / 1024, 1),
+        "compact_load_ms": round(compact_load_s * 1000, 2)
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark feature extractor modes")
+    parser.add_argument("--data", default=DATA_PATH)
+    parser.add_argument("--modes", nargs="+", choices=FEATURE_MODES, default=list(FEATURE_MODES))
+    parser.add_argument("--json", help="also write results to this JSON file")
+    args = parser.parse_args()
+
+    X, y = load_data(args.data)
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=0.2, random_state=42, stratify=y
+    )
+    print(f"✅ {len(X_train)} train / {len(X_test)} test rows")
+
+    results = []
+    for mode in args.modes:
+        print(f"⏳ Benchmarking '{mode}'...")
+        results.append(benchmark_mode(mode, X_train, X_test, y_train, y_test))
+
+    print("\n" + pd.DataFrame(results).set_index("mode").T.to_string())
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n✅ Results written to {args.json}")
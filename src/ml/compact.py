@@ -0,0 +1,325 @@
+# src/ml/compact.py
+#
+# Flat, memory-mappable export of the TF-IDF + LogisticRegression pipeline.
+#
+# Layout of model/compact/:
+#   meta.json                 feature config, classes, source pickle hash
+#   <name>_terms.npy          sorted n-gram strings of each vectorizer
+#   <name>_columns.npy        column index of each sorted term
+#   <name>_idf.npy            idf weight per column
+#   coef.npy, intercept.npy   LogisticRegression weights
+#
+# Hashing vectorizers (src/ml/features.py, mode "hashing") have no terms or
+# columns files; their n-grams are hashed straight to a column instead.
+#
+# Every array is loaded with mmap_mode="r", so worker processes share one
+# page-cached copy and no vocabulary dict is ever rebuilt.
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import sys
+
+import numpy as np
+from scipy import sparse
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+PICKLE_PATH = os.path.join(BASE_DIR, "model", "classifier.pkl")
+COMPACT_DIR = os.path.join(BASE_DIR, "model", "compact")
+META_FILE = "meta.json"
+
+FORMAT_VERSION = 1
+
+_white_spaces = re.compile(r"\s\s+")
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+# -----------------------------
+# EXPORT
+# -----------------------------
+def _vectorizer_meta(name, vec):
+    if hasattr(vec, "named_steps"):
+        # Hashing mode: HashingVectorizer followed by a TfidfTransformer
+        hasher, idf = vec.named_steps["hash"], vec.named_steps["idf"]
+        analyzer_source, weighting = hasher, idf
+        kind = "hashing"
+    else:
+        analyzer_source, weighting = vec, vec
+        kind = "vocabulary"
+
+    if (analyzer_source.analyzer not in ("word", "char")
+            or callable(analyzer_source.tokenizer)
+            or analyzer_source.preprocessor is not None):
+        raise ValueError(f"❌ Vectorizer '{name}' uses a custom analyzer; cannot export")
+
+    meta = {
+        "name": name,
+        "kind": kind,
+        "analyzer": analyzer_source.analyzer,
+        "ngram_range": list(analyzer_source.ngram_range),
+        "lowercase": bool(analyzer_source.lowercase),
+        "token_pattern": analyzer_source.token_pattern,
+        "sublinear_tf": bool(weighting.sublinear_tf),
+        "norm": weighting.norm
+    }
+    if kind == "hashing":
+        meta["n_features"] = int(hasher.n_features)
+    return meta, weighting.idf_
+
+
+def _proba_mode(classifier):
+    if len(classifier.classes_) == 2:
+        return "binary"
+    if getattr(classifier, "solver", None) == "liblinear":
+        return "ovr"
+    return "softmax"
+
+
+def export_compact(pipeline, out_dir=COMPACT_DIR, source_path=PICKLE_PATH):
+    """Write `pipeline` to `out_dir` in the flat NumPy layout."""
+    features = pipeline.named_steps["features"]
+    classifier = pipeline.named_steps["classifier"]
+
+    tmp_dir = out_dir + ".tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    vectorizers = []
+    offset = 0
+    for name, vec in features.transformer_list:
+        meta, idf = _vectorizer_meta(name, vec)
+
+        if meta["kind"] == "vocabulary":
+            terms = np.array(sorted(vec.vocabulary_), dtype=str)
+            columns = np.array([vec.vocabulary_[t] for t in terms], dtype=np.int32)
+            np.save(os.path.join(tmp_dir, f"{name}_terms.npy"), terms)
+            np.save(os.path.join(tmp_dir, f"{name}_columns.npy"), columns)
+            meta["n_features"] = len(terms)
+        np.save(os.path.join(tmp_dir, f"{name}_idf.npy"), idf)
+
+        meta["offset"] = offset
+        offset += meta["n_features"]
+        vectorizers.append(meta)
+
+    np.save(os.path.join(tmp_dir, "coef.npy"), np.ascontiguousarray(classifier.coef_))
+    np.save(os.path.join(tmp_dir, "intercept.npy"), classifier.intercept_)
+
+    meta = {
+        "format_version": FORMAT_VERSION,
+        "classes": [str(c) for c in classifier.classes_],
+        "proba": _proba_mode(classifier),
+        "vectorizers": vectorizers,
+        "source_sha256": file_sha256(source_path) if os.path.exists(source_path) else None,
+        "source_stat": _stat_key(source_path)
+    }
+    with open(os.path.join(tmp_dir, META_FILE), "w") as f:
+        json.dump(meta, f, indent=2)
+
+    # Swap the finished directory into place so readers never see a partial export
+    old_dir = out_dir + ".old"
+    shutil.rmtree(old_dir, ignore_errors=True)
+    if os.path.exists(out_dir):
+        os.replace(out_dir, old_dir)
+    os.replace(tmp_dir, out_dir)
+    shutil.rmtree(old_dir, ignore_errors=True)
+
+    return out_dir
+
+
+# -----------------------------
+# LOAD / INFERENCE
+# -----------------------------
+class _CompactVectorizer:
+    def __init__(self, directory, meta, mmap_mode):
+        self.meta = meta
+        name = meta["name"]
+        self.idf = np.load(os.path.join(directory, f"{name}_idf.npy"), mmap_mode=mmap_mode)
+        self.n_features = meta["n_features"]
+        self.min_n, self.max_n = meta["ngram_range"]
+        self._hasher = None
+
+        if meta.get("kind", "vocabulary") == "vocabulary":
+            self.terms = np.load(os.path.join(directory, f"{name}_terms.npy"), mmap_mode=mmap_mode)
+            self.columns = np.load(os.path.join(directory, f"{name}_columns.npy"), mmap_mode=mmap_mode)
+            self._token_re = re.compile(meta["token_pattern"]) if meta["analyzer"] == "word" else None
+
+    # Same n-gram rules as sklearn's _word_ngrams / _char_ngrams
+    def _analyze(self, text):
+        if self.meta["lowercase"]:
+            text = text.lower()
+
+        if self._token_re is not None:
+            tokens = self._token_re.findall(text)
+            grams = list(tokens) if self.min_n == 1 else []
+            for n in range(max(self.min_n, 2), min(self.max_n, len(tokens)) + 1):
+                grams.extend(" ".join(tokens[i:i + n]) for i in range(len(tokens) - n + 1))
+            return grams
+
+        text = _white_spaces.sub(" ", text)
+        grams = []
+        for n in range(self.min_n, min(self.max_n, len(text)) + 1):
+            grams.extend(text[i:i + n] for i in range(len(text) - n + 1))
+        return grams
+
+    def _vocabulary_counts(self, texts):
+        grams, rows = [], []
+        for row, text in enumerate(texts):
+            doc = self._analyze(text)
+            grams.extend(doc)
+            rows.extend([row] * len(doc))
+
+        n_docs = len(texts)
+        if not grams or not len(self.terms):
+            return sparse.csr_matrix((n_docs, self.n_features))
+
+        grams = np.array(grams, dtype=str)
+        rows = np.array(rows, dtype=np.int64)
+
+        pos = np.searchsorted(self.terms, grams)
+        pos[pos == len(self.terms)] = 0
+        known = self.terms[pos] == grams
+
+        cols = self.columns[pos[known]]
+        X = sparse.csr_matrix(
+            (np.ones(len(cols)), (rows[known], cols)),
+            shape=(n_docs, self.n_features)
+        )
+        X.sum_duplicates()
+        return X
+
+    def _hashed_counts(self, texts):
+        if self._hasher is None:
+            from sklearn.feature_extraction.text import HashingVectorizer
+
+            self._hasher = HashingVectorizer(
+                analyzer=self.meta["analyzer"],
+                ngram_range=tuple(self.meta["ngram_range"]),
+                lowercase=self.meta["lowercase"],
+                token_pattern=self.meta["token_pattern"],
+                n_features=self.n_features,
+                alternate_sign=False,
+                norm=None
+            )
+        return self._hasher.transform(texts).tocsr()
+
+    def transform(self, texts):
+        if self.meta.get("kind") == "hashing":
+            X = self._hashed_counts(texts)
+        else:
+            X = self._vocabulary_counts(texts)
+
+        if self.meta["sublinear_tf"]:
+            np.log(X.data, X.data)
+            X.data += 1
+        X.data *= self.idf[X.indices]
+
+        norm = self.meta["norm"]
+        if norm:
+            sq = X.multiply(X) if norm == "l2" else abs(X)
+            totals = np.asarray(sq.sum(axis=1)).ravel()
+            if norm == "l2":
+                totals = np.sqrt(totals)
+            totals[totals == 0] = 1
+            X.data /= np.repeat(totals, np.diff(X.indptr))
+        return X
+
+
+class CompactModel:
+    """Inference-only stand-in for the sklearn pipeline.
+
+    Exposes `classes_`, `transform` and `predict_proba`, so it can be used
+    anywhere the pickled pipeline is.
+    """
+
+    def __init__(self, directory=COMPACT_DIR, mmap_mode="r"):
+        self.directory = directory
+        with open(os.path.join(directory, META_FILE)) as f:
+            self.meta = json.load(f)
+        if self.meta.get("format_version") != FORMAT_VERSION:
+            raise ValueError(f"❌ Unsupported compact model format in {directory}")
+
+        self.classes_ = np.array(self.meta["classes"])
+        self.vectorizers = [_CompactVectorizer(directory, m, mmap_mode) for m in self.meta["vectorizers"]]
+        self.coef = np.load(os.path.join(directory, "coef.npy"), mmap_mode=mmap_mode)
+        self.intercept = np.load(os.path.join(directory, "intercept.npy"), mmap_mode=mmap_mode)
+
+    def transform(self, texts):
+        texts = [str(t) for t in texts]
+        return sparse.hstack([v.transform(texts) for v in self.vectorizers], format="csr")
+
+    def decision_function(self, texts):
+        return self.transform(texts) @ self.coef.T + self.intercept
+
+    def predict_proba(self, texts):
+        return self.predict_proba_features(self.transform(texts))
+
+    def predict_proba_features(self, X):
+        """predict_proba for rows already vectorized with transform()."""
+        scores = np.asarray(X @ self.coef.T + self.intercept)
+        mode = self.meta["proba"]
+
+        if mode == "binary":
+            pos = 1.0 / (1.0 + np.exp(-scores[:, 0]))
+            return np.column_stack([1 - pos, pos])
+
+        if mode == "ovr":
+            probs = 1.0 / (1.0 + np.exp(-scores))
+            return probs / probs.sum(axis=1, keepdims=True)
+
+        scores = scores - scores.max(axis=1, keepdims=True)
+        np.exp(scores, scores)
+        return scores / scores.sum(axis=1, keepdims=True)
+
+    def predict(self, texts):
+        return self.classes_[self.predict_proba(texts).argmax(axis=1)]
+
+
+def _stat_key(path):
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return [st.st_size, st.st_mtime_ns]
+
+
+def is_current(directory=COMPACT_DIR, source_path=PICKLE_PATH, source_sha256=None):
+    """True when `directory` holds an export of the pickle at `source_path`.
+
+    Pass `source_sha256` when the pickle's hash is already known (the
+    registry records it in meta.json). Otherwise an unchanged size and mtime
+    is trusted, and the pickle is only re-hashed when those differ.
+    """
+    meta_path = os.path.join(directory, META_FILE)
+    if not os.path.exists(meta_path):
+        return False
+    if not os.path.exists(source_path):
+        return True
+    with open(meta_path) as f:
+        meta = json.load(f)
+    if source_sha256 is not None:
+        return meta.get("source_sha256") == source_sha256
+    if meta.get("source_stat") is not None and meta["source_stat"] == _stat_key(source_path):
+        return True
+    return meta.get("source_sha256") == file_sha256(source_path)
+
+
+# Export the existing classifier.pkl without retraining:
+#   python -m src.ml.compact
+if __name__ == "__main__":
+    import joblib
+
+    if not os.path.exists(PICKLE_PATH):
+        print(f"❌ Model not found at {PICKLE_PATH}")
+        sys.exit(1)
+
+    out = export_compact(joblib.load(PICKLE_PATH))
+    print(f"✅ Compact model written to {out}")
@@ -0,0 +1,157 @@
+# src/ml/data.py
+#
+# Streaming loader for the training CSV. The file is read in chunks with
+# explicit dtypes, each chunk is cleaned and validated on its own, and the
+# result is either yielded, collected for training or written to Parquet,
+# so peak memory depends on the chunk size rather than the file size.
+
+import os
+
+import pandas as pd
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+DATA_PATH = os.path.join(BASE_DIR, "data", "expenses.csv")
+
+VALID_CATEGORIES = ["entertainment", "food", "other", "shopping", "travel"]
+CATEGORY_DTYPE = pd.CategoricalDtype(VALID_CATEGORIES)
+CHUNK_SIZE = 100_000
+
+
+# -----------------------------
+# COLUMNS
+# -----------------------------
+def resolve_columns(columns):
+    """Return (text_column, category_column) for a raw CSV header."""
+    columns = [c.strip() for c in columns]
+
+    if "text" in columns:
+        text_col = "text"
+    elif "Description" in columns and "category" in columns:
+        # If we have category, then Description is likely the text
+        text_col = "Description"
+    else:
+        raise KeyError(f"❌ Could not find a 'text' column. Available: {columns}")
+
+    if "category" in columns:
+        category_col = "category"
+    elif "Description" in columns and text_col != "Description":
+        # Our CSV uses 'Description' for the category labels
+        category_col = "Description"
+    elif "Category" in columns:
+        category_col = "Category"
+    else:
+        raise KeyError(f"❌ Missing target column 'category'. Available: {columns}")
+
+    return text_col, category_col
+
+
+def _raw_header(path):
+    header = pd.read_csv(path, nrows=0).columns
+    return {c.strip(): c for c in header}
+
+
+# -----------------------------
+# STREAMING
+# -----------------------------
+class ValidationStats:
+    """Counts accumulated across chunks, so nothing needs the full frame."""
+
+    def __init__(self):
+        self.rows_in = 0
+        self.rows_out = 0
+        self.missing = {"text": 0, "category": 0}
+        self.raw_categories = pd.Series(dtype="int64")
+        self.categories = pd.Series(0, index=VALID_CATEGORIES, dtype="int64")
+
+    def add_raw(self, chunk):
+        self.rows_in += len(chunk)
+        for col in self.missing:
+            self.missing[col] += int(chunk[col].isna().sum())
+        counts = chunk["category"].value_counts()
+        self.raw_categories = self.raw_categories.add(counts, fill_value=0).astype("int64")
+
+    def add_clean(self, chunk):
+        self.rows_out += len(chunk)
+        self.categories = self.categories.add(chunk["category"].value_counts(), fill_value=0).astype("int64")
+
+    def as_dict(self):
+        return {
+            "rows_in": self.rows_in,
+            "rows_out": self.rows_out,
+            "dropped": self.rows_in - self.rows_out,
+            "missing": dict(self.missing),
+            "categories": {k: int(v) for k, v in self.categories.items()}
+        }
+
+
+def clean_chunk(chunk):
+    """Lower-case/strip text and labels, drop empty text and unknown labels."""
+    text = chunk["text"].str.lower().str.strip()
+
+    # Map over the handful of distinct labels instead of every row
+    labels = chunk["category"]
+    mapping = {c: str(c).lower().strip() for c in labels.cat.categories}
+    category = labels.map(mapping).astype(CATEGORY_DTYPE)
+
+    keep = (text.fillna("") != "") & category.notna()
+    return pd.DataFrame({"text": text[keep], "category": category[keep]})
+
+
+def iter_clean_chunks(path=DATA_PATH, chunksize=CHUNK_SIZE, stats=None):
+    """Yield cleaned (text, category) DataFrames of at most `chunksize` rows."""
+    header = _raw_header(path)
+    text_col, category_col = resolve_columns(header)
+
+    reader = pd.read_csv(
+        path,
+        usecols=[header[text_col], header[category_col]],
+        dtype={header[text_col]: "string", header[category_col]: "category"},
+        chunksize=chunksize
+    )
+    for raw in reader:
+        raw = raw.rename(columns={header[text_col]: "text", header[category_col]: "category"})
+        if stats is not None:
+            stats.add_raw(raw)
+        chunk = clean_chunk(raw)
+        if stats is not None:
+            stats.add_clean(chunk)
+        yield chunk
+
+
+def load_dataset(path=DATA_PATH, chunksize=CHUNK_SIZE):
+    """Cleaned dataset as one DataFrame (text: string, category: category).
+
+    Reads a cleaned Parquet file directly, or streams and cleans a CSV.
+    """
+    if path.endswith(".parquet"):
+        df = pd.read_parquet(path, columns=["text", "category"])
+        df["category"] = df["category"].astype(CATEGORY_DTYPE)
+        return df
+
+    chunks = list(iter_clean_chunks(path, chunksize))
+    if not chunks:
+        return pd.DataFrame({
+            "text": pd.Series(dtype="string"),
+            "category": pd.Series(dtype=CATEGORY_DTYPE)
+        })
+    return pd.concat(chunks, ignore_index=True)
+
+
+def write_parquet(path, out_path, chunksize=CHUNK_SIZE):
+    """Stream `path` through cleaning into a Parquet file; returns ValidationStats."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([
+        ("text", pa.string()),
+        ("category", pa.dictionary(pa.int8(), pa.string()))
+    ])
+    stats = ValidationStats()
+
+    tmp_path = f"{out_path}.tmp"
+    with pq.ParquetWriter(tmp_path, schema, compression="zstd") as writer:
+        for chunk in iter_clean_chunks(path, chunksize, stats):
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+    os.replace(tmp_path, out_path)
+
+    return stats
@@ -0,0 +1,62 @@
+# src/ml/features.py
+
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfTransformer, TfidfVectorizer
+from sklearn.pipeline import FeatureUnion, Pipeline
+
+FEATURE_MODES = ("tfidf", "hashing")
+
+# Hash space per vectorizer; coef_ grows with n_classes * (word + char) features
+HASH_WORD_FEATURES = 2 ** 16
+HASH_CHAR_FEATURES = 2 ** 17
+
+
+def _hashed_tfidf(n_features, **params):
+    # Stateless hashing (no vocabulary) followed by a stored idf vector
+    return Pipeline([
+        ("hash", HashingVectorizer(
+            n_features=n_features,
+            alternate_sign=False,
+            norm=None,
+            **params
+        )),
+        ("idf", TfidfTransformer())
+    ])
+
+
+def build_features(mode="tfidf", n_jobs=None):
+    """Word 1-2-gram + char 3-5-gram features for the given mode.
+
+    "tfidf"   - fitted vocabularies (the original model)
+    "hashing" - fixed-size hashed features with an idf vector; memory does not
+                grow with the dataset and transform needs no fitted state
+                beyond idf, so batches can be transformed in parallel.
+    """
+    if mode == "tfidf":
+        return FeatureUnion([
+            ("word_tfidf", TfidfVectorizer(lowercase=True, ngram_range=(1, 2), min_df=2)),
+            ("char_tfidf", TfidfVectorizer(analyzer="char", ngram_range=(3, 5), min_df=2))
+        ], n_jobs=n_jobs)
+
+    if mode == "hashing":
+        return FeatureUnion([
+            ("word_hash", _hashed_tfidf(HASH_WORD_FEATURES, lowercase=True, ngram_range=(1, 2))),
+            ("char_hash", _hashed_tfidf(HASH_CHAR_FEATURES, analyzer="char", ngram_range=(3, 5)))
+        ], n_jobs=n_jobs)
+
+    raise ValueError(f"❌ Unknown feature mode '{mode}'. Choose from {FEATURE_MODES}")
+
+
+def build_stateless_features():
+    """Hashed word + char features with no fitted state at all (no idf).
+
+    Used by the incremental trainer: new rows can be transformed and folded
+    in with partial_fit without ever refitting the feature space.
+    """
+    return FeatureUnion([
+        ("word_hash", HashingVectorizer(
+            n_features=HASH_WORD_FEATURES, alternate_sign=False, lowercase=True, ngram_range=(1, 2)
+        )),
+        ("char_hash", HashingVectorizer(
+            n_features=HASH_CHAR_FEATURES, alternate_sign=False, analyzer="char", ngram_range=(3, 5)
+        ))
+    ])
@@ -1,42 +1,29 @@
 # src/ml/generate_training_data.py
+#
+# Labelled synthetic descriptions in the training CSV format (text,category),
+# drawn from the seeded generator in src/benchmarks/synthetic.py:
+#   python -m src.ml.generate_training_data --rows 100000 --out data/synthetic.csv
+#   python -m src.train --data data/synthetic.csv
 
-import random
+import argparse
 
-food = [
-    "pizza", "burger", "kfc", "dominos", "mcdonalds",
-    "swiggy", "zomato", "biryani", "coffee", "starbucks"
-]
+import pandas as pd
 
-travel = [
-    "uber", "ola", "metro", "bus", "flight",
-    "train", "cab", "auto", "taxi"
-]
+from src.benchmarks.synthetic import labelled_sample
 
-shopping = [
-    "amazon", "flipkart", "mall", "clothes",
-    "shoes", "electronics", "shopping"
-]
 
-entertainment = [
-    "netflix", "spotify", "movie", "cinema",
-    "prime video", "hotstar", "concert"
-]
+def generate_samples(n=2000, seed=42):
+    texts, labels = labelled_sample(n, seed)
+    return pd.DataFrame({"text": texts, "category": labels})
 
-texts = []
-labels = []
 
-def add_samples(words, label, count):
-    for _ in range(count):
-        texts.append(random.choice(words))
-        labels.append(label)
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write synthetic labelled training data")
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", required=True, help="CSV file to write")
+    args = parser.parse_args()
 
-add_samples(food, "Food", 500)
-add_samples(travel, "Travel", 500)
-add_samples(shopping, "Shopping", 500)
-add_samples(entertainment, "Entertainment", 500)
-
-print(f"Generated {len(texts)} samples")
-
-with open("src/ml/training_data.py", "w") as f:
-    f.write("texts = " + str(texts) + "\n\n")
-    f.write("labels = " + str(labels))
+    samples = generate_samples(args.rows, args.seed)
+    samples.to_csv(args.out, index=False)
+    print(f"Generated {len(samples)} samples → {args.out}")
@@ -0,0 +1,289 @@
+# src/ml/merchants.py
+#
+# Rule-based fast path in front of the classifier. Known merchant keywords
+# are compiled into one Aho-Corasick automaton, so every keyword in a
+# description is found in a single pass over its characters; descriptions
+# the user has corrected are matched exactly. Only text with no hit, hits
+# from different categories or an ambiguous merchant name goes on to the model.
+#
+#   python -m src.ml.merchants "UPI/SWIGGY/1234"     # show the match
+#   python -m src.ml.merchants --db expenses.db      # hit rate over stored expenses
+
+import argparse
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+
+from src.cache import normalize_text
+
+# Merchant names and unambiguous payee phrases only: generic nouns such as
+# "coffee", "mall" or "movie" say too little to overrule the model
+MERCHANT_KEYWORDS = {
+    "food": [
+        "swiggy", "zomato", "dominos", "pizza hut", "kfc", "mcdonalds", "burger king", "subway",
+        "starbucks", "cafe coffee day", "chaayos", "haldiram", "barbeque nation", "baskin robbins",
+        "blinkit", "zepto", "bigbasket", "dunzo"
+    ],
+    "travel": [
+        "uber", "ola", "rapido", "redbus", "irctc", "indigo", "air india", "vistara", "makemytrip",
+        "goibibo", "fastag", "oyo rooms"
+    ],
+    "shopping": [
+        "amazon", "flipkart", "myntra", "ajio", "nykaa", "meesho", "decathlon", "croma",
+        "reliance digital", "ikea", "westside", "zara", "h&m", "tata cliq", "dmart"
+    ],
+    "entertainment": [
+        "netflix", "spotify", "prime video", "hotstar", "sony liv", "youtube premium", "bookmyshow",
+        "pvr", "inox", "steam games", "playstation"
+    ],
+    "other": [
+        "electricity bill", "water bill", "lic premium", "rent transfer", "atm withdrawal",
+        "airtel recharge", "jio recharge", "apollo pharmacy"
+    ],
+}
+
+# Names that contain a merchant keyword but belong to a different business
+# ("uber eats" is food, "metro cash" is wholesale): a hit sends the text to the model
+AMBIGUOUS_MERCHANTS = [
+    "uber eats", "metro cash", "amazon fresh", "amazon pay", "amazon prime", "flipkart health",
+    "ola money", "ola electric", "paytm mall", "swiggy genie", "zomato hyperpure"
+]
+
+# Keywords shorter than this only match whole words ("ola" must not hit "cola")
+MIN_SUBSTRING_LEN = 6
+CHECK_INTERVAL = 5.0    # seconds between checks for new corrections
+
+KEYWORD = "keyword"
+CORRECTION = "correction"
+
+
+# -----------------------------
+# AHO-CORASICK
+# -----------------------------
+class KeywordMatcher:
+    """Aho-Corasick automaton over {keyword: category} (None marks an ambiguous name).
+
+    Built once in O(total keyword length); `find` is O(len(text) + matches)
+    however many keywords there are.
+    """
+
+    def __init__(self, keywords):
+        self.goto = [{}]
+        self.fail = [0]
+        self.out = [()]
+        for keyword, category in keywords.items():
+            self._add(normalize_text(keyword), category)
+        self._link()
+
+    def _add(self, keyword, category):
+        node = 0
+        for ch in keyword:
+            nxt = self.goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self.goto)
+                self.goto[node][ch] = nxt
+                self.goto.append({})
+                self.fail.append(0)
+                self.out.append(())
+            node = nxt
+        self.out[node] = ((keyword, category),)
+
+    def _link(self):
+        """Breadth-first failure links; each node also inherits its fallback's matches."""
+        todo = deque(self.goto[0].values())
+        while todo:
+            node = todo.popleft()
+            for ch, child in self.goto[node].items():
+                todo.append(child)
+                fallback = self.fail[node]
+                while fallback and ch not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                link = self.goto[fallback].get(ch, 0)
+                self.fail[child] = link if link != child else 0
+                self.out[child] = self.out[child] + self.out[self.fail[child]]
+
+    def find(self, text):
+        """Yield (keyword, category) for every keyword occurrence in normalized `text`."""
+        goto, fail, out = self.goto, self.fail, self.out
+        node = 0
+        for end, ch in enumerate(text, 1):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            for keyword, category in out[node]:
+                if len(keyword) >= MIN_SUBSTRING_LEN or _whole_word(text, end - len(keyword), end):
+                    yield keyword, category
+
+
+def _whole_word(text, start, end):
+    return (start == 0 or not text[start - 1].isalnum()) and (end == len(text) or not text[end].isalnum())
+
+
+# -----------------------------
+# RULES
+# -----------------------------
+class MerchantRules:
+    """Keyword automaton plus exact user corrections, with hit-rate counters.
+
+    Corrections are read from the corrections table of `db_path` and
+    reloaded when it grows (checked at most once per `check_interval`).
+    """
+
+    def __init__(self, keywords=None, ambiguous=None, db_path=None, check_interval=CHECK_INTERVAL):
+        keywords = keywords or MERCHANT_KEYWORDS
+        ambiguous = AMBIGUOUS_MERCHANTS if ambiguous is None else ambiguous
+        self.keywords = {k: c for c, words in keywords.items() for k in words}
+        self.matcher = KeywordMatcher({**self.keywords, **{k: None for k in ambiguous}})
+        self.db_path = db_path
+        self.check_interval = check_interval
+
+        self.corrections = {}
+        self._watermark = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+        self.lookups = 0
+        self.keyword_hits = 0
+        self.correction_hits = 0
+        self.ambiguous = 0
+
+    def _refresh_corrections(self):
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval:
+            return
+        with self._lock:
+            if now - self._checked_at < self.check_interval:
+                return
+            self._checked_at = now
+            self.corrections = self._load_corrections()
+
+    def _load_corrections(self):
+        from src.database import DB_PATH, connection
+        from src.ml.data import VALID_CATEGORIES
+
+        path = self.db_path or DB_PATH
+        if not os.path.exists(path):
+            return self.corrections
+        try:
+            with connection(path) as conn:
+                watermark = conn.execute("SELECT MAX(rowid), COUNT(*) FROM corrections").fetchone()
+                if watermark == self._watermark:
+                    return self.corrections
+                rows = conn.execute(
+                    "SELECT description, correct_category FROM corrections ORDER BY rowid"
+                ).fetchall()
+        except sqlite3.OperationalError:
+            return self.corrections
+
+        self._watermark = watermark
+        # Later corrections of the same description win
+        corrections = {}
+        for description, category in rows:
+            category = str(category).strip().lower()
+            if description and category in VALID_CATEGORIES:
+                corrections[normalize_text(description)] = category
+        return corrections
+
+    def match(self, key):
+        """(category, source, matched text) for a normalized description, or None."""
+        category = self.corrections.get(key)
+        if category:
+            return category, CORRECTION, key
+
+        best = None
+        categories = set()
+        for keyword, category in self.matcher.find(key):
+            categories.add(category)
+            if best is None or len(keyword) > len(best[2]):
+                best = (category, KEYWORD, keyword)
+        if len(categories) > 1 or None in categories:
+            return False
+        return best
+
+    def match_many(self, keys):
+        """One match() result (or None) per normalized description."""
+        self._refresh_corrections()
+        results = []
+        keyword_hits = correction_hits = ambiguous = 0
+        for key in keys:
+            hit = self.match(key)
+            if hit is False:
+                ambiguous += 1
+                hit = None
+            elif hit is not None:
+                if hit[1] == CORRECTION:
+                    correction_hits += 1
+                else:
+                    keyword_hits += 1
+            results.append(hit)
+
+        self.lookups += len(keys)
+        self.keyword_hits += keyword_hits
+        self.correction_hits += correction_hits
+        self.ambiguous += ambiguous
+        return results
+
+    def stats(self):
+        hits = self.keyword_hits + self.correction_hits
+        return {
+            "lookups": self.lookups,
+            "hits": hits,
+            "keyword_hits": self.keyword_hits,
+            "correction_hits": self.correction_hits,
+            "ambiguous": self.ambiguous,
+            "hit_rate": round(hits / self.lookups, 3) if self.lookups else 0.0,
+            "keywords": len(self.keywords),
+            "corrections": len(self.corrections)
+        }
+
+
+def hit_rate(db_path, rules=None, chunk_size=10_000):
+    """Run the rules over every stored description.
+
+    Returns the rules' stats plus how often a hit agrees with the stored
+    category and the average microseconds per lookup.
+    """
+    from src.database import connection
+
+    rules = rules or MerchantRules(db_path=db_path)
+    agree = checked = 0
+    seconds = 0.0
+    with connection(db_path) as conn:
+        cursor = conn.execute("SELECT description, category FROM expense_rows ORDER BY id")
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            keys = [normalize_text(d) for d, _ in rows]
+            start = time.perf_counter()
+            hits = rules.match_many(keys)
+            seconds += time.perf_counter() - start
+            for (_, stored), hit in zip(rows, hits):
+                if hit and stored:
+                    checked += 1
+                    agree += hit[0] == stored
+
+    stats = rules.stats()
+    stats["agreement"] = round(agree / checked, 4) if checked else None
+    stats["us_per_lookup"] = round(seconds / stats["lookups"] * 1e6, 2) if stats["lookups"] else None
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Merchant keyword fast path")
+    parser.add_argument("text", nargs="*", help="descriptions to match")
+    parser.add_argument("--db", help="report the hit rate over this database's expenses")
+    args = parser.parse_args()
+
+    if args.db:
+        print(f"⏳ Matching every expense in {args.db}...")
+        for name, value in hit_rate(args.db).items():
+            print(f"   {name:<16} {value}")
+    for text in args.text:
+        hit = MerchantRules().match(normalize_text(text))
+        if hit:
+            print(f"✅ {text!r} → {hit[0]} ({hit[1]} '{hit[2]}')")
+        else:
+            print(f"➡️  {text!r} → model ({'conflicting or ambiguous keywords' if hit is False else 'no match'})")
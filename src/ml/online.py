@@ -0,0 +1,288 @@
+# src/ml/online.py
+#
+# Incremental trainer: folds user corrections into a partial_fit model on a
+# stateless hashed feature space, so an update costs O(new rows).
+#
+#   python -m src.ml.online                 # fold in new corrections once
+#   python -m src.ml.online --watch         # keep running in the foreground
+
+import argparse
+import copy
+import os
+import threading
+import time
+
+import joblib
+import numpy as np
+from sklearn.linear_model import SGDClassifier
+from sklearn.pipeline import Pipeline
+
+from src.database import DB_PATH, connection
+from src.ml.data import DATA_PATH, VALID_CATEGORIES, iter_clean_chunks
+from src.ml.features import build_stateless_features
+from src.ml import registry
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+ONLINE_MODEL_PATH = os.path.join(BASE_DIR, "model", "online.pkl")
+CORRECTIONS_DB = DB_PATH
+
+CATEGORIES = VALID_CATEGORIES
+
+BOOTSTRAP_CHUNK_SIZE = 5000
+CORRECTION_WEIGHT = 5.0      # a user fix counts more than one bootstrap row
+UPDATE_INTERVAL = 300        # fold pending corrections in at least this often (seconds)
+UPDATE_THRESHOLD = 20        # or as soon as this many are waiting
+HOLDOUT_EVERY = 10           # every 10th bootstrap row is kept out of training for the publish check
+HOLDOUT_ROWS = 2000
+
+
+# -----------------------------
+# MODEL STATE
+# -----------------------------
+def new_model():
+    classifier = SGDClassifier(loss="log_loss", alpha=1e-5, random_state=42)
+    return Pipeline([
+        ("features", build_stateless_features()),
+        ("classifier", classifier)
+    ])
+
+
+def load_state(path=ONLINE_MODEL_PATH):
+    if not os.path.exists(path):
+        return None
+    return joblib.load(path)
+
+
+def publish_state(state, path=ONLINE_MODEL_PATH):
+    # Write next to the target and rename, so readers never see a partial file
+    tmp_path = f"{path}.tmp"
+    joblib.dump(state, tmp_path)
+    os.replace(tmp_path, path)
+
+
+def _partial_fit(pipeline, texts, labels, weight=1.0):
+    X = pipeline.named_steps["features"].transform(texts)
+    pipeline.named_steps["classifier"].partial_fit(
+        X, labels, classes=CATEGORIES, sample_weight=np.full(len(labels), weight)
+    )
+
+
+def bootstrap(data_path=DATA_PATH, chunk_size=BOOTSTRAP_CHUNK_SIZE):
+    """One streaming pass over the training CSV to seed the online model.
+
+    Every HOLDOUT_EVERY-th row is held out (up to HOLDOUT_ROWS) so the model
+    can be compared with the active one before it is published.
+    """
+    pipeline = new_model()
+    rows = 0
+    holdout_texts, holdout_labels = [], []
+    for chunk in iter_clean_chunks(data_path, chunk_size):
+        if not len(chunk):
+            continue
+        texts = chunk["text"].tolist()
+        labels = chunk["category"].astype(str).to_numpy()
+        held = (np.arange(rows, rows + len(texts)) % HOLDOUT_EVERY) == 0
+        if len(holdout_texts) >= HOLDOUT_ROWS:
+            held[:] = False
+        holdout_texts += [t for t, h in zip(texts, held) if h]
+        holdout_labels += labels[held].tolist()
+        _partial_fit(pipeline, [t for t, h in zip(texts, held) if not h], labels[~held])
+        rows += len(texts)
+
+    return {"pipeline": pipeline, "corrections_rowid": 0, "trained_rows": rows, "updated_at": time.time(),
+            "trained_from": None, "holdout": (holdout_texts[:HOLDOUT_ROWS], holdout_labels[:HOLDOUT_ROWS]),
+            "published": False}
+
+
+# -----------------------------
+# INCREMENTAL UPDATES
+# -----------------------------
+def pending_corrections(after_rowid, db_path=CORRECTIONS_DB):
+    with connection(db_path) as conn:
+        return conn.execute(
+            "SELECT rowid, description, correct_category FROM corrections "
+            "WHERE rowid > ? ORDER BY rowid",
+            (after_rowid,)
+        ).fetchall()
+
+
+def count_pending(after_rowid, db_path=CORRECTIONS_DB):
+    with connection(db_path) as conn:
+        return conn.execute(
+            "SELECT COUNT(*) FROM corrections WHERE rowid > ?", (after_rowid,)
+        ).fetchone()[0]
+
+
+def update(state, db_path=CORRECTIONS_DB):
+    """Fold corrections newer than the state's watermark into its model.
+
+    Returns the number of corrections applied. The state is modified in
+    place on a copy of the pipeline, which replaces the old one in a single
+    assignment once training is done.
+    """
+    rows = pending_corrections(state["corrections_rowid"], db_path)
+    if not rows:
+        return 0
+
+    texts, labels = [], []
+    for _, description, category in rows:
+        category = str(category).lower().strip()
+        if description and category in CATEGORIES:
+            texts.append(str(description))
+            labels.append(category)
+
+    if texts:
+        # Train a copy so in-process readers of the old pipeline are never
+        # scoring with half-updated weights
+        pipeline = copy.deepcopy(state["pipeline"])
+        _partial_fit(pipeline, texts, np.array(labels), weight=CORRECTION_WEIGHT)
+        state["pipeline"] = pipeline
+
+    state["corrections_rowid"] = rows[-1][0]
+    state["trained_rows"] += len(texts)
+    state["updated_at"] = time.time()
+    return len(texts)
+
+
+def accuracy(model, texts, labels):
+    if not texts:
+        return None
+    return float(np.mean(np.asarray(model.predict(texts)) == np.asarray(labels)))
+
+
+def active_model(root=registry.REGISTRY_DIR):
+    """The model predictions currently come from (registry version or legacy files)."""
+    version = registry.current_version(root)
+    return registry.load_version(version, root) if version else registry.load_legacy()
+
+
+def publish_check(state, db_path=CORRECTIONS_DB, root=registry.REGISTRY_DIR):
+    """(ok, online accuracy, active accuracy) on the holdout plus every folded-in correction.
+
+    The online model is a single-pass SGD on hashed features, so it only
+    replaces the active model when it is at least as accurate.
+    """
+    texts, labels = map(list, state.get("holdout") or ([], []))
+    for rowid, description, category in pending_corrections(0, db_path):
+        category = str(category).lower().strip()
+        if rowid <= state["corrections_rowid"] and description and category in CATEGORIES:
+            texts.append(str(description))
+            labels.append(category)
+
+    online = accuracy(state["pipeline"], texts, labels)
+    try:
+        active = accuracy(active_model(root), texts, labels)
+    except FileNotFoundError:
+        return True, online, None
+    return online is not None and (active is None or online >= active), online, active
+
+
+# -----------------------------
+# BACKGROUND TRAINER
+# -----------------------------
+class OnlineTrainer(threading.Thread):
+    """Daemon thread that folds corrections in on a schedule.
+
+    Every `poll` seconds it counts pending corrections and runs an update
+    when `threshold` are waiting or `interval` seconds have passed since the
+    last one. Each new model is published to the model registry, which
+    other processes pick up on their own, and handed to `on_publish(model,
+    version)` (e.g. src.predict.set_pipeline) for an immediate in-process swap.
+    """
+
+    def __init__(self, db_path=CORRECTIONS_DB, model_path=ONLINE_MODEL_PATH,
+                 interval=UPDATE_INTERVAL, threshold=UPDATE_THRESHOLD, poll=5.0, on_publish=None,
+                 registry_dir=registry.REGISTRY_DIR):
+        super().__init__(name="online-trainer", daemon=True)
+        self.db_path = db_path
+        self.model_path = model_path
+        self.interval = interval
+        self.threshold = threshold
+        self.poll = poll
+        self.on_publish = on_publish
+        self.registry_dir = registry_dir
+        self._stop_event = threading.Event()
+        self.state = None
+        self.last_update = 0.0
+
+    def run_once(self):
+        batch = registry.batch_version(self.registry_dir)
+        if self.state is None or self.state.get("trained_from") != batch:
+            # A saved state built while an older batch model was current would
+            # override the retrained one, so start over and replay every correction
+            state = load_state(self.model_path)
+            if state is None or state.get("trained_from") != batch:
+                state = bootstrap()
+                state["trained_from"] = batch
+            self.state = state
+
+        # Nothing is saved or published until a correction is folded in: the
+        # bootstrap model alone is weaker than the batch model it would replace
+        applied = update(self.state, self.db_path)
+        if applied:
+            ok, online_acc, active_acc = publish_check(self.state, self.db_path, self.registry_dir)
+            self.state["published"] = ok
+            # Saved either way so progress survives a restart; load_legacy
+            # only serves it once it has passed the check
+            publish_state(self.state, self.model_path)
+            if not ok:
+                print(f"⚠️ Online model not published: accuracy {online_acc:.3f} "
+                      f"is below the active model's {active_acc:.3f}")
+            else:
+                # Hashed features have no vocabulary to export, so no compact copy
+                version = registry.publish(
+                    self.state["pipeline"],
+                    {"features": "stateless", "trained_rows": self.state["trained_rows"],
+                     "corrections_rowid": self.state["corrections_rowid"],
+                     "trained_from": self.state["trained_from"],
+                     "check_accuracy": online_acc, "active_accuracy": active_acc},
+                    kind="online", export=False, root=self.registry_dir
+                )
+                if self.on_publish:
+                    self.on_publish(self.state["pipeline"], version)
+        self.last_update = time.monotonic()
+        return applied
+
+    def due(self):
+        watermark = self.state["corrections_rowid"] if self.state else 0
+        pending = count_pending(watermark, self.db_path)
+        if not pending:
+            return False
+        return pending >= self.threshold or time.monotonic() - self.last_update >= self.interval
+
+    def run(self):
+        while not self._stop_event.is_set():
+            try:
+                if self.state is None or self.due():
+                    self.run_once()
+            except Exception as e:
+                print(f"❌ Online update failed: {e}")
+            self._stop_event.wait(self.poll)
+
+    def stop(self, timeout=None):
+        self._stop_event.set()
+        self.join(timeout)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fold user corrections into the online model")
+    parser.add_argument("--db", default=CORRECTIONS_DB, help="database holding the corrections table")
+    parser.add_argument("--watch", action="store_true", help="keep running and update on a schedule")
+    parser.add_argument("--interval", type=float, default=UPDATE_INTERVAL)
+    parser.add_argument("--threshold", type=int, default=UPDATE_THRESHOLD)
+    args = parser.parse_args()
+
+    trainer = OnlineTrainer(args.db, interval=args.interval, threshold=args.threshold)
+    if not args.watch:
+        start = time.perf_counter()
+        applied = trainer.run_once()
+        print(f"✅ Folded in {applied} corrections in {time.perf_counter() - start:.2f}s "
+              f"({trainer.state['trained_rows']} rows trained in total)")
+    else:
+        print("👀 Watching for corrections (Ctrl+C to stop)...")
+        trainer.start()
+        try:
+            while trainer.is_alive():
+                trainer.join(1)
+        except KeyboardInterrupt:
+            trainer.stop()
@@ -1,28 +1,163 @@
-import os
-import joblib
+import threading
+
 import numpy as np
 
-# Load paths
-BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
-model = joblib.load(os.path.join(BASE_DIR, "model/model.pkl"))
-vectorizer = joblib.load(os.path.join(BASE_DIR, "model/vectorizer.pkl"))
+from src.cache import PredictionCache, normalize_text
+
+TOP_K = 5
+
+_explainer = None
+_load_lock = threading.Lock()
+
+
+def _feature_names(model):
+    """Feature name per column of a Pipeline or CompactModel, or None for hashed features."""
+    if hasattr(model, "named_steps"):
+        try:
+            names = model.named_steps["features"].get_feature_names_out()
+        except (AttributeError, ValueError):
+            return None
+        # Drop the FeatureUnion prefix ("word_tfidf__pizza" -> "pizza")
+        return np.array([name.split("__", 1)[-1] for name in names], dtype=object)
+
+    if any(v.meta.get("kind") == "hashing" for v in model.vectorizers):
+        return None
+    names = np.empty(sum(v.n_features for v in model.vectorizers), dtype=object)
+    for v in model.vectorizers:
+        names[v.meta["offset"] + np.asarray(v.columns)] = np.asarray(v.terms)
+    return names
+
+
+class Explainer:
+    """The active model with everything an explanation needs precomputed.
+
+    Built from the registry's model (a Pipeline or CompactModel), so
+    explanations always come from the model that makes predictions. Feature
+    names and the per-class coefficient rows are built once. An input's
+    explanation only looks at its nonzero features: contribution = tfidf
+    value x coefficient of the predicted class, top-k picked with
+    argpartition. Cost grows with input length, not vocabulary size.
+    Hashed features have no names, so those models predict without
+    explaining.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self.classes_ = model.classes_
+        self.feature_names = _feature_names(model)
+
+        if hasattr(model, "named_steps"):
+            self.transform = model[:-1].transform
+            self.predict_proba = model[-1].predict_proba
+            classifier = model[-1]
+            # Calibrated wrappers keep the linear model underneath
+            linear = classifier if hasattr(classifier, "coef_") else classifier.base_estimator
+            coef = linear.coef_
+        else:
+            self.transform = model.transform
+            self.predict_proba = model.predict_proba_features
+            coef = model.coef
+
+        coef = np.asarray(coef, dtype=np.float64)
+        if coef.shape[0] == 1:
+            # Binary models store one row, for the positive class
+            coef = np.vstack([-coef[0], coef[0]])
+        self.coef = np.ascontiguousarray(coef)
+
+    @property
+    def explains(self):
+        return self.feature_names is not None
+
+    def contributions(self, X, labels):
+        """Per-row (feature indices, contributions) for class indices `labels`."""
+        X = X.tocsr()
+        rows = np.repeat(labels, np.diff(X.indptr))
+        values = X.data * self.coef[rows, X.indices]
+        return [
+            (X.indices[start:stop], values[start:stop])
+            for start, stop in zip(X.indptr[:-1], X.indptr[1:])
+        ]
+
+    def top_features(self, columns, values, top_k=TOP_K):
+        """Names and weights of the `top_k` features pushing towards the class."""
+        positive = values > 0
+        columns, values = columns[positive], values[positive]
+        if len(values) > top_k:
+            keep = np.argpartition(-values, top_k - 1)[:top_k]
+            columns, values = columns[keep], values[keep]
+        order = np.argsort(-values)
+        return self.feature_names[columns[order]].tolist(), values[order].round(4).tolist()
+
+    def explain_many(self, texts, top_k=TOP_K):
+        texts = [normalize_text(t) for t in texts]
+        X = self.transform(texts)
+        probs = self.predict_proba(X)
+        best = probs.argmax(axis=1)
+        best_probs = probs[np.arange(len(texts)), best]
+        nnz = np.diff(X.tocsr().indptr)
+
+        if not self.explains:
+            return [_result(text, str(self.classes_[label]), float(prob), n, None, None)
+                    for text, label, prob, n in zip(texts, best, best_probs, nnz)]
+
+        results = []
+        for text, label, prob, n, (columns, values) in zip(
+                texts, best, best_probs, nnz, self.contributions(X, best)):
+            results.append(_result(text, str(self.classes_[label]), float(prob), n,
+                                   *self.top_features(columns, values, top_k)))
+        return results
+
+
+def load_explainer():
+    """Explainer for the registry's active model, rebuilt when a new version is swapped in."""
+    global _explainer
+    from src.predict import get_pipeline
+
+    model = get_pipeline()
+    if _explainer is None or _explainer.model is not model:
+        with _load_lock:
+            if _explainer is None or _explainer.model is not model:
+                _explainer = Explainer(model)
+                explanation_cache.clear()
+    return _explainer
+
+
+def load_model():
+    """Return the active model (a Pipeline or CompactModel) from the registry."""
+    return load_explainer().model
+
+
+def _model_paths():
+    from src.predict import prediction_cache
+    return prediction_cache.model_paths
+
+
+# Explanations are cached in memory only; they are dropped whenever the active model changes
+explanation_cache = PredictionCache(_model_paths())
 
-LABELS = model.classes_
 
 def predict_with_explanation(text):
-    text = text.lower().strip()
+    return predict_with_explanations([text])[0]
+
+
+def predict_with_explanations(texts, top_k=TOP_K):
+    """Explain many descriptions with one transform and predict_proba call."""
+    explainer = load_explainer()
+    keys = [normalize_text(text) for text in texts]
+    cached = explanation_cache.get_many(keys) if top_k == TOP_K else [None] * len(keys)
 
-    # Convert text to features
-    X = vectorizer.transform([text])
+    misses = list(dict.fromkeys(k for k, hit in zip(keys, cached) if hit is None))
+    if misses:
+        fresh = dict(zip(misses, explainer.explain_many(misses, top_k)))
+        if top_k == TOP_K:
+            explanation_cache.put_many(fresh.items())
+        cached = [fresh[k] if hit is None else hit for k, hit in zip(keys, cached)]
+    return [dict(result) for result in cached]
 
-    # Get probabilities
-    probs = model.predict_proba(X)[0]
-    best_index = np.argmax(probs)
-    best_label = LABELS[best_index]
-    best_prob = probs[best_index]
 
+def _result(text, label, prob, n_features, features, weights):
     # Check if input is weak
-    if X.nnz < 3 or best_prob < 0.55:
+    if n_features < 3 or prob < 0.55:
         return {
             "input": text,
             "prediction": "other",
@@ -32,25 +167,28 @@ def predict_with_explanation(text):
 
     # Confidence level
     confidence = (
-        "high" if best_prob >= 0.75 else "medium"
+        "high" if prob >= 0.75 else "medium"
     )
 
-    # Explainability
-    feature_names = vectorizer.get_feature_names_out()
-    coef = model.base_estimator.coef_[best_index]
-
-    top_features_idx = np.argsort(coef)[-5:]
-    top_features = [feature_names[i] for i in top_features_idx]
+    if features is None:
+        return {
+            "input": text,
+            "prediction": label,
+            "confidence": confidence,
+            "probability": round(prob, 3),
+            "reason": "Hashed features have no names to explain with"
+        }
 
     return {
         "input": text,
-        "prediction": best_label,
+        "prediction": label,
         "confidence": confidence,
-        "probability": round(best_prob, 3),
-        "important_features": top_features,
+        "probability": round(prob, 3),
+        "important_features": features,
+        "feature_weights": weights,
         "explanation": (
-            f"The model detected these signals: {top_features}, "
-            f"which are associated with {best_label}"
+            f"The model detected these signals: {features}, "
+            f"which are associated with {label}"
         )
     }
 
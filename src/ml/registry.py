@@ -0,0 +1,368 @@
+# src/ml/registry.py
+#
+# Versioned model store. Every published model gets its own directory under
+# model/registry/ holding the pickle, an optional compact export and
+# meta.json (training data hash, metrics, feature config). The CURRENT file
+# names the active version and is replaced atomically, so long-running
+# processes notice a new version and swap it in without a restart.
+#
+#   python -m src.ml.registry list
+#   python -m src.ml.registry activate 20250101T120000-ab12cd34
+#   python -m src.ml.registry rollback
+#   python -m src.ml.registry import-legacy     # seed from model/classifier.pkl
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import threading
+import time
+import uuid
+
+from src.metrics import observe
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+REGISTRY_DIR = os.environ.get("EXPENSE_MODEL_REGISTRY") or os.path.join(BASE_DIR, "model", "registry")
+
+# Pre-registry artifacts, still loaded when nothing has been published yet
+LEGACY_MODEL_PATH = os.path.join(BASE_DIR, "model", "classifier.pkl")
+LEGACY_COMPACT_DIR = os.path.join(BASE_DIR, "model", "compact")
+LEGACY_ONLINE_PATH = os.path.join(BASE_DIR, "model", "online.pkl")
+
+CURRENT_FILE = "CURRENT"
+MODEL_FILE = "model.pkl"
+META_FILE = "meta.json"
+COMPACT_SUBDIR = "compact"
+
+KEEP_VERSIONS = 10     # per kind (batch, online); older ones are pruned on publish, never the active one
+CHECK_INTERVAL = 1.0   # seconds between checks of CURRENT in long-running processes
+
+
+# -----------------------------
+# LAYOUT
+# -----------------------------
+def version_dir(version, root=REGISTRY_DIR):
+    return os.path.join(root, version)
+
+
+def current_path(root=REGISTRY_DIR):
+    return os.path.join(root, CURRENT_FILE)
+
+
+def current_version(root=REGISTRY_DIR):
+    """The active version name, or None when nothing has been published."""
+    try:
+        with open(current_path(root)) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def load_metadata(version, root=REGISTRY_DIR):
+    with open(os.path.join(version_dir(version, root), META_FILE)) as f:
+        return json.load(f)
+
+
+def list_versions(root=REGISTRY_DIR):
+    """Metadata of every published version, oldest first.
+
+    Ordered by publish time: names only have second resolution, so two
+    versions published in the same second would otherwise sort by hash.
+    """
+    if not os.path.isdir(root):
+        return []
+    metas = []
+    for name in os.listdir(root):
+        meta_path = os.path.join(root, name, META_FILE)
+        if name.startswith(".") or not os.path.exists(meta_path):
+            continue
+        meta = load_metadata(name, root)
+        # Versions published before published_at was recorded fall back to their meta.json mtime
+        meta.setdefault("published_at", os.path.getmtime(meta_path))
+        metas.append(meta)
+    return sorted(metas, key=lambda m: (m["published_at"], m["version"]))
+
+
+def batch_version(root=REGISTRY_DIR):
+    """Newest published batch version, else an id of the legacy classifier.pkl, else None.
+
+    The online trainer records this as "trained_from": its model only
+    supersedes the batch model that was current when it was started.
+    """
+    batches = [m["version"] for m in list_versions(root) if m.get("kind") == "batch"]
+    return batches[-1] if batches else legacy_version()
+
+
+def legacy_version():
+    """Id of model/classifier.pkl that changes whenever it is retrained."""
+    try:
+        st = os.stat(LEGACY_MODEL_PATH)
+    except FileNotFoundError:
+        return None
+    return f"legacy:{st.st_mtime_ns}:{st.st_size}"
+
+
+# -----------------------------
+# PUBLISH
+# -----------------------------
+def _new_version(model_sha, root):
+    stamp = time.strftime("%Y%m%dT%H%M%S", time.gmtime())
+    version = f"{stamp}-{model_sha[:8]}"
+    n = 1
+    while os.path.exists(version_dir(version, root)):
+        n += 1
+        version = f"{stamp}-{model_sha[:8]}-{n}"
+    return version
+
+
+def activate(version, root=REGISTRY_DIR):
+    """Point CURRENT at `version`; readers see either the old or the new name."""
+    if not os.path.exists(os.path.join(version_dir(version, root), META_FILE)):
+        raise ValueError(f"❌ Unknown model version '{version}'")
+    tmp_path = f"{current_path(root)}.{uuid.uuid4().hex}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(version + "\n")
+    os.replace(tmp_path, current_path(root))
+    return version
+
+
+def rollback(root=REGISTRY_DIR):
+    """Activate the version published before the current one."""
+    versions = [m["version"] for m in list_versions(root)]
+    current = current_version(root)
+    if current not in versions or versions.index(current) == 0:
+        raise ValueError("❌ No earlier model version to roll back to")
+    return activate(versions[versions.index(current) - 1], root)
+
+
+def prune(keep=KEEP_VERSIONS, root=REGISTRY_DIR):
+    """Delete all but the newest `keep` versions of each kind, never the active one.
+
+    Kinds are pruned separately so frequent online publishes can't push the
+    last batch model (the rollback target and the online model's base) out.
+    """
+    current = current_version(root)
+    by_kind = {}
+    for meta in list_versions(root):
+        by_kind.setdefault(meta.get("kind", "batch"), []).append(meta["version"])
+
+    removed = []
+    for versions in by_kind.values():
+        for version in versions[:-keep or None]:
+            if version != current:
+                shutil.rmtree(version_dir(version, root), ignore_errors=True)
+                removed.append(version)
+    return removed
+
+
+def publish(pipeline, metadata=None, kind="batch", export=True, make_current=True,
+            root=REGISTRY_DIR, keep=KEEP_VERSIONS):
+    """Store `pipeline` as a new version and (by default) make it current.
+
+    Everything is written to a hidden temp directory first and renamed into
+    place, so a version directory is complete from the moment it exists.
+    `metadata` is merged into meta.json (data_hash, metrics, features, ...).
+    Returns the version name.
+    """
+    import joblib
+    from src.ml import compact
+
+    os.makedirs(root, exist_ok=True)
+    tmp_dir = os.path.join(root, f".tmp-{uuid.uuid4().hex}")
+    os.makedirs(tmp_dir)
+    try:
+        model_path = os.path.join(tmp_dir, MODEL_FILE)
+        joblib.dump(pipeline, model_path)
+        model_sha = compact.file_sha256(model_path)
+
+        if export:
+            compact.export_compact(pipeline, os.path.join(tmp_dir, COMPACT_SUBDIR), model_path)
+
+        version = _new_version(model_sha, root)
+        meta = {
+            **(metadata or {}),
+            "version": version,
+            "kind": kind,
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "published_at": time.time(),
+            "model_sha256": model_sha,
+            "compact": export
+        }
+        with open(os.path.join(tmp_dir, META_FILE), "w") as f:
+            json.dump(meta, f, indent=2)
+
+        os.replace(tmp_dir, version_dir(version, root))
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+    if make_current:
+        activate(version, root)
+    prune(keep, root)
+    return version
+
+
+# -----------------------------
+# LOAD
+# -----------------------------
+def load_version(version, root=REGISTRY_DIR):
+    """Load one published version, preferring its memory-mapped export."""
+    from src.ml import compact
+
+    directory = version_dir(version, root)
+    model_path = os.path.join(directory, MODEL_FILE)
+    compact_dir = os.path.join(directory, COMPACT_SUBDIR)
+    # Version directories never change, so the hash recorded at publish time is enough
+    meta = load_metadata(version, root)
+    if compact.is_current(compact_dir, model_path, meta.get("model_sha256")):
+        return compact.CompactModel(compact_dir)
+
+    import joblib
+    return joblib.load(model_path)
+
+
+def load_legacy():
+    """Load the pre-registry artifacts in model/ (classifier.pkl, compact/, online.pkl)."""
+    import joblib
+    from src.ml import compact
+
+    # A model updated from user corrections wins until the batch model is retrained
+    if os.path.exists(LEGACY_ONLINE_PATH):
+        state = joblib.load(LEGACY_ONLINE_PATH)
+        if not os.path.exists(LEGACY_MODEL_PATH) or (
+            state.get("published") and state.get("trained_from") == legacy_version()
+        ):
+            return state["pipeline"]
+
+    if compact.is_current(LEGACY_COMPACT_DIR, LEGACY_MODEL_PATH):
+        return compact.CompactModel(LEGACY_COMPACT_DIR)
+
+    if not os.path.exists(LEGACY_MODEL_PATH):
+        raise FileNotFoundError(
+            f"❌ Model not found at {LEGACY_MODEL_PATH}. "
+            "Please run 'python -m src.train' first."
+        )
+    return joblib.load(LEGACY_MODEL_PATH)
+
+
+class ModelRegistry:
+    """Process-wide handle on the active model, reloaded when CURRENT moves.
+
+    `get()` returns a fully loaded model. At most once per `check_interval`
+    it re-reads CURRENT; a new version is loaded by the one thread that wins
+    the reload lock while every other caller keeps getting the old model,
+    and is then swapped in with a single assignment. Callers that fetched
+    the old model finish with it, so no prediction mixes two versions.
+    """
+
+    def __init__(self, root=REGISTRY_DIR, check_interval=CHECK_INTERVAL):
+        self.root = root
+        self.check_interval = check_interval
+        self._active = None   # (version, model); None as version means legacy files
+        self._lock = threading.Lock()
+        self._checked_at = 0.0
+
+        self.load_seconds = None
+        self.reloads = 0
+
+    def _load(self, version):
+        start = time.perf_counter()
+        model = load_version(version, self.root) if version else load_legacy()
+        self.load_seconds = time.perf_counter() - start
+        observe("model.load", self.load_seconds)
+        return version, model
+
+    @property
+    def version(self):
+        return self._active[0] if self._active else current_version(self.root)
+
+    def get(self):
+        active = self._active
+        if active is None:
+            with self._lock:
+                if self._active is None:
+                    self._checked_at = time.monotonic()
+                    self._active = self._load(current_version(self.root))
+                return self._active[1]
+
+        now = time.monotonic()
+        if now - self._checked_at >= self.check_interval:
+            self._checked_at = now
+            self._reload_if_changed()
+        return self._active[1]
+
+    def _reload_if_changed(self):
+        version = current_version(self.root)
+        if version is None or version == self._active[0]:
+            return
+        # Someone else is already loading it; keep serving the old model meanwhile
+        if not self._lock.acquire(blocking=False):
+            return
+        try:
+            if version != self._active[0]:
+                self._active = self._load(version)
+                self.reloads += 1
+        except Exception as e:
+            print(f"⚠️ Could not load model version {version}, keeping {self._active[0] or 'legacy'}: {e}")
+        finally:
+            self._lock.release()
+
+    def set(self, model, version=None):
+        """Swap in a model trained in this process (e.g. by the online trainer)."""
+        with self._lock:
+            self._active = (version or current_version(self.root), model)
+            self._checked_at = time.monotonic()
+
+
+# -----------------------------
+# CLI
+# -----------------------------
+def _print_versions(root):
+    current = current_version(root)
+    versions = list_versions(root)
+    if not versions:
+        print(f"No models published in {root}")
+        return
+    for meta in versions:
+        marker = "*" if meta["version"] == current else " "
+        accuracy = meta.get("test_accuracy")
+        accuracy = f"acc={accuracy:.4f}" if accuracy is not None else ""
+        data = (meta.get("data_hash") or "")[:12]
+        print(f"{marker} {meta['version']:<28} {meta['kind']:<7} {meta.get('features', ''):<8} {accuracy:<11} {data}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage published model versions")
+    parser.add_argument("--root", default=REGISTRY_DIR)
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("list", help="show published versions (* marks the active one)")
+    show = sub.add_parser("show", help="print a version's metadata")
+    show.add_argument("version", nargs="?")
+    act = sub.add_parser("activate", help="make a version current")
+    act.add_argument("version")
+    sub.add_parser("rollback", help="activate the version before the current one")
+    sub.add_parser("import-legacy", help="publish model/classifier.pkl as a version")
+    args = parser.parse_args()
+
+    try:
+        if args.command == "list":
+            _print_versions(args.root)
+        elif args.command == "show":
+            version = args.version or current_version(args.root)
+            if version is None:
+                raise ValueError("❌ No model version is active")
+            print(json.dumps(load_metadata(version, args.root), indent=2))
+        elif args.command == "activate":
+            print(f"✅ Active model: {activate(args.version, args.root)}")
+        elif args.command == "rollback":
+            print(f"✅ Rolled back to {rollback(args.root)}")
+        else:
+            import joblib
+            if not os.path.exists(LEGACY_MODEL_PATH):
+                raise ValueError(f"❌ Model not found at {LEGACY_MODEL_PATH}")
+            version = publish(joblib.load(LEGACY_MODEL_PATH), {"source": LEGACY_MODEL_PATH}, root=args.root)
+            print(f"✅ Published {LEGACY_MODEL_PATH} as {version}")
+    except (ValueError, FileNotFoundError) as e:
+        print(e)
+        sys.exit(1)
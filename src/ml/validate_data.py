@@ -1,28 +1,34 @@
-import pandas as pd
+import argparse
 
-# Load dataset
-df = pd.read_csv("expense_dataset_25000.csv")
+from src.ml.data import CHUNK_SIZE, DATA_PATH, ValidationStats, iter_clean_chunks, write_parquet
 
-print("Total rows:", len(df))
-print("\nCategory counts:")
-print(df["category"].value_counts())
+# Stream the dataset chunk by chunk: clean, validate and write Parquet
+# without ever holding the whole CSV in memory.
+#   python -m src.ml.validate_data [input.csv] [--out cleaned.parquet]
 
-print("\nMissing values:")
-print(df.isnull().sum())
+parser = argparse.ArgumentParser(description="Validate and clean the expense dataset")
+parser.add_argument("path", nargs="?", default=DATA_PATH, help="raw CSV (default: data/expenses.csv)")
+parser.add_argument("--out", default="expense_dataset_cleaned.parquet", help="cleaned Parquet output")
+parser.add_argument("--chunksize", type=int, default=CHUNK_SIZE)
+parser.add_argument("--check-only", action="store_true", help="report without writing output")
+args = parser.parse_args()
 
-# ✅ FIX: use 'text' column instead of 'description'
-df["text"] = df["text"].astype(str).str.lower().str.strip()
-df["category"] = df["category"].astype(str).str.lower().str.strip()
+if args.check_only:
+    stats = ValidationStats()
+    for _ in iter_clean_chunks(args.path, args.chunksize, stats):
+        pass
+else:
+    stats = write_parquet(args.path, args.out, args.chunksize)
 
-# Remove empty text
-df = df[df["text"] != ""]
+print("Total rows:", stats.rows_in)
+print("\nCategory counts:")
+print(stats.raw_categories.sort_values(ascending=False).to_string())
 
-# Keep only valid categories
-valid_categories = ["food", "travel", "shopping", "entertainment", "other"]
-df = df[df["category"].isin(valid_categories)]
+print("\nMissing values:")
+for col, count in stats.missing.items():
+    print(f"{col:<10}{count}")
 
-print("\nAfter cleaning:", len(df))
+print("\nAfter cleaning:", stats.rows_out)
 
-# Save cleaned dataset
-df.to_csv("expense_dataset_cleaned.csv", index=False)
-print("\n✅ Cleaned dataset saved as expense_dataset_cleaned.csv")
+if not args.check_only:
+    print(f"\n✅ Cleaned dataset saved as {args.out}")
@@ -1,21 +1,73 @@
 import os
-import joblib
-import numpy as np
 import sys
-import speech_recognition as sr  # <--- NEW IMPORT
+import numpy as np
+import pandas as pd
+
+from src.cache import PredictionCache, normalize_text
+from src.metrics import incr, timer
+from src.ml.merchants import MerchantRules
+from src.ml.registry import (LEGACY_COMPACT_DIR, LEGACY_MODEL_PATH, LEGACY_ONLINE_PATH, ModelRegistry,
+                             current_path)
 
 # -----------------------------
-# LOAD MODEL
+# LOAD MODEL (lazily, on first prediction)
 # -----------------------------
-BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
-MODEL_PATH = os.path.join(BASE_DIR, "model", "classifier.pkl")
+# Every process shares the loader in src/ml/registry.py: the active
+# published version, or the files in model/ until something is published.
+# A newly published version is picked up within CHECK_INTERVAL seconds.
+
+registry = ModelRegistry()
+load_seconds = None
+
+
+def get_pipeline():
+    """The active model, loaded on first use and reloaded when a new version is published."""
+    global load_seconds
+    model = registry.get()
+    load_seconds = registry.load_seconds
+    return model
+
+
+def model_version():
+    """Registry version of the model in use (None for the legacy files)."""
+    return registry.version
+
 
-if not os.path.exists(MODEL_PATH):
-    print(f"❌ Model not found at {MODEL_PATH}")
-    print("   Please run 'python -m src.train' first.")
-    sys.exit(1)
+def set_pipeline(model, version=None):
+    """Swap in a freshly trained model; in-flight predictions keep the old one."""
+    registry.set(model, version)
+    prediction_cache.clear()
 
-pipeline = joblib.load(MODEL_PATH)
+
+# Optional on-disk cache shared across processes, e.g. EXPENSE_CACHE_DB=data/expenses.db.
+# CURRENT changes on every publish, so cached predictions never outlive their model.
+prediction_cache = PredictionCache(
+    [current_path(registry.root), LEGACY_MODEL_PATH, os.path.join(LEGACY_COMPACT_DIR, "meta.json"),
+     LEGACY_ONLINE_PATH],
+    db_path=os.environ.get("EXPENSE_CACHE_DB")
+)
+
+
+# Known merchants and corrected descriptions skip the model entirely
+# (src/ml/merchants.py). Corrections come from the database being written
+# to, so there is one rule set per database path. Set
+# EXPENSE_MERCHANT_RULES=0 to send everything to the model.
+MERCHANT_RULES_ENABLED = os.environ.get("EXPENSE_MERCHANT_RULES", "1") != "0"
+_merchant_rules = {}
+
+
+def merchant_rules(db_path=None):
+    rules = _merchant_rules.get(db_path)
+    if rules is None:
+        rules = _merchant_rules.setdefault(db_path, MerchantRules(db_path=db_path))
+    return rules
+
+
+PREDICT_BATCH_SIZE = 2048
+
+MODEL_REASON = "Predicted using TF-IDF features"
+FALLBACK_REASON = "Low confidence — fallback applied"
+RULE_REASONS = {"keyword": "Matched known merchant '{}'", "correction": "Matched your earlier correction"}
 
 
 # -----------------------------
@@ -30,39 +82,116 @@ def confidence_label(score):
         return "low"
 
 
+def confidence_labels(scores):
+    scores = np.asarray(scores)
+    return np.select([scores >= 0.85, scores >= 0.60], ["high", "medium"], default="low")
+
+
 # -----------------------------
-# PREDICT FUNCTION
+# PREDICT FUNCTIONS
 # -----------------------------
-def predict_expense(text, threshold=0.40):
-    probs = pipeline.predict_proba([text])[0]
+def _stages(pipeline):
+    """(vectorize, predict_proba) halves of a Pipeline or CompactModel, timed separately."""
+    if hasattr(pipeline, "named_steps"):
+        return pipeline[:-1].transform, pipeline[-1].predict_proba
+    return pipeline.transform, pipeline.predict_proba_features
+
+
+def _score_texts(texts, batch_size):
+    """Best class and probability per text, one predict_proba call per batch.
+
+    The model is fetched once, so a reload mid-call can't mix two versions.
+    """
+    pipeline = get_pipeline()
+    vectorize, predict_proba = _stages(pipeline)
     classes = pipeline.classes_
+    labels = np.empty(len(texts), dtype=object)
+    scores = np.zeros(len(texts), dtype=np.float64)
+
+    for start in range(0, len(texts), batch_size):
+        with timer("predict.vectorize"):
+            X = vectorize(texts[start:start + batch_size])
+        with timer("predict.proba"):
+            probs = predict_proba(X)
+        idx = probs.argmax(axis=1)
+        stop = start + len(idx)
+        labels[start:stop] = classes[idx]
+        scores[start:stop] = probs[np.arange(len(idx)), idx]
+
+    return labels, scores
+
+
+def predict_expenses(texts, threshold=0.40, batch_size=PREDICT_BATCH_SIZE, use_cache=True, use_rules=True,
+                     db_path=None):
+    """Classify many descriptions at once.
+
+    Descriptions are normalized and matched against the merchant rules
+    first; a hit is final, with score 1.0. The rest are looked up in the
+    prediction cache, and the unique misses are vectorized into one sparse
+    matrix per batch and scored with a single predict_proba call.
+    Thresholding and labelling run on whole arrays. Returns a DataFrame with
+    input, category, confidence, score and reason. `db_path` is the database
+    whose corrections the rules use (default: src.database.DB_PATH).
+    """
+    texts = [str(text) for text in texts]
+    keys = [normalize_text(text) for text in texts]
+    n = len(texts)
 
-    best_idx = np.argmax(probs)
-    best_class = classes[best_idx]
-    best_score = probs[best_idx]
+    labels = np.empty(n, dtype=object)
+    scores = np.zeros(n, dtype=np.float64)
+    reasons = np.empty(n, dtype=object)
+    ruled = np.zeros(n, dtype=bool)
 
-    if best_score < threshold:
-        return {
-            "input": text,
-            "category": "other",
-            "confidence": confidence_label(best_score),
-            "score": round(float(best_score), 3),
-            "reason": "Low confidence — fallback applied"
-        }
+    if use_rules and MERCHANT_RULES_ENABLED:
+        with timer("predict.rules"):
+            for i, hit in enumerate(merchant_rules(db_path).match_many(keys)):
+                if hit is not None:
+                    labels[i], scores[i], ruled[i] = hit[0], 1.0, True
+                    reasons[i] = RULE_REASONS[hit[1]].format(hit[2])
 
-    return {
-        "input": text,
-        "category": best_class,
-        "confidence": confidence_label(best_score),
-        "score": round(float(best_score), 3),
-        "reason": "Predicted using TF-IDF features"
-    }
+    rest = np.flatnonzero(~ruled)
+    cached = prediction_cache.get_many([keys[i] for i in rest]) if use_cache and len(rest) else [None] * len(rest)
+    misses = {}
+    for i, hit in zip(rest, cached):
+        if hit is None:
+            misses.setdefault(keys[i], []).append(i)
+        else:
+            labels[i], scores[i] = hit
+    incr("predict.rows", n)
+    incr("predict.rule_hits", int(ruled.sum()))
+    incr("predict.model_rows", len(misses))
+
+    if misses:
+        unique = list(misses)
+        new_labels, new_scores = _score_texts(unique, batch_size)
+        for key, label, score in zip(unique, new_labels, new_scores):
+            positions = misses[key]
+            labels[positions] = label
+            scores[positions] = score
+        if use_cache:
+            prediction_cache.put_many(zip(unique, zip(new_labels.tolist(), new_scores.tolist())))
+
+    fallback = (scores < threshold) & ~ruled
+
+    return pd.DataFrame({
+        "input": texts,
+        "category": np.where(fallback, "other", labels),
+        "confidence": confidence_labels(scores),
+        "score": scores.round(3),
+        "reason": np.where(ruled, reasons, np.where(fallback, FALLBACK_REASON, MODEL_REASON))
+    })
+
+
+def predict_expense(text, threshold=0.40, db_path=None):
+    return predict_expenses([text], threshold=threshold, db_path=db_path).to_dict("records")[0]
 
 
 # -----------------------------
 # VOICE INPUT FUNCTION (NEW)
 # -----------------------------
 def get_voice_input():
+    import speech_recognition as sr
+
     recognizer = sr.Recognizer()
     
     # Try to use the default system microphone
@@ -101,6 +230,12 @@ def get_voice_input():
 # INTERACTIVE MODE
 # -----------------------------
 if __name__ == "__main__":
+    try:
+        get_pipeline()
+    except FileNotFoundError as e:
+        print(e)
+        sys.exit(1)
+
     print("\n🔮 Expense Classifier Loaded!")
     print("Type a description OR type 'v' to use voice.")
     print("Type 'exit' to quit.\n")
@@ -0,0 +1,86 @@
+# src/queries.py
+#
+# Dashboard queries pushed down into SQLite: filtering and aggregation run
+# as indexed GROUP BY queries, and only per-category rows reach pandas.
+
+import pandas as pd
+
+from src.database import connection, to_minor
+from src.metrics import timer
+from src.rollups import DAILY_TOTALS_SQL
+
+BOUNDS_SQL = """
+    SELECT
+        (SELECT MIN(date) FROM expenses),
+        (SELECT MAX(date) FROM expenses),
+        (SELECT MAX(amount_minor) FROM expenses)
+"""
+
+CATEGORY_TOTALS_SQL = """
+    SELECT c.name AS category, t.amount, t.count
+    FROM (
+        SELECT category_id, SUM(amount_minor) / 100.0 AS amount, COUNT(*) AS count
+        FROM expenses
+        WHERE date BETWEEN ? AND ?
+          AND amount_minor BETWEEN ? AND ?
+        GROUP BY category_id
+    ) AS t
+    LEFT JOIN categories c ON c.id = t.category_id
+    ORDER BY t.amount DESC
+"""
+
+MIN_MINOR = -2 ** 63
+MAX_MINOR = 2 ** 63 - 1
+
+
+def update_statistics(path=None):
+    """Keep planner statistics for the indexes in src/migrations.py current."""
+    with connection(path) as conn:
+        # Without statistics the planner may pick the amount index for a full
+        # amount range; gather them once, then let PRAGMA optimize keep them fresh
+        has_stats = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'"
+        ).fetchone()
+        conn.execute("PRAGMA optimize" if has_stats else "ANALYZE")
+
+
+def bounds(path=None):
+    """(first date, last date, largest amount), or None for an empty table.
+
+    Each is a MIN/MAX over an indexed column, so this is O(log n).
+    """
+    with connection(path) as conn, timer("query.bounds"):
+        first, last, max_amount = conn.execute(BOUNDS_SQL).fetchone()
+    if first is None:
+        return None
+    return first, last, (max_amount or 0) / 100
+
+
+def category_totals(start, end, min_amount=None, max_amount=None, path=None):
+    """Spend and transaction count per category inside the filters.
+
+    Without an amount filter the totals come from daily_rollup (src/rollups.py),
+    reading O(days x categories) rows instead of every transaction.
+    """
+    with connection(path) as conn, timer("query.category_totals"):
+        if min_amount is None and max_amount is None:
+            rows = conn.execute(DAILY_TOTALS_SQL, (str(start), str(end))).fetchall()
+        else:
+            rows = conn.execute(
+                CATEGORY_TOTALS_SQL,
+                (str(start), str(end),
+                 MIN_MINOR if min_amount is None else to_minor(min_amount),
+                 MAX_MINOR if max_amount is None else to_minor(max_amount))
+            ).fetchall()
+    return pd.DataFrame(rows, columns=["category", "amount", "count"])
+
+
+def summarize(totals):
+    """Total spent, transaction count and top category from category_totals()."""
+    if totals.empty:
+        return {"total": 0.0, "count": 0, "top_category": None}
+    return {
+        "total": float(totals["amount"].sum()),
+        "count": int(totals["count"].sum()),
+        "top_category": totals.loc[totals["count"].idxmax(), "category"]
+    }
@@ -0,0 +1,234 @@
+# src/reclassify.py
+#
+# Re-run the classifier over every stored expense after a model update.
+#
+# The id range is cut into shards and farmed out to a process pool; each
+# worker loads the model once and classifies its shard in vectorized
+# batches, writing each batch back in one transaction together with its
+# checkpoint. An interrupted run picks up where every shard left off.
+#
+#   python ExpenseTrack.py reclassify [--workers 4]
+#   python -m src.reclassify --db expenses.db --restart
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from src.cache import model_fingerprint
+from src.database import DB_PATH, UPDATE_ASSIGNMENTS, close_pools, ensure_categories, get_connection, init_db
+from src.ml.registry import current_version
+
+BATCH_SIZE = 4096
+SHARD_SIZE = 50_000        # ids per shard; several shards per worker balance the load
+WRITE_TIMEOUT_MS = 60_000  # workers take turns on the write lock
+
+CHECKPOINT_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS reclassify_checkpoints (
+        run_id TEXT NOT NULL,
+        shard_start INTEGER NOT NULL,
+        shard_end INTEGER NOT NULL,
+        last_id INTEGER NOT NULL,
+        rows INTEGER NOT NULL DEFAULT 0,
+        changed INTEGER NOT NULL DEFAULT 0,
+        done INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (run_id, shard_start)
+    )
+"""
+
+# Rows the user recategorised by hand (a corrections entry for the same
+# description) are left alone; the subquery is materialised once per statement
+SELECT_BATCH_SQL = """
+    SELECT id, description, category
+    FROM expense_rows
+    WHERE id > ? AND id <= ?
+      AND lower(description) NOT IN (SELECT lower(description) FROM corrections WHERE description IS NOT NULL)
+    ORDER BY id
+    LIMIT ?
+"""
+
+CHECKPOINT_SQL = """
+    UPDATE reclassify_checkpoints
+    SET last_id = ?, rows = rows + ?, changed = changed + ?, done = ?
+    WHERE run_id = ? AND shard_start = ?
+"""
+
+
+def default_run_id():
+    """Runs are keyed by the active model version, so a new model starts a fresh pass."""
+    from src import predict
+    return (current_version()
+            or model_fingerprint(predict.prediction_cache.model_paths)
+            or "no-model")
+
+
+# -----------------------------
+# PLANNING
+# -----------------------------
+def plan_shards(conn, run_id, shard_size=SHARD_SIZE):
+    """Create checkpoints for a new run; return the unfinished shards.
+
+    Each shard is (shard_start, shard_end, last_id) covering ids in
+    (shard_start, shard_end], resuming after last_id.
+    """
+    conn.execute(CHECKPOINT_SCHEMA)
+    exists = conn.execute(
+        "SELECT 1 FROM reclassify_checkpoints WHERE run_id = ? LIMIT 1", (run_id,)
+    ).fetchone()
+
+    if not exists:
+        low, high = conn.execute("SELECT MIN(id), MAX(id) FROM expenses").fetchone()
+        if low is not None:
+            conn.executemany(
+                "INSERT INTO reclassify_checkpoints (run_id, shard_start, shard_end, last_id) VALUES (?, ?, ?, ?)",
+                ((run_id, start, min(start + shard_size, high), start)
+                 for start in range(low - 1, high, shard_size))
+            )
+        conn.commit()
+
+    return conn.execute(
+        "SELECT shard_start, shard_end, last_id FROM reclassify_checkpoints "
+        "WHERE run_id = ? AND done = 0 ORDER BY shard_start",
+        (run_id,)
+    ).fetchall()
+
+
+def count_remaining(conn, shards):
+    return sum(
+        conn.execute(
+            "SELECT COUNT(*) FROM expenses WHERE id > ? AND id <= ? AND lower(description) NOT IN "
+            "(SELECT lower(description) FROM corrections WHERE description IS NOT NULL)",
+            (last_id, end)
+        ).fetchone()[0]
+        for _, end, last_id in shards
+    )
+
+
+# -----------------------------
+# WORKERS
+# -----------------------------
+_worker = {}
+
+
+def _init_worker(db_path):
+    """Runs once per process: open a connection and load the model."""
+    from src.predict import get_pipeline
+
+    conn = get_connection(db_path)
+    conn.execute(f"PRAGMA busy_timeout={WRITE_TIMEOUT_MS}")
+    get_pipeline()
+
+    _worker["conn"] = conn
+    _worker["db_path"] = db_path
+
+
+def classify_shard(run_id, shard_start, shard_end, last_id, batch_size=BATCH_SIZE, threshold=0.40):
+    """Classify (last_id, shard_end] in batches; returns (shard_start, rows, changed)."""
+    from src.predict import predict_expenses
+
+    conn = _worker["conn"]
+    update_sql = "UPDATE expenses SET {}, {}, {} WHERE id = ?".format(
+        UPDATE_ASSIGNMENTS["category"], UPDATE_ASSIGNMENTS["confidence"], UPDATE_ASSIGNMENTS["score"]
+    )
+
+    rows_total = changed_total = 0
+    while True:
+        rows = conn.execute(SELECT_BATCH_SQL, (last_id, shard_end, batch_size)).fetchall()
+        if not rows:
+            with conn:
+                conn.execute(CHECKPOINT_SQL, (last_id, 0, 0, 1, run_id, shard_start))
+            break
+        ids, descriptions, old_categories = zip(*rows)
+        preds = predict_expenses(descriptions, threshold=threshold, db_path=_worker["db_path"])
+        categories = preds["category"].tolist()
+
+        # Only rewrite rows whose category moved, so the rollup triggers stay quiet
+        updates = [
+            (c, conf, score, i) for i, old, c, conf, score in
+            zip(ids, old_categories, categories, preds["confidence"].tolist(), preds["score"].tolist())
+            if c != old
+        ]
+
+        last_id = ids[-1]
+        done = len(rows) < batch_size
+        with conn:
+            ensure_categories(conn, {u[0] for u in updates})
+            conn.executemany(update_sql, updates)
+            conn.execute(CHECKPOINT_SQL, (last_id, len(rows), len(updates), int(done), run_id, shard_start))
+
+        rows_total += len(rows)
+        changed_total += len(updates)
+        if done:
+            break
+
+    return shard_start, rows_total, changed_total
+
+
+# -----------------------------
+# DRIVER
+# -----------------------------
+def reclassify(db_path=DB_PATH, workers=None, batch_size=BATCH_SIZE, shard_size=SHARD_SIZE,
+               run_id=None, restart=False):
+    """Reclassify every expense; returns a dict with rows, changed, seconds and rows_per_sec."""
+    workers = workers or os.cpu_count() or 1
+    run_id = run_id or default_run_id()
+
+    init_db(db_path)  # a legacy database is upgraded before the workers query expense_rows
+    conn = get_connection(db_path)
+    try:
+        if restart:
+            conn.execute(CHECKPOINT_SCHEMA)
+            conn.execute("DELETE FROM reclassify_checkpoints WHERE run_id = ?", (run_id,))
+            conn.commit()
+        shards = plan_shards(conn, run_id, shard_size)
+        remaining = count_remaining(conn, shards)
+    finally:
+        conn.close()
+
+    if not shards:
+        print("✅ Nothing to do: every shard of this run is already classified")
+        return {"rows": 0, "changed": 0, "seconds": 0.0, "rows_per_sec": 0.0}
+
+    print(f"⏳ Reclassifying {remaining} expenses in {len(shards)} shards with {workers} workers")
+    start = time.perf_counter()
+    rows = changed = 0
+
+    # Workers are forked: SQLite connections must not cross fork(), so the
+    # pooled ones opened by init_db() are closed first
+    close_pools()
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(db_path,)) as pool:
+        futures = [
+            pool.submit(classify_shard, run_id, shard_start, shard_end, last_id, batch_size)
+            for shard_start, shard_end, last_id in shards
+        ]
+        for future in as_completed(futures):
+            _, shard_rows, shard_changed = future.result()
+            rows += shard_rows
+            changed += shard_changed
+            elapsed = time.perf_counter() - start
+            print(f"   {rows}/{remaining} rows, {changed} changed, {rows / elapsed:.0f} rows/sec")
+
+    seconds = time.perf_counter() - start
+    return {
+        "rows": rows,
+        "changed": changed,
+        "seconds": round(seconds, 3),
+        "rows_per_sec": round(rows / seconds, 1) if seconds else float(rows)
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Reclassify stored expenses with the current model")
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--workers", type=int, help="worker processes (default: CPU count)")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--shard-size", type=int, default=SHARD_SIZE)
+    parser.add_argument("--run-id", help="checkpoint key (default: the active model version)")
+    parser.add_argument("--restart", action="store_true", help="ignore checkpoints of this run and start over")
+    args = parser.parse_args()
+
+    stats = reclassify(args.db, args.workers, args.batch_size, args.shard_size, args.run_id, args.restart)
+    print(
+        f"✅ Reclassified {stats['rows']} expenses ({stats['changed']} changed) in {stats['seconds']}s "
+        f"({stats['rows_per_sec']} rows/sec)"
+    )
@@ -0,0 +1,148 @@
+# src/rollups.py
+#
+# Per-day and per-month x category summaries (sum, count, min, max) of the
+# expenses table, kept current by triggers:
+#   - INSERT folds the new row in with an O(1) upsert
+#   - UPDATE / DELETE recompute only the affected day x category from the
+#     (category_id, date, amount_minor) index, then its month from at most
+#     31 daily rows
+# Totals are integer minor units, so incremental sums never drift.
+#
+# Rebuild everything from scratch with:
+#   python -m src.rollups rebuild [--db expenses.db]
+
+import argparse
+import time
+
+from src.database import DB_PATH, connection, init_db
+
+SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS daily_rollup (
+        day TEXT NOT NULL,
+        category_id INTEGER NOT NULL REFERENCES categories(id),
+        total_minor INTEGER NOT NULL,
+        count INTEGER NOT NULL,
+        min_minor INTEGER NOT NULL,
+        max_minor INTEGER NOT NULL,
+        PRIMARY KEY (day, category_id)
+    ) WITHOUT ROWID
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS monthly_rollup (
+        month TEXT NOT NULL,
+        category_id INTEGER NOT NULL REFERENCES categories(id),
+        total_minor INTEGER NOT NULL,
+        count INTEGER NOT NULL,
+        min_minor INTEGER NOT NULL,
+        max_minor INTEGER NOT NULL,
+        PRIMARY KEY (month, category_id)
+    ) WITHOUT ROWID
+    """,
+)
+
+# Fold one new row into a rollup table
+_UPSERT = """
+    INSERT INTO {table} ({key}, category_id, total_minor, count, min_minor, max_minor)
+    VALUES (substr(NEW.date, 1, {width}), NEW.category_id, NEW.amount_minor, 1, NEW.amount_minor, NEW.amount_minor)
+    ON CONFLICT ({key}, category_id) DO UPDATE SET
+        total_minor = total_minor + excluded.total_minor,
+        count = count + 1,
+        min_minor = MIN(min_minor, excluded.min_minor),
+        max_minor = MAX(max_minor, excluded.max_minor);
+"""
+
+# Recompute the day x category and month x category groups of one row
+_RECOMPUTE = """
+    DELETE FROM daily_rollup
+    WHERE day = {row}.date AND category_id = {row}.category_id;
+    INSERT INTO daily_rollup (day, category_id, total_minor, count, min_minor, max_minor)
+    SELECT {row}.date, category_id, SUM(amount_minor), COUNT(*), MIN(amount_minor), MAX(amount_minor)
+    FROM expenses
+    WHERE category_id = {row}.category_id AND date = {row}.date
+    GROUP BY category_id;
+
+    DELETE FROM monthly_rollup
+    WHERE month = substr({row}.date, 1, 7) AND category_id = {row}.category_id;
+    INSERT INTO monthly_rollup (month, category_id, total_minor, count, min_minor, max_minor)
+    SELECT substr({row}.date, 1, 7), category_id, SUM(total_minor), SUM(count), MIN(min_minor), MAX(max_minor)
+    FROM daily_rollup
+    WHERE category_id = {row}.category_id
+      AND day BETWEEN substr({row}.date, 1, 7) || '-01' AND substr({row}.date, 1, 7) || '-31'
+    GROUP BY category_id;
+"""
+
+TRIGGERS = (
+    "CREATE TRIGGER IF NOT EXISTS expenses_rollup_insert AFTER INSERT ON expenses "
+    "WHEN NEW.category_id IS NOT NULL BEGIN"
+    + _UPSERT.format(table="daily_rollup", key="day", width=10)
+    + _UPSERT.format(table="monthly_rollup", key="month", width=7)
+    + "END",
+
+    "CREATE TRIGGER IF NOT EXISTS expenses_rollup_delete AFTER DELETE ON expenses BEGIN"
+    + _RECOMPUTE.format(row="OLD")
+    + "END",
+
+    "CREATE TRIGGER IF NOT EXISTS expenses_rollup_update "
+    "AFTER UPDATE OF date, category_id, amount_minor ON expenses BEGIN"
+    + _RECOMPUTE.format(row="OLD")
+    + _RECOMPUTE.format(row="NEW")
+    + "END",
+)
+
+REBUILD = (
+    "DELETE FROM daily_rollup",
+    "DELETE FROM monthly_rollup",
+    """
+    INSERT INTO daily_rollup (day, category_id, total_minor, count, min_minor, max_minor)
+    SELECT date, category_id, SUM(amount_minor), COUNT(*), MIN(amount_minor), MAX(amount_minor)
+    FROM expenses
+    WHERE category_id IS NOT NULL
+    GROUP BY date, category_id
+    """,
+    """
+    INSERT INTO monthly_rollup (month, category_id, total_minor, count, min_minor, max_minor)
+    SELECT substr(day, 1, 7), category_id, SUM(total_minor), SUM(count), MIN(min_minor), MAX(max_minor)
+    FROM daily_rollup
+    GROUP BY substr(day, 1, 7), category_id
+    """,
+)
+
+DAILY_TOTALS_SQL = """
+    SELECT c.name AS category, t.amount, t.count
+    FROM (
+        SELECT category_id, SUM(total_minor) / 100.0 AS amount, SUM(count) AS count
+        FROM daily_rollup
+        WHERE day BETWEEN ? AND ?
+        GROUP BY category_id
+    ) AS t
+    JOIN categories c ON c.id = t.category_id
+    ORDER BY t.amount DESC
+"""
+
+
+def install(conn):
+    """Create the rollup tables and triggers and fill them (schema migration 2)."""
+    for sql in SCHEMA + TRIGGERS + REBUILD:
+        conn.execute(sql)
+
+
+def rebuild(path=None):
+    """Recompute every rollup row; migrates the database first so the tables exist."""
+    init_db(path)
+    start = time.perf_counter()
+    with connection(path) as conn:
+        for sql in REBUILD:
+            conn.execute(sql)
+        days = conn.execute("SELECT COUNT(*) FROM daily_rollup").fetchone()[0]
+    return {"daily_rows": days, "seconds": round(time.perf_counter() - start, 3)}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Maintain expense rollup tables")
+    parser.add_argument("command", choices=["rebuild"])
+    parser.add_argument("--db", default=DB_PATH)
+    args = parser.parse_args()
+
+    stats = rebuild(args.db)
+    print(f"✅ Rebuilt {stats['daily_rows']} daily rollup rows in {stats['seconds']}s")
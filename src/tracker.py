@@ -1,21 +1,205 @@
 # src/tracker.py
 
-from src.database import get_connection
-from src.ml.predict import predict_category
+import csv
+import math
+import re
+from datetime import datetime
+from itertools import islice
 
+from src.database import BULK_CHUNK_SIZE, init_db, insert_expense, insert_expenses_bulk
+from src.metrics import timed
 
-def add_expense(description, amount):
-    category = predict_category(description)
+# src.predict pulls in numpy/pandas and the model, so it is imported inside the
+# functions that classify; the CLI stays fast when nothing is predicted.
 
-    conn = get_connection()
-    cur = conn.cursor()
+DESCRIPTION_COLUMNS = ("description", "Description", "text", "narration", "Narration")
+AMOUNT_COLUMNS = ("amount", "Amount", "debit", "Debit")
+CATEGORY_COLUMNS = ("category", "Category")
+DATE_COLUMNS = ("date", "Date", "Txn Date", "Transaction Date", "Value Date")
+
+# "Rs. 99", "INR 250", "₹250", "120.00 Dr": currency marks and debit/credit suffixes
+CURRENCY_RE = re.compile(r"(?i)\b(?:rs|inr|usd)\b\.?|[₹$€£]|\s*\b(?:dr|cr)\b\.?$")
+
+# Bank statements are day-first; ISO is tried first so it is never misread
+DATE_FORMATS = ("%Y-%m-%d", "%d/%m/%Y", "%d-%m-%Y", "%d.%m.%Y", "%d/%m/%y", "%d-%m-%y",
+                "%d %b %Y", "%d-%b-%Y", "%d %b %y", "%d-%b-%y", "%Y/%m/%d")
 
-    cur.execute(
-        "INSERT INTO expenses (description, amount, category) VALUES (?, ?, ?)",
-        (description, amount, category)
-    )
 
-    conn.commit()
-    conn.close()
+@timed("tracker.add")
+def add_expense(description, amount, ingest_url=None):
+    # With an ingest service running (src/ingest_service.py), hand the
+    # expense to its queue instead of classifying and writing here
+    from src.ingest_service import service_url, submit_expenses
+
+    ingest_url = ingest_url or service_url()
+    if ingest_url:
+        category = submit_expenses([{"description": description, "amount": amount}], ingest_url)[0]["category"]
+    else:
+        from src.predict import predict_expense
+        prediction = predict_expense(description)
+        category = prediction["category"]
+        init_db()
+        insert_expense(description, amount, category,
+                       confidence=prediction["confidence"], score=prediction["score"])
 
     print(f"Expense added under category: {category}")
+
+
+# -----------------------------
+# CSV IMPORT
+# -----------------------------
+def _pick_column(fieldnames, candidates, required=True):
+    for name in candidates:
+        if name in fieldnames:
+            return name
+    if required:
+        raise KeyError(f"❌ None of {list(candidates)} found in CSV. Available: {fieldnames}")
+    return None
+
+
+def _parse_amount(value):
+    """Float amount of a statement cell, or None when there is no usable number.
+
+    Currency symbols and thousands separators are ignored and "(120.00)"
+    is read as -120.
+    """
+    text = CURRENCY_RE.sub("", str(value or "")).replace(",", "").replace(" ", "")
+    negative = text.startswith("(") and text.endswith(")")
+    try:
+        amount = float(text.strip("()"))
+    except ValueError:
+        return None
+    if not math.isfinite(amount):
+        return None
+    return -amount if negative else amount
+
+
+def _parse_date(value):
+    """ISO date of a statement date cell, or None when it can't be read."""
+    parts = str(value or "").split()
+    # Drop a time part such as "01/02/2024 10:15"
+    if parts and ":" in parts[-1]:
+        parts = parts[:-1]
+    value = " ".join(parts)
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).date().isoformat()
+        except ValueError:
+            continue
+    return None
+
+
+def read_expense_csv(csv_path, skipped=None):
+    """Stream (description, amount, category, date) rows out of a CSV export.
+
+    Category is an empty string when the export does not provide one; date
+    is None (stored as today) when there is no date column or it can't be read.
+    Rows without a usable amount are left out and counted in
+    skipped["amount"] when a `skipped` dict is passed.
+    """
+    with open(csv_path, newline="", encoding="utf-8-sig") as f:
+        reader = csv.DictReader(f)
+        fieldnames = [name.strip() for name in reader.fieldnames or []]
+        reader.fieldnames = fieldnames
+
+        desc_col = _pick_column(fieldnames, DESCRIPTION_COLUMNS)
+        amount_col = _pick_column(fieldnames, AMOUNT_COLUMNS)
+        category_col = _pick_column(fieldnames, CATEGORY_COLUMNS, required=False)
+        date_col = _pick_column(fieldnames, DATE_COLUMNS, required=False)
+
+        for row in reader:
+            description = (row[desc_col] or "").strip()
+            if not description:
+                continue
+            category = (row[category_col] or "").strip() if category_col else ""
+            amount = _parse_amount(row[amount_col])
+            if amount is None:
+                if skipped is not None:
+                    skipped["amount"] = skipped.get("amount", 0) + 1
+                continue
+            day = _parse_date(row[date_col]) if date_col else None
+            yield description, amount, category, day
+
+
+def classify_rows(rows, batch_size=None, db_path=None):
+    """Fill in missing categories, one predict_expenses call per batch.
+
+    Yields (description, amount, category, date, confidence, score); the
+    confidence and score are None for rows that came with a category.
+    `db_path` is the database whose corrections the merchant rules use.
+    """
+    from src.predict import PREDICT_BATCH_SIZE, predict_expenses
+
+    batch_size = batch_size or PREDICT_BATCH_SIZE
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, batch_size))
+        if not chunk:
+            break
+
+        chunk = [(description, amount, category, day, None, None) for description, amount, category, day in chunk]
+        missing = [i for i, row in enumerate(chunk) if not row[2]]
+        if missing:
+            predicted = predict_expenses([chunk[i][0] for i in missing], db_path=db_path)
+            for i, (category, confidence, score) in zip(
+                missing, predicted[["category", "confidence", "score"]].itertuples(index=False)
+            ):
+                description, amount, _, day, _, _ = chunk[i]
+                chunk[i] = (description, amount, category, day, confidence, float(score))
+
+        yield from chunk
+
+
+@timed("tracker.import")
+def import_csv(csv_path, chunk_size=BULK_CHUNK_SIZE, path=None):
+    init_db(path)
+    skipped = {}
+    rows = classify_rows(read_expense_csv(csv_path, skipped), db_path=path)
+    stats = insert_expenses_bulk(rows, chunk_size=chunk_size, path=path)
+    stats["skipped"] = skipped.get("amount", 0)
+
+    print(
+        f"Imported {stats['rows']} expenses in {stats['seconds']}s "
+        f"({stats['rows_per_sec']} rows/sec)"
+    )
+    if stats["skipped"]:
+        print(f"⚠️ Skipped {stats['skipped']} rows with no usable amount")
+    return stats
+
+
+# -----------------------------
+# REPORT
+# -----------------------------
+def print_report(path=None, budget=None, month=None, top=5):
+    from src import analytics
+
+    df = analytics.load_expenses(path)
+    if df.empty:
+        print("No dated expenses yet.")
+        return
+
+    print(f"📅 {df['date'].min():%Y-%m-%d} → {df['date'].max():%Y-%m-%d}, {len(df)} expenses\n")
+
+    latest = analytics.month_over_month(df).iloc[-1]
+    print(f"Month over month ({latest.name})")
+    print(_table(latest.unstack(0)[["spend", "delta", "pct_change"]]))
+
+    recent = analytics.trailing_spend(df)
+    print(f"\nLast 7 days:  ₹{recent['last_7d']:.2f}")
+    print(f"Last 30 days: ₹{recent['last_30d']:.2f}")
+
+    print("\nTop merchants")
+    print(_table(analytics.top_merchants(df, top)))
+
+    if budget:
+        burn = analytics.burn_rate(df, budget, month=month)
+        print(
+            f"\n💰 {burn['month']}: spent ₹{burn['spent']:.2f} of ₹{burn['budget']:.2f} "
+            f"({burn['burn_pct']}%), ₹{burn['daily_rate']:.2f}/day, projected ₹{burn['projected']:.2f}"
+        )
+        if burn["runs_out_day"]:
+            print(f"⚠️ At this rate the budget runs out on day {burn['runs_out_day']}")
+
+
+def _table(frame):
+    return frame.to_string(float_format=lambda v: f"{v:,.2f}")
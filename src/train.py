@@ -1,13 +1,22 @@
+import argparse
+import hashlib
+import json
 import os
 import sys
+import time
+from contextlib import contextmanager
+
 import joblib
 import pandas as pd
 
-from sklearn.model_selection import train_test_split
-from sklearn.pipeline import Pipeline, FeatureUnion
-from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.model_selection import GridSearchCV, train_test_split
+from sklearn.pipeline import Pipeline
 from sklearn.linear_model import LogisticRegression
-from sklearn.metrics import classification_report
+from sklearn.metrics import accuracy_score, classification_report
+
+from src.ml import registry
+from src.ml.data import load_dataset
+from src.ml.features import FEATURE_MODES, build_features
 
 # -----------------------------
 # PATHS
@@ -15,123 +24,201 @@ from sklearn.metrics import classification_report
 BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 DATA_PATH = os.path.join(BASE_DIR, "data", "expenses.csv")
 MODEL_DIR = os.path.join(BASE_DIR, "model")
-
-os.makedirs(MODEL_DIR, exist_ok=True)
+CACHE_DIR = os.path.join(BASE_DIR, ".cache", "train")
 
 
 # -----------------------------
-# LOAD DATA & FIX COLUMNS (UPDATED)
+# SEARCH SPACE
 # -----------------------------
-if not os.path.exists(DATA_PATH):
-    print(f"❌ Error: File not found at {DATA_PATH}")
-    sys.exit(1)
-
-df = pd.read_csv(DATA_PATH)
-
-# 1. Clean column names (remove leading/trailing spaces)
-df.columns = df.columns.str.strip()
-
-# 2. Check for 'text' column
-# Use 'text' if present, otherwise look for alternatives
-if "text" not in df.columns:
-    if "Description" in df.columns and "category" in df.columns:
-        # If we have category, then Description is likely the text
-        print("⚠️ Column 'text' missing. Mapping 'Description' -> 'text'")
-        df.rename(columns={"Description": "text"}, inplace=True)
-    else:
-        raise KeyError(f"❌ Could not find a 'text' column. Available: {df.columns.tolist()}")
-
-# 3. Ensure 'category' column exists (target variable)
-if "category" not in df.columns:
-    # >>> THIS IS THE FIX <<<
-    # Your CSV uses 'Description' for the category labels
-    if "Description" in df.columns:
-         print("⚠️ Column 'category' missing. Mapping 'Description' -> 'category'")
-         df.rename(columns={"Description": "category"}, inplace=True)
-    elif "Category" in df.columns:
-         df.rename(columns={"Category": "category"}, inplace=True)
-    else:
-        raise KeyError(f"❌ Missing target column 'category'. Available: {df.columns.tolist()}")
+PARAM_GRIDS = {
+    "tfidf": {
+        "features__word_tfidf__ngram_range": [(1, 1), (1, 2)],
+        "features__word_tfidf__min_df": [1, 2],
+        "features__char_tfidf__ngram_range": [(2, 4), (3, 5)],
+        "features__char_tfidf__min_df": [2, 3],
+        "classifier__C": [0.5, 1.0, 4.0]
+    },
+    "hashing": {
+        "features__word_hash__hash__ngram_range": [(1, 1), (1, 2)],
+        "features__char_hash__hash__ngram_range": [(2, 4), (3, 5)],
+        "classifier__C": [0.5, 1.0, 4.0]
+    }
+}
 
-# 4. Drop rows with missing values
-df.dropna(subset=["text", "category"], inplace=True)
 
-X = df["text"].astype(str)
-y = df["category"].astype(str)
+# -----------------------------
+# STAGE TIMER
+# -----------------------------
+class StageTimer:
+    def __init__(self):
+        self.stages = {}
 
-print(f"✅ Data loaded: {len(df)} rows")
-print(f"   Example text: {X.iloc[0]}")
-print(f"   Example category: {y.iloc[0]}")
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = round(time.perf_counter() - start, 3)
+            print(f"⏱  {name}: {self.stages[name]:.2f}s")
 
 
 # -----------------------------
-# TRAIN / TEST SPLIT
+# LOAD DATA
 # -----------------------------
-X_train, X_test, y_train, y_test = train_test_split(
-    X,
-    y,
-    test_size=0.2,
-    random_state=42,
-    stratify=y
-)
+def load_data(data_path=DATA_PATH):
+    """Stream, clean and validate the dataset (CSV or cleaned Parquet).
 
+    Column mapping, lower-casing and label validation live in src/ml/data.py
+    and run one chunk at a time.
+    """
+    if not os.path.exists(data_path):
+        print(f"❌ Error: File not found at {data_path}")
+        sys.exit(1)
 
-# -----------------------------
-# FEATURE PIPELINE
-# -----------------------------
-word_tfidf = TfidfVectorizer(
-    lowercase=True,
-    ngram_range=(1, 2),
-    min_df=2
-)
+    df = load_dataset(data_path)
 
-char_tfidf = TfidfVectorizer(
-    analyzer="char",
-    ngram_range=(3, 5),
-    min_df=2
-)
+    X = df["text"]
+    y = df["category"]
 
-features = FeatureUnion([
-    ("word_tfidf", word_tfidf),
-    ("char_tfidf", char_tfidf)
-])
+    print(f"✅ Data loaded: {len(df)} rows")
+    print(f"   Example text: {X.iloc[0]}")
+    print(f"   Example category: {y.iloc[0]}")
+    return X, y
 
 
-# -----------------------------
-# CLASSIFIER
-# -----------------------------
-classifier = LogisticRegression(
-    max_iter=1000,
-    class_weight="balanced"
-)
+def data_hash(X, y):
+    frame = pd.DataFrame({"text": X.to_numpy(), "category": y.to_numpy()})
+    rows = pd.util.hash_pandas_object(frame, index=False).to_numpy()
+    return hashlib.sha256(rows.tobytes()).hexdigest()[:16]
 
 
 # -----------------------------
 # FULL PIPELINE
 # -----------------------------
-pipeline = Pipeline([
-    ("features", features),
-    ("classifier", classifier)
-])
+def build_pipeline(features="tfidf", memory=None):
+    classifier = LogisticRegression(
+        max_iter=1000,
+        class_weight="balanced"
+    )
+    # With `memory`, the fitted FeatureUnion (the expensive char n-grams) is
+    # cached on disk and reused whenever the data and feature params repeat
+    return Pipeline([
+        ("features", build_features(features)),
+        ("classifier", classifier)
+    ], memory=memory)
 
 
 # -----------------------------
 # TRAIN
 # -----------------------------
-print("⏳ Training model...")
-pipeline.fit(X_train, y_train)
-
-
-# -----------------------------
-# EVALUATE
-# -----------------------------
-y_pred = pipeline.predict(X_test)
-print("\n" + classification_report(y_test, y_pred))
-
-
-# -----------------------------
-# SAVE MODEL
-# -----------------------------
-joblib.dump(pipeline, os.path.join(MODEL_DIR, "classifier.pkl"))
-
-print(f"✅ Model saved to {os.path.join(MODEL_DIR, 'classifier.pkl')}")
\ No newline at end of file
+def train(data_path=DATA_PATH, features="tfidf", search=False, cv=3, n_jobs=-1,
+          use_cache=True, model_dir=MODEL_DIR, registry_dir=registry.REGISTRY_DIR):
+    """Fit (optionally grid-search) the classifier and publish it to the registry.
+
+    Returns (pipeline, report). The report holds the registry version,
+    per-stage timings, the data hash, the chosen params and test metrics; it
+    is stored with the version and written to model/train_report.json.
+    """
+    os.makedirs(model_dir, exist_ok=True)
+    timer = StageTimer()
+
+    with timer.stage("load"):
+        X, y = load_data(data_path)
+        digest = data_hash(X, y)
+
+    with timer.stage("split"):
+        X_train, X_test, y_train, y_test = train_test_split(
+            X,
+            y,
+            test_size=0.2,
+            random_state=42,
+            stratify=y
+        )
+
+    memory = None
+    if use_cache:
+        # One cache directory per dataset version; stale ones can be deleted freely
+        memory = joblib.Memory(os.path.join(CACHE_DIR, digest), verbose=0)
+
+    print(f"   Feature mode: {features}")
+    pipeline = build_pipeline(features, memory=memory)
+    search_result = {}
+
+    if search:
+        grid = PARAM_GRIDS[features]
+        n_candidates = 1
+        for values in grid.values():
+            n_candidates *= len(values)
+        print(f"⏳ Grid search: {n_candidates} candidates x {cv} folds (n_jobs={n_jobs})...")
+
+        with timer.stage("search"):
+            gs = GridSearchCV(pipeline, grid, cv=cv, n_jobs=n_jobs, scoring="f1_macro", refit=True)
+            gs.fit(X_train, y_train)
+        pipeline = gs.best_estimator_
+        search_result = {
+            "best_params": {k: list(v) if isinstance(v, tuple) else v for k, v in gs.best_params_.items()},
+            "best_cv_f1_macro": round(float(gs.best_score_), 4),
+            "candidates": n_candidates
+        }
+        print(f"✅ Best params: {gs.best_params_} (cv f1_macro={gs.best_score_:.4f})")
+    else:
+        print("⏳ Training model...")
+        with timer.stage("fit"):
+            pipeline.fit(X_train, y_train)
+
+    with timer.stage("evaluate"):
+        y_pred = pipeline.predict(X_test)
+    print("\n" + classification_report(y_test, y_pred))
+
+    # The on-disk cache is only for training; don't pickle a reference to it
+    pipeline.set_params(memory=None)
+
+    report = {
+        "data_path": data_path,
+        "data_hash": digest,
+        "rows": len(X),
+        "features": features,
+        "cached": use_cache,
+        "test_accuracy": round(float(accuracy_score(y_test, y_pred)), 4),
+        "classification_report": classification_report(y_test, y_pred, output_dict=True),
+        **search_result
+    }
+
+    # New version in the model registry, with its flat memory-mapped export
+    # (see src/ml/compact.py). Running processes switch to it on their own.
+    with timer.stage("publish"):
+        version = registry.publish(pipeline, report, root=registry_dir)
+    report["version"] = version
+    report["timings_s"] = timer.stages
+    print(f"✅ Model published as version {version}")
+
+    report_path = os.path.join(model_dir, "train_report.json")
+    with open(report_path, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"✅ Timing report written to {report_path}")
+
+    return pipeline, report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train the expense classifier")
+    parser.add_argument("--data", default=DATA_PATH,
+                        help="training CSV or cleaned Parquet (default: data/expenses.csv)")
+    parser.add_argument("--features", choices=FEATURE_MODES, default="tfidf",
+                        help="vocabulary TF-IDF (default) or stateless hashing + idf")
+    parser.add_argument("--search", action="store_true",
+                        help="cross-validated grid search over n-gram ranges, min_df and C")
+    parser.add_argument("--cv", type=int, default=3, help="folds for --search (default: 3)")
+    parser.add_argument("--n-jobs", type=int, default=-1, help="parallel workers for --search (default: all cores)")
+    parser.add_argument("--no-cache", action="store_true", help="don't reuse cached feature matrices")
+    args = parser.parse_args()
+
+    train(
+        data_path=args.data,
+        features=args.features,
+        search=args.search,
+        cv=args.cv,
+        n_jobs=args.n_jobs,
+        use_cache=not args.no_cache
+    )